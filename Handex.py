@@ -1,10 +1,18 @@
 # Assuming you have not changed the general structure of the template no modification is needed in this file.
 from . import commands
 from .lib import fusion360utils as futil
+from . import config
+import os
 
 
 def run(context):
     try:
+        if config.perf_history:
+            futil.start_perf_recorder(os.path.join(os.path.dirname(__file__), config.perf_history_file),
+                                      config.perf_history_days, config.perf_history_max_bytes)
+        if config.profile_allocations:
+            futil.start_allocation_profile(os.path.join(os.path.dirname(__file__), config.allocation_profile_file))
+
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.start()
 
@@ -14,11 +22,21 @@ def run(context):
 
 def stop(context):
     try:
+        # Stop any long running jobs before their event handlers are released
+        futil.cancel_jobs()
+        futil.shutdown_workers()
+
         # Remove all of the event handlers your app has created
         futil.clear_handlers()
 
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.stop()
 
+        # Anything still listed here was never released and is leaking
+        futil.log(f'Live event handlers after stop: {futil.handler_counts()}')
+
+        futil.stop_allocation_profile()
+        futil.stop_perf_recorder()
+
     except:
         futil.handle_error('stop')
\ No newline at end of file
@@ -14,7 +14,9 @@ import os
 import io
 
 import math
+import time
 from ...lib import fusion360utils as futil
+from ...lib.handex.face_index import FaceIndex, IndexedFace
 from ... import config
 from dataclasses import dataclass
 import csv 
@@ -52,6 +54,19 @@ ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource
 # Holds references to event handlers
 local_handlers = []
 
+# Planar faces of every body, kept between runs of the command and updated
+# only for bodies whose shape changed.
+face_index = FaceIndex()
+
+# (index key, body) of every indexed body. Keys are the entity tokens the
+# bodies had when first indexed; Fusion may hand out a different token for
+# the same body later, so bodies are matched by resolving the keys instead
+# of comparing token strings.
+indexed_bodies = []
+
+# Suggestions listed in the dialog, in the order of the drop down.
+suggestions = []
+
 @dataclass
 class Points:
     x: float
@@ -134,6 +149,7 @@ def stop():
 
 
 def describe_body(body:adsk.fusion.BRepBody, plane: adsk.fusion.ConstructionPlane = rootComp.xZConstructionPlane)->str:
+    body = futil.cached(body)
     outString = ''
     outString = f'- {body.name}:\n'
     outBody:adsk.fusion.BRepBody = Object()
@@ -146,7 +162,7 @@ def describe_body(body:adsk.fusion.BRepBody, plane: adsk.fusion.ConstructionPlan
         futil.log(f'Comparing {body.name} to {plane.name}\n{plane.geometry}')
     for face in body.faces:
         if face.area > 0.5:
-            outBody.BRepFaces.append(face)
+            outBody.BRepFaces.append(futil.unwrap(face, read_only=True))
             outFace = Object()
             outFace.tempId = face.tempId
             outFace.area = face.area
@@ -156,11 +172,12 @@ def describe_body(body:adsk.fusion.BRepBody, plane: adsk.fusion.ConstructionPlan
     return outString, outBody
 
 def measure_faces(face1:adsk.fusion.BRepFace, face2:adsk.fusion.BRepFace, outBody:adsk.fusion.BRepBody)->str:
+    face1, face2 = futil.cached(face1), futil.cached(face2)
     outString = ''
     outString += f'{face1.body.name} {face1.tempId} to {face2.body.name} {face2.tempId}:\n'
     outString += f'  - face1_to_face2_centroid_distance: {10 * face1.centroid.distanceTo(face2.centroid)}\n'
 
-    measuredAngle = app.measureManager.measureAngle(face1, face2)
+    measuredAngle = app.measureManager.measureAngle(futil.unwrap(face1, read_only=True), futil.unwrap(face2, read_only=True))
     if outBody:
         outBody.positionOne = [math.degrees(a) for a in measuredAngle.positionOne.asArray()]
 
@@ -196,6 +213,76 @@ def measure_faces(face1:adsk.fusion.BRepFace, face2:adsk.fusion.BRepFace, outBod
     
     return outString
     
+def indexed_face(face:adsk.fusion.BRepFace, body_key:str)->IndexedFace:
+    face = futil.cached(face)
+    if face.geometry.surfaceType == adsk.core.SurfaceTypes.PlaneSurfaceType:
+        normal = face.geometry.normal.asArray()
+    else:
+        normal = face.evaluator.getNormalAtPoint(face.pointOnFace)[1].asArray()
+    return IndexedFace(body_key, face.body.name, face.tempId, tuple(c * 10 for c in face.centroid.asArray()),
+                       tuple(normal), face.area * 100)
+
+def resolve_body(key:str)->adsk.fusion.BRepBody:
+    entities = design.findEntityByToken(key)
+    return adsk.fusion.BRepBody.cast(entities[0]) if entities else None
+
+def body_key(body:adsk.fusion.BRepBody)->str:
+    body = futil.unwrap(body, read_only=True)
+    for key, indexed in indexed_bodies:
+        if indexed == body:
+            return key
+    return body.entityToken
+
+def refresh_face_index():
+    global indexed_bodies
+    started = time.perf_counter()
+    live = [futil.unwrap(body, read_only=True) for body in futil.cached(rootComp.bRepBodies)]
+    # Keep the key of every indexed body that still resolves to a body in the design.
+    matched = []
+    for key in face_index.bodies():
+        body = resolve_body(key)
+        if body is None or not any(body == other for other in live):
+            face_index.remove_body(key)
+        else:
+            matched.append((key, body))
+    indexed_bodies = matched + [(body.entityToken, body) for body in live if not any(body == other for _, other in matched)]
+
+    updated = 0
+    for key, body in indexed_bodies:
+        # Without face areas the fingerprint reads a handful of values per
+        # body, so opening the dialog does not touch every face in the design.
+        body = futil.cached(body)
+        fingerprint = futil.body_fingerprint(body, face_areas=False)
+        if face_index.fingerprint(key) != fingerprint:
+            planar = [face for face in body.faces if face.geometry.surfaceType == adsk.core.SurfaceTypes.PlaneSurfaceType]
+            face_index.update_body(key, fingerprint, [indexed_face(face, key) for face in planar])
+            updated += 1
+    futil.log(f'{CMD_NAME}: indexed {len(face_index)} planar faces, {updated} of {len(indexed_bodies)} bodies changed, '
+              f'{1000 * (time.perf_counter() - started):.0f} ms')
+
+def suggest_faces(base_face:adsk.fusion.BRepFace, suggestion_input:adsk.core.DropDownCommandInput):
+    global suggestions
+    suggestions = face_index.suggest(indexed_face(base_face, body_key(futil.cached(base_face).body)))
+    suggestion_input.listItems.clear()
+    for suggestion in suggestions:
+        suggestion_input.listItems.add(f'{suggestion.face.body_name} face {suggestion.face.face}: '
+                                       f'{suggestion.angle:.1f} deg, {suggestion.distance:.1f} mm', False)
+    if not suggestions:
+        suggestion_input.listItems.add('No parallel faces on other bodies', False)
+
+# Returns None when the face is gone. tempIds can change while the body's
+# fingerprint does not, so the body is then indexed again from scratch.
+def suggested_face(index:int)->adsk.fusion.BRepFace:
+    face = suggestions[index].face
+    body = resolve_body(face.body)
+    found = body.findByTempId(face.face) if body is not None else []
+    if found:
+        return found[0]
+    futil.log(f'{CMD_NAME}: face {face.face} of {face.body_name} is gone, indexing the body again')
+    face_index.remove_body(face.body)
+    refresh_face_index()
+    return None
+
 # Function to be called when a user clicks the corresponding button in the UI.
 def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log(f'{CMD_NAME} Command Created Event')
@@ -225,6 +312,10 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     comparison_selection.addSelectionFilter('Faces')
     comparison_selection.setSelectionLimits(1, 1)
 
+    # Faces on other bodies parallel to the base face, nearest first
+    inputs.addDropDownCommandInput('suggestion_input', 'Suggested Faces', adsk.core.DropDownStyles.TextListDropDownStyle)
+    refresh_face_index()
+
 # This function will be called when the user clicks the OK button in the command dialog.
 def command_execute(args: adsk.core.CommandEventArgs):
     futil.log(f'{CMD_NAME} Command Execute Event')
@@ -251,6 +342,24 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
     base_selection: adsk.core.SelectionCommandInput = inputs.itemById('base_selection')
     comparison_selection: adsk.core.SelectionCommandInput = inputs.itemById('comparison_selection')
+    suggestion_input: adsk.core.DropDownCommandInput = inputs.itemById('suggestion_input')
+
+    if changed_input.id == 'base_selection' and base_selection.selectionCount > 0:
+        suggest_faces(base_selection.selection(0).entity, suggestion_input)
+        # Compare with the best match unless a face was already picked
+        if suggestions and comparison_selection.selectionCount == 0:
+            face = suggested_face(0)
+            if face is not None:
+                comparison_selection.addSelection(face)
+    elif changed_input.id == 'suggestion_input' and suggestion_input.selectedItem and suggestions:
+        face = suggested_face(suggestion_input.selectedItem.index)
+        if face is None:
+            # The index was rebuilt for that body; list fresh suggestions instead.
+            if base_selection.selectionCount > 0:
+                suggest_faces(base_selection.selection(0).entity, suggestion_input)
+        else:
+            comparison_selection.clearSelection()
+            comparison_selection.addSelection(face)
 
     if base_selection.selectionCount > 0 and comparison_selection.selectionCount > 0:
         selected_entity = base_selection.selection(0).entity
@@ -261,6 +370,5 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    futil.clear_handlers(local_handlers)
     futil.log(f'{CMD_NAME} Command Destroy Event')
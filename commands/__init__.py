@@ -9,6 +9,11 @@ from .paletteSend import entry as paletteSend
 from .Transforms import entry as Transforms
 from .three_point_face import entry as threePointFace
 from .multiply_bases import entry as multiplyBases
+from .clearance_check import entry as clearanceCheck
+from .animate_fingers import entry as animateFingers
+from .export_generated import entry as exportGenerated
+from .key_plates import entry as keyPlates
+from .perf_hud import entry as perfHud
 
 # TODO add your imported modules to this list.
 # Fusion will automatically call the start() and stop() functions.
@@ -16,9 +21,14 @@ commands = [
     commandDialog,
     paletteShow,
     paletteSend,
+    perfHud,
     threePointFace,
     Transforms,
     multiplyBases,
+    clearanceCheck,
+    animateFingers,
+    exportGenerated,
+    keyPlates,
 ]
 
 
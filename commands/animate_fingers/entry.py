@@ -0,0 +1,254 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import adsk.core
+import adsk.fusion
+import os
+import statistics
+import time
+
+from ...lib import fusion360utils as futil
+from ... import config
+from ..multiply_bases import entry as multiplyBases
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_NAME = os.path.basename(os.path.dirname(__file__))
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_{CMD_NAME}'
+CMD_Description = 'Animate fingers between transform tables'
+IS_PROMOTED = False
+
+# Global variables by referencing values from /config.py
+WORKSPACE_ID = config.design_workspace
+TAB_ID = config.tools_tab_id
+TAB_NAME = config.my_tab_name
+
+PANEL_ID = config.my_panel_id
+PANEL_NAME = config.my_panel_name
+PANEL_AFTER = config.my_panel_after
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# Keyframe tables are looked up next to multiply_bases' tables.
+TABLE_FOLDER = os.path.dirname(os.path.abspath(multiplyBases.__file__))
+DEFAULT_KEYFRAMES = 'fingerTransforms_20131021.csv, fingerTransforms.csv'
+ANIMATED_SUFFIX = '_animated'
+
+# Holds references to event handlers
+local_handlers = []
+
+
+# Executed when add-in is run.
+def start():
+    # ******************************** Create Command Definition ********************************
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+    # Add command created handler. The function passed here will be executed when the command is executed.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # ******************************** Create Command Control ********************************
+    # Get target workspace for the command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Get target toolbar tab for the command and create the tab if necessary.
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    if toolbar_tab is None:
+        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
+
+    # Get target panel for the command and and create the panel if necessary.
+    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
+    if panel is None:
+        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
+
+    # Create the command control, i.e. a button in the UI.
+    control = panel.controls.addCommand(cmd_def)
+
+    # Now you can set various options on the control such as promoting it to always be shown.
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    stop_playback()
+
+    # Get the various UI elements for this command
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    command_control = panel.controls.itemById(CMD_ID)
+    command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+    # Delete the button command control
+    if command_control:
+        command_control.deleteMe()
+
+    # Delete the command definition
+    if command_definition:
+        command_definition.deleteMe()
+
+    # Delete the panel if it is empty
+    if panel.controls.count == 0:
+        panel.deleteMe()
+
+    # Delete the tab if it is empty
+    if toolbar_tab.toolbarPanels.count == 0:
+        toolbar_tab.deleteMe()
+
+
+class Player:
+    """Plays precomputed frames by setting occurrence transforms at a steady rate.
+
+    Every frame's Matrix3D objects are built up front, so a tick only assigns
+    transforms and refreshes the viewport. A Throttle spaces the ticks. The
+    occurrences belong to the player and are deleted when it stops.
+    """
+
+    def __init__(self, occurrences: list, frames: list, fps: float):
+        self.occurrences = occurrences
+        self.frames = frames
+        self.frame = 0
+        self.times = []
+        self.throttle = futil.Throttle(f'{CMD_ID}_frames', 1.0 / fps, self.tick)
+
+    def start(self):
+        self.throttle.trigger()
+
+    def tick(self):
+        for occurrence, matrix in zip(self.occurrences, self.frames[self.frame]):
+            occurrence.transform2 = matrix
+        app.activeViewport.refresh()
+        self.times.append(time.perf_counter())
+        self.frame += 1
+        if self.frame < len(self.frames):
+            self.throttle.trigger()
+        else:
+            self.stop()
+
+    def stop(self):
+        self.throttle.close()
+        delete_occurrences(self.occurrences)
+        self.occurrences = []
+        if len(self.times) > 1:
+            interval = statistics.median(b - a for a, b in zip(self.times, self.times[1:]))
+            futil.log(f'{CMD_NAME}: played {len(self.times)} frames at {1 / interval:.1f} fps median')
+
+
+_player = None
+
+
+def stop_playback():
+    global _player
+    if _player is not None:
+        _player.stop()
+        _player = None
+
+
+def finger_occurrences(names: list, base: adsk.fusion.BRepBody) -> list:
+    """Returns one new occurrence per finger holding a copy of the base body.
+
+    Copies are made on every run, so a changed base body is never animated
+    stale. Occurrences left behind by a run that did not finish are deleted first.
+    """
+    root = adsk.fusion.Design.cast(app.activeProduct).rootComponent
+    delete_occurrences([occurrence for occurrence in root.occurrences
+                        if occurrence.component.name.endswith(ANIMATED_SUFFIX)])
+    occurrences = []
+    for name in names:
+        occurrence = root.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+        occurrence.component.name = name + ANIMATED_SUFFIX
+        base.copyToComponent(occurrence)
+        occurrences.append(occurrence)
+    return occurrences
+
+
+def delete_occurrences(occurrences: list):
+    for occurrence in occurrences:
+        if occurrence.isValid:
+            occurrence.deleteMe()
+
+
+def to_matrix3d(matrix) -> adsk.core.Matrix3D:
+    result = adsk.core.Matrix3D.create()
+    result.setWithArray([float(value) for value in matrix.ravel()])
+    return result
+
+
+# Function to be called when a user clicks the corresponding button in the UI.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    # Connect to the events that are needed by this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+    inputs = args.command.commandInputs
+    base_input = inputs.addSelectionInput('base_input', 'Base body', 'Select the body the fingers are copied from')
+    base_input.addSelectionFilter('SolidBodies')
+    base_input.setSelectionLimits(1, 1)
+    base_input.addSelection(multiplyBases.rootComp.bRepBodies.item(0))
+
+    inputs.addStringValueInput('keyframes_input', 'Keyframe tables', DEFAULT_KEYFRAMES)
+    inputs.addIntegerSpinnerCommandInput('frames_input', 'Frames', 2, 10000, 1, 60)
+    inputs.addIntegerSpinnerCommandInput('fps_input', 'Frames per second', 1, 120, 1, 30)
+    inputs.addBoolValueInput('export_input', 'Export frames', True, '', False)
+
+
+# This function will be called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    try:
+        from ...lib.handex import animation
+    except ImportError:
+        ui.messageBox('Animating fingers needs numpy, which is not bundled with Fusion.\n'
+                      'Install it into the Python that Fusion uses and restart the add-in.', CMD_Description)
+        return
+
+    inputs = args.command.commandInputs
+    base_input: adsk.core.SelectionCommandInput = inputs.itemById('base_input')
+    keyframes_input: adsk.core.StringValueCommandInput = inputs.itemById('keyframes_input')
+    frames_input: adsk.core.IntegerSpinnerCommandInput = inputs.itemById('frames_input')
+    fps_input: adsk.core.IntegerSpinnerCommandInput = inputs.itemById('fps_input')
+    export_input: adsk.core.BoolValueCommandInput = inputs.itemById('export_input')
+
+    tables = [os.path.join(TABLE_FOLDER, name.strip()) for name in keyframes_input.value.split(',') if name.strip()]
+    try:
+        names, matrices = animation.animate(tables, frames_input.value)
+    except (OSError, ValueError) as e:
+        ui.messageBox(str(e), CMD_Description)
+        return
+
+    # The previous playback deletes its occurrences before new ones are made.
+    stop_playback()
+    started = time.perf_counter()
+    frames = [[to_matrix3d(matrix) for matrix in frame] for frame in matrices]
+    occurrences = finger_occurrences(names, base_input.selection(0).entity)
+    futil.log(f'{CMD_NAME}: prepared {len(frames)} frames of {len(names)} fingers in {time.perf_counter() - started:.2f}s')
+
+    if export_input.value:
+        # Exports go with the other exports, where they do not look like transform tables.
+        folder = os.path.join(os.path.dirname(os.path.abspath(config.__file__)), config.export_folder)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, os.path.basename(tables[-1]).replace('.csv', '_frames.csv'))
+        futil.submit(animation.write_frames, path, names, matrices,
+                     on_done=lambda written: futil.log(f'{CMD_NAME}: wrote {written}'))
+
+    global _player
+    _player = Player(occurrences, frames, fps_input.value)
+    _player.start()
+
+
+# This function will be called when the user completes the command.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    futil.clear_handlers(local_handlers)
+    futil.log(f'{CMD_NAME} Command Destroy Event')
@@ -0,0 +1,190 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import adsk.core
+import adsk.fusion
+import os
+import time
+
+from ...lib import fusion360utils as futil
+from ...lib.handex import parameters
+from ... import config
+from ..multiply_bases import entry as multiplyBases
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_NAME = os.path.basename(os.path.dirname(__file__))
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_{CMD_NAME}'
+CMD_Description = 'Check clearance between generated finger bases'
+IS_PROMOTED = False
+
+# Global variables by referencing values from /config.py
+WORKSPACE_ID = config.design_workspace
+TAB_ID = config.tools_tab_id
+TAB_NAME = config.my_tab_name
+
+PANEL_ID = config.my_panel_id
+PANEL_NAME = config.my_panel_name
+PANEL_AFTER = config.my_panel_after
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# The parameters exported next to the transform tables.
+PARAMETERS_PATH = os.path.join(os.path.dirname(os.path.abspath(multiplyBases.__file__)), 'parameters.csv')
+GAP_PARAMETER = 'GapWidth'
+
+# Holds references to event handlers
+local_handlers = []
+
+
+# Executed when add-in is run.
+def start():
+    # ******************************** Create Command Definition ********************************
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+    # Add command created handler. The function passed here will be executed when the command is executed.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # ******************************** Create Command Control ********************************
+    # Get target workspace for the command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Get target toolbar tab for the command and create the tab if necessary.
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    if toolbar_tab is None:
+        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
+
+    # Get target panel for the command and and create the panel if necessary.
+    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
+    if panel is None:
+        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
+
+    # Create the command control, i.e. a button in the UI.
+    control = panel.controls.addCommand(cmd_def)
+
+    # Now you can set various options on the control such as promoting it to always be shown.
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # Get the various UI elements for this command
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    command_control = panel.controls.itemById(CMD_ID)
+    command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+    # Delete the button command control
+    if command_control:
+        command_control.deleteMe()
+
+    # Delete the command definition
+    if command_definition:
+        command_definition.deleteMe()
+
+    # Delete the panel if it is empty
+    if panel.controls.count == 0:
+        panel.deleteMe()
+
+    # Delete the tab if it is empty
+    if toolbar_tab.toolbarPanels.count == 0:
+        toolbar_tab.deleteMe()
+
+
+def default_gap() -> float:
+    """Returns GapWidth in centimetres, from the design if it has the parameter, else from parameters.csv."""
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    parameter = design.userParameters.itemByName(GAP_PARAMETER) if design else None
+    if parameter:
+        return parameter.value
+    try:
+        return multiplyBases.mm(parameters.read_values(PARAMETERS_PATH)[GAP_PARAMETER])
+    except (OSError, KeyError, ValueError):
+        futil.log(f'{CMD_NAME}: no {GAP_PARAMETER} in {PARAMETERS_PATH}')
+        return multiplyBases.mm(0.5)
+
+
+def tessellate(body: adsk.fusion.BRepBody):
+    """Tessellates a body once and returns (vertices, triangles) in millimetres."""
+    import numpy as np
+    calculator = body.meshManager.createMeshCalculator()
+    calculator.setQuality(adsk.fusion.TriangleMeshQualityOptions.NormalQualityTriangleMesh)
+    mesh = calculator.calculate()
+    vertices = np.array(mesh.nodeCoordinatesAsFloat, dtype=np.float64).reshape(-1, 3) * 10
+    triangles = np.array(mesh.nodeIndices, dtype=np.int64).reshape(-1, 3)
+    return vertices, triangles
+
+
+# Function to be called when a user clicks the corresponding button in the UI.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    # Connect to the events that are needed by this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+    inputs = args.command.commandInputs
+    inputs.addValueInput('gap_input', 'Minimum gap', 'mm', adsk.core.ValueInput.createByReal(default_gap()))
+    inputs.addStringValueInput('filter_input', 'Body name contains', '_generated')
+
+
+# This function will be called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    try:
+        import numpy
+        from ...lib.handex import clearance
+    except ImportError:
+        ui.messageBox('The clearance check needs numpy, which is not bundled with Fusion.\n'
+                      'Install it into the Python that Fusion uses and restart the add-in.', CMD_Description)
+        return
+
+    inputs = args.command.commandInputs
+    gap_input: adsk.core.ValueCommandInput = inputs.itemById('gap_input')
+    filter_input: adsk.core.StringValueCommandInput = inputs.itemById('filter_input')
+    gap = gap_input.value * 10
+
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    bodies = [body for body in design.rootComponent.bRepBodies if filter_input.value in body.name]
+    if len(bodies) < 2:
+        ui.messageBox(f'Found {len(bodies)} bodies matching "{filter_input.value}", need at least two.', CMD_Description)
+        return
+
+    started = time.perf_counter()
+    meshes = {body.name: tessellate(body) for body in bodies}
+    tessellated = time.perf_counter()
+
+    def report(results):
+        futil.log(f'{CMD_NAME}: tessellated {len(meshes)} bodies in {tessellated - started:.2f}s, '
+                  f'checked {len(results)} pairs in {time.perf_counter() - tessellated:.2f}s')
+        violations = [result for result in results if result.below(gap)]
+        for result in results:
+            futil.log(f'{CMD_NAME}: {result.a} to {result.b}: {result.distance:.3f} mm')
+
+        if not violations:
+            ui.messageBox(f'All {len(results)} pairs are at least {gap:.3f} mm apart.', CMD_Description)
+            return
+        lines = [f'{result.a} / {result.b}: {"touching" if result.distance == 0 else f"{result.distance:.3f} mm"}'
+                 for result in violations]
+        ui.messageBox(f'{len(violations)} pairs are closer than {gap:.3f} mm:\n\n' + '\n'.join(lines), CMD_Description)
+
+    # NumPy releases the GIL for most of the work, so a thread keeps Fusion responsive.
+    futil.submit(clearance.min_distances, meshes, on_done=report, name=CMD_NAME)
+
+
+# This function will be called when the user completes the command.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    futil.clear_handlers(local_handlers)
+    futil.log(f'{CMD_NAME} Command Destroy Event')
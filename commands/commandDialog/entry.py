@@ -154,5 +154,4 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
-    global local_handlers
-    local_handlers = []
+    futil.clear_handlers(local_handlers)
@@ -0,0 +1,195 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import adsk.core
+import adsk.fusion
+import json
+import os
+
+from ...lib import fusion360utils as futil
+from ...lib.handex import mesh_export
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_NAME = os.path.basename(os.path.dirname(__file__))
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_{CMD_NAME}'
+CMD_Description = 'Export generated finger bases for printing'
+IS_PROMOTED = False
+
+# Global variables by referencing values from /config.py
+WORKSPACE_ID = config.design_workspace
+TAB_ID = config.tools_tab_id
+TAB_NAME = config.my_tab_name
+
+PANEL_ID = config.my_panel_id
+PANEL_NAME = config.my_panel_name
+PANEL_AFTER = config.my_panel_after
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# Fingerprints of the bodies last written to each export folder.
+MANIFEST_NAME = 'export_manifest.json'
+
+# Holds references to event handlers
+local_handlers = []
+
+
+# Executed when add-in is run.
+def start():
+    # ******************************** Create Command Definition ********************************
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+    # Add command created handler. The function passed here will be executed when the command is executed.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # ******************************** Create Command Control ********************************
+    # Get target workspace for the command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Get target toolbar tab for the command and create the tab if necessary.
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    if toolbar_tab is None:
+        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
+
+    # Get target panel for the command and and create the panel if necessary.
+    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
+    if panel is None:
+        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
+
+    # Create the command control, i.e. a button in the UI.
+    control = panel.controls.addCommand(cmd_def)
+
+    # Now you can set various options on the control such as promoting it to always be shown.
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # Get the various UI elements for this command
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    command_control = panel.controls.itemById(CMD_ID)
+    command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+    # Delete the button command control
+    if command_control:
+        command_control.deleteMe()
+
+    # Delete the command definition
+    if command_definition:
+        command_definition.deleteMe()
+
+    # Delete the panel if it is empty
+    if panel.controls.count == 0:
+        panel.deleteMe()
+
+    # Delete the tab if it is empty
+    if toolbar_tab.toolbarPanels.count == 0:
+        toolbar_tab.deleteMe()
+
+
+class Export:
+    """The state of one export run, shared by its steps and their workers' callbacks."""
+
+    def __init__(self, folder: str, manifest: dict):
+        self.folder = folder
+        self.manifest = manifest
+
+
+def read_manifest(folder: str) -> dict:
+    try:
+        with open(os.path.join(folder, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(folder: str, manifest: dict):
+    with open(os.path.join(folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def export_step(body: adsk.fusion.BRepBody, path: str, fingerprint: str, file_format: str, export):
+    """Tessellates a body on the main thread and hands the file writing to a worker."""
+    calculator = body.meshManager.createMeshCalculator()
+    calculator.setQuality(adsk.fusion.TriangleMeshQualityOptions.HighQualityTriangleMesh)
+    mesh = calculator.calculate()
+
+    def written(result):
+        export.manifest[os.path.basename(result)] = fingerprint
+        write_manifest(export.folder, export.manifest)
+        futil.log(f'{CMD_NAME}: wrote {result}')
+
+    futil.submit(mesh_export.WRITERS[file_format], path, list(mesh.nodeCoordinatesAsDouble), list(mesh.nodeIndices),
+                 body.name, on_done=written, name=CMD_NAME)
+
+
+# Function to be called when a user clicks the corresponding button in the UI.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    # Connect to the events that are needed by this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+    inputs = args.command.commandInputs
+    inputs.addStringValueInput('folder_input', 'Folder', os.path.join(os.path.dirname(os.path.abspath(config.__file__)), config.export_folder))
+    format_input = inputs.addDropDownCommandInput('format_input', 'Format', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for file_format in mesh_export.WRITERS:
+        format_input.listItems.add(file_format.upper(), file_format == 'stl')
+    inputs.addStringValueInput('filter_input', 'Body name contains', '_generated')
+    inputs.addBoolValueInput('force_input', 'Export unchanged bodies', True, '', False)
+
+
+# This function will be called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    folder_input: adsk.core.StringValueCommandInput = inputs.itemById('folder_input')
+    format_input: adsk.core.DropDownCommandInput = inputs.itemById('format_input')
+    filter_input: adsk.core.StringValueCommandInput = inputs.itemById('filter_input')
+    force_input: adsk.core.BoolValueCommandInput = inputs.itemById('force_input')
+
+    folder = folder_input.value
+    file_format = format_input.selectedItem.name.lower()
+    os.makedirs(folder, exist_ok=True)
+    export = Export(folder, read_manifest(folder))
+
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    steps = []
+    skipped = []
+    for body in design.rootComponent.bRepBodies:
+        if filter_input.value not in body.name:
+            continue
+        file_name = f'{body.name}.{file_format}'
+        fingerprint = futil.body_fingerprint(futil.cached(body))
+        if not force_input.value and export.manifest.get(file_name) == fingerprint and os.path.exists(os.path.join(folder, file_name)):
+            skipped.append(body.name)
+            continue
+        steps.append((f'Exporting {body.name}', lambda body=body, file_name=file_name, fingerprint=fingerprint:
+                      export_step(body, os.path.join(folder, file_name), fingerprint, file_format, export)))
+
+    futil.log(f'{CMD_NAME}: {len(steps)} to export, {len(skipped)} unchanged')
+    if not steps:
+        ui.messageBox(f'All {len(skipped)} bodies are unchanged since the last export to\n{folder}', CMD_Description)
+        return
+    futil.run_job(CMD_ID, steps, title=CMD_Description)
+
+
+# This function will be called when the user completes the command.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    futil.clear_handlers(local_handlers)
+    futil.log(f'{CMD_NAME} Command Destroy Event')
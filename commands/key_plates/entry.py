@@ -0,0 +1,244 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import adsk.core
+import adsk.fusion
+import os
+
+from ...lib import fusion360utils as futil
+from ...lib.handex import key_layout
+from ...lib.handex import transforms
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_NAME = os.path.basename(os.path.dirname(__file__))
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_{CMD_NAME}'
+CMD_Description = 'Cut key-switch plates into the generated finger bases'
+IS_PROMOTED = False
+
+# Global variables by referencing values from /config.py
+WORKSPACE_ID = config.design_workspace
+TAB_ID = config.tools_tab_id
+TAB_NAME = config.my_tab_name
+
+PANEL_ID = config.my_panel_id
+PANEL_NAME = config.my_panel_name
+PANEL_AFTER = config.my_panel_after
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# Default key layouts and the transform table the finger bases were generated from.
+LAYOUT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keyLayouts.csv')
+TRANSFORM_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'multiply_bases', 'fingerTransforms.csv')
+
+# Holds references to event handlers
+local_handlers = []
+
+
+# Executed when add-in is run.
+def start():
+    # ******************************** Create Command Definition ********************************
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+    # Add command created handler. The function passed here will be executed when the command is executed.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # ******************************** Create Command Control ********************************
+    # Get target workspace for the command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Get target toolbar tab for the command and create the tab if necessary.
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    if toolbar_tab is None:
+        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
+
+    # Get target panel for the command and and create the panel if necessary.
+    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
+    if panel is None:
+        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
+
+    # Create the command control, i.e. a button in the UI.
+    control = panel.controls.addCommand(cmd_def)
+
+    # Now you can set various options on the control such as promoting it to always be shown.
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # Get the various UI elements for this command
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
+    command_control = panel.controls.itemById(CMD_ID)
+    command_definition = ui.commandDefinitions.itemById(CMD_ID)
+
+    # Delete the button command control
+    if command_control:
+        command_control.deleteMe()
+
+    # Delete the command definition
+    if command_definition:
+        command_definition.deleteMe()
+
+    # Delete the panel if it is empty
+    if panel.controls.count == 0:
+        panel.deleteMe()
+
+    # Delete the tab if it is empty
+    if toolbar_tab.toolbarPanels.count == 0:
+        toolbar_tab.deleteMe()
+
+
+def feature_name(layout: key_layout.KeyLayout) -> str:
+    return f'{layout.name}_keys'
+
+
+def remove_keys(component: adsk.fusion.Component, layout: key_layout.KeyLayout):
+    """Deletes the cutouts of an earlier run so cutting again replaces them."""
+    name = feature_name(layout)
+    for collection in (component.features.rectangularPatternFeatures, component.features.extrudeFeatures, component.sketches):
+        item = collection.itemByName(name)
+        if item is not None:
+            item.deleteMe()
+
+
+def plate_face(body: adsk.fusion.BRepBody, normal: tuple) -> adsk.fusion.BRepFace:
+    """The largest planar face of the body parallel to the plate."""
+    best = None
+    for face in futil.cached(body.faces):
+        if face.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType:
+            continue
+        face_normal = face.geometry.normal
+        alignment = abs(face_normal.x * normal[0] + face_normal.y * normal[1] + face_normal.z * normal[2])
+        if alignment > 0.999 and (best is None or face.area > best.area):
+            best = face
+    if best is None:
+        raise ValueError(f'{body.name} has no planar face for the key plate')
+    return best
+
+
+def cutout_profile(sketch: adsk.fusion.Sketch, layout: key_layout.KeyLayout) -> adsk.fusion.Profile:
+    """The profile of the key cutout, found by its area."""
+    area = transforms.mm(layout.cutout) ** 2
+    for profile in sketch.profiles:
+        if abs(profile.areaProperties().area - area) <= 1e-3 * area:
+            return profile
+    raise ValueError(f'{sketch.name}: no {layout.cutout:g} mm square cutout profile in the sketch')
+
+
+def cut_keys(component: adsk.fusion.Component, body: adsk.fusion.BRepBody, transform: transforms.FingerTransform,
+             layout: key_layout.KeyLayout):
+    """Cuts one key and patterns it over the layout.
+
+    One sketch holds the first cutout and the two pattern directions; a
+    single rectangular pattern repeats the cut instead of a sketch and cut
+    per key.
+    """
+    remove_keys(component, layout)
+    frame = key_layout.key_frame(transform, layout)
+
+    # Without the face's edges the sketch has no region around the rectangle
+    # for the cut to pick up by mistake.
+    sketch = component.sketches.addWithoutEdges(plate_face(body, frame.normal))
+    sketch.name = feature_name(layout)
+    sketch.isComputeDeferred = True
+
+    def sketch_point(point):
+        return sketch.modelToSketchSpace(adsk.core.Point3D.create(*point))
+
+    lines = sketch.sketchCurves.sketchLines
+    lines.addThreePointRectangle(*(sketch_point(corner) for corner in frame.cutout_corners(layout.cutout)))
+    directions = []
+    for direction in (frame.along, frame.across):
+        end = tuple(o + d * transforms.mm(layout.pitch) for o, d in zip(frame.origin, direction))
+        line = lines.addByTwoPoints(sketch_point(frame.origin), sketch_point(end))
+        line.isConstruction = True
+        directions.append(line)
+    sketch.isComputeDeferred = False
+
+    extrudes = component.features.extrudeFeatures
+    extrude_input = extrudes.createInput(cutout_profile(sketch, layout), adsk.fusion.FeatureOperations.CutFeatureOperation)
+    extrude_input.setAllExtent(adsk.fusion.ExtentDirections.SymmetricExtentDirection)
+    extrude_input.participantBodies = [body]
+    cut = extrudes.add(extrude_input)
+    cut.name = feature_name(layout)
+
+    if layout.keys == 1:
+        return
+    entities = adsk.core.ObjectCollection.create()
+    entities.add(cut)
+    pitch = adsk.core.ValueInput.createByReal(transforms.mm(layout.pitch))
+    patterns = component.features.rectangularPatternFeatures
+    pattern_input = patterns.createInput(entities, directions[0], adsk.core.ValueInput.createByReal(layout.rows), pitch,
+                                         adsk.fusion.PatternDistanceType.SpacingPatternDistanceType)
+    pattern_input.setDirectionTwo(directions[1], adsk.core.ValueInput.createByReal(layout.columns), pitch)
+    # Every key cuts the same flat plate, so the cut is computed once and copied.
+    pattern_input.patternComputeOption = adsk.fusion.PatternComputeOptions.IdenticalPatternCompute
+    pattern = patterns.add(pattern_input)
+    pattern.name = feature_name(layout)
+
+
+# Function to be called when a user clicks the corresponding button in the UI.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    # Connect to the events that are needed by this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+    inputs = args.command.commandInputs
+    inputs.addStringValueInput('layout_input', 'Key layouts', LAYOUT_FILE)
+    inputs.addStringValueInput('transform_input', 'Finger transforms', TRANSFORM_FILE)
+
+
+# This function will be called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    layout_input: adsk.core.StringValueCommandInput = inputs.itemById('layout_input')
+    transform_input: adsk.core.StringValueCommandInput = inputs.itemById('transform_input')
+
+    try:
+        layouts = key_layout.read_layouts(layout_input.value)
+        table = {row.name: row for row in transforms.read_table(transform_input.value)}
+    except (OSError, ValueError) as e:
+        ui.messageBox(str(e), CMD_Description)
+        return
+
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    component = design.rootComponent
+    steps = []
+    missing = []
+    for layout in layouts:
+        body = component.bRepBodies.itemByName(f'{layout.name}_generated')
+        if body is None or layout.name not in table:
+            missing.append(layout.name)
+            continue
+        steps.append((f'Cutting keys on {body.name}', lambda body=body, layout=layout:
+                      cut_keys(component, body, table[layout.name], layout)))
+
+    if missing:
+        futil.log(f'{CMD_NAME}: no generated base or transform for {", ".join(missing)}')
+    if not steps:
+        ui.messageBox('None of the layouts has a generated finger base. Run multiply_bases first.', CMD_Description)
+        return
+    futil.run_job(CMD_ID, steps, title=CMD_Description)
+
+
+# This function will be called when the user completes the command.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    futil.clear_handlers(local_handlers)
+    futil.log(f'{CMD_NAME} Command Destroy Event')
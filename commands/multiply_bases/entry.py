@@ -15,9 +15,18 @@ import io
 
 import math
 from ...lib import fusion360utils as futil
+from ...lib.handex.measure_cache import MeasureCache
+from ...lib.handex import planner
+from ...lib.handex import transforms
+try:
+    from ...lib.handex import face_classes
+except ImportError:
+    # numpy is not bundled with Fusion; describe_body then measures every face larger than 0.5 cm**2.
+    face_classes = None
 from ... import config
 from dataclasses import dataclass
 import csv 
+import hashlib
 # import yaml
 from pathlib import Path
 
@@ -52,6 +61,20 @@ ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource
 # Holds references to event handlers
 local_handlers = []
 
+# Measurements of unchanged bodies are answered from here across sessions.
+measure_cache = MeasureCache(os.path.join(os.path.dirname(os.path.abspath(config.__file__)), config.measure_cache_file),
+                             config.measure_cache_max_bytes)
+
+# The body the last run copied, which live edits from the palette regenerate from.
+source_body = None
+
+# Faces measured by describe_body since the add-in started; describe steps
+# note the difference so the cost model learns from what they really did.
+measurements_made = 0
+
+# Seconds per unit of work, recalibrated after every run.
+cost_model = planner.CostModel(os.path.join(os.path.dirname(os.path.abspath(config.__file__)), config.run_costs_file))
+
 @dataclass
 class Points:
     x: float
@@ -109,6 +132,8 @@ def start():
 
 # Executed when add-in is stopped.
 def stop():
+    measure_cache.close()
+
     # Get the various UI elements for this command
     workspace = ui.workspaces.itemById(WORKSPACE_ID)
     panel = workspace.toolbarPanels.itemById(PANEL_ID)
@@ -133,7 +158,17 @@ def stop():
         toolbar_tab.deleteMe()
 
 
-def describe_body(body:adsk.fusion.BRepBody, plane: adsk.fusion.ConstructionPlane = rootComp.xZConstructionPlane)->str:
+def describe_body(body:adsk.fusion.BRepBody, plane: adsk.fusion.ConstructionPlane = rootComp.xZConstructionPlane,
+                  body_print:str = None, plane_body_print:str = None)->str:
+    body = futil.cached(body)
+    key = measure_key(body, plane, body_print, plane_body_print)
+    record = measure_cache.get(key)
+    if record is not None:
+        futil.log(f'Measurements of {body.name} are unchanged, using the cache')
+        return describe_from_record(body, record)
+
+    global measurements_made
+    record = {'faces': []}
     outString = ''
     outString = f'- {body.name}:\n'
     outBody = Object()
@@ -144,33 +179,78 @@ def describe_body(body:adsk.fusion.BRepBody, plane: adsk.fusion.ConstructionPlan
         futil.log(f'Comparing {body.name} to \n{plane.geometry}')
     else:
         futil.log(f'Comparing {body.name} to {plane.name}\n{plane.geometry}')
-    for face in body.faces:
-        if face.area > 0.5:
-            outBody.BRepFaces.append(face)
-            outFace = Object()
-            outFace.tempId = face.tempId
-            outFace.area = face.area
-            outFace.centroid = [c*10 for c in face.centroid.asArray()]
-            measuredAngle = app.measureManager.measureAngle(face, plane)
-            outBody.positionOne = [math.degrees(a) for a in measuredAngle.positionOne.asArray()]
-
-            outString += f'  Face{face.tempId}:\n'
-            outString += f'    Area: {face.area}\n'
-            outString += f'    Centroid: {[c*10 for c in face.centroid.asArray()]}\n'
-            outString += f'    PositionOne: {str([math.degrees(a) for a in measuredAngle.positionOne.asArray()])}\n'
-            outString += f'    PositionTwo: {str([math.degrees(a) for a in measuredAngle.positionTwo.asArray()])}\n'
-            outString += f'    PositionThree: {str([math.degrees(a) for a in measuredAngle.positionThree.asArray()])}\n'
-            outString += f'    measuredAngle: {str(math.degrees(measuredAngle.value))}\n'
-
-            # Draw the measured angle on the face
-            design.rootComponent.features.createSketch(measuredAngle.positionOne, measuredAngle.positionTwo, measuredAngle.positionThree)
-            # TODO: Draw the xyz transform that would need to be applied to the face to make it parallel to the plane
-
-            faceNormals:adsk.core.Vector3D = face.geometry.evaluator.getNormalAtPoint(face.centroid)
-            for normal in faceNormals:
-                if not isinstance(normal, bool):
-                    outString += f'    Normals: {[ math.degrees(n) for n in normal.asArray()]}\n'
-            outBody.faces.append(outFace)
+    for index, face in measured_faces(body):
+        outBody.BRepFaces.append(futil.unwrap(face, read_only=True))
+        outFace = Object()
+        outFace.tempId = face.tempId
+        outFace.area = face.area
+        outFace.centroid = [c*10 for c in face.centroid.asArray()]
+        measuredAngle = app.measureManager.measureAngle(futil.unwrap(face, read_only=True), futil.unwrap(plane, read_only=True))
+        measurements_made += 1
+        outBody.positionOne = [math.degrees(a) for a in measuredAngle.positionOne.asArray()]
+
+        faceString = ''
+        faceString += f'    Area: {face.area}\n'
+        faceString += f'    Centroid: {[c*10 for c in face.centroid.asArray()]}\n'
+        faceString += f'    PositionOne: {str([math.degrees(a) for a in measuredAngle.positionOne.asArray()])}\n'
+        faceString += f'    PositionTwo: {str([math.degrees(a) for a in measuredAngle.positionTwo.asArray()])}\n'
+        faceString += f'    PositionThree: {str([math.degrees(a) for a in measuredAngle.positionThree.asArray()])}\n'
+        faceString += f'    measuredAngle: {str(math.degrees(measuredAngle.value))}\n'
+
+        # Draw the measured angle on the face
+        design.rootComponent.features.createSketch(measuredAngle.positionOne, measuredAngle.positionTwo, measuredAngle.positionThree)
+        # TODO: Draw the xyz transform that would need to be applied to the face to make it parallel to the plane
+
+        faceNormals:adsk.core.Vector3D = face.geometry.evaluator.getNormalAtPoint(face.centroid)
+        for normal in faceNormals:
+            if not isinstance(normal, bool):
+                faceString += f'    Normals: {[ math.degrees(n) for n in normal.asArray()]}\n'
+        outString += f'  Face{face.tempId}:\n' + faceString
+        outBody.faces.append(outFace)
+        record['faces'].append({'index': index, 'area': outFace.area, 'centroid': outFace.centroid,
+                                'positionOne': outBody.positionOne, 'text': faceString})
+    measure_cache.put(key, record)
+    return outString, outBody
+
+# body_print and plane_body_print are the fingerprints of the body and of the
+# plane's body when the caller already has them, so comparing against every
+# face of another body fingerprints each body once instead of once per face.
+def measure_key(body:adsk.fusion.BRepBody, plane = rootComp.xZConstructionPlane,
+                body_print:str = None, plane_body_print:str = None)->str:
+    face_filter = 'classified' if face_classes else 'area'
+    plane_print = futil.entity_fingerprint(futil.cached(plane), body_print=plane_body_print)
+    return f'{body_print or futil.body_fingerprint(body)}:{plane_print}:{face_filter}'
+
+# The (index, face) pairs describe_body measures: the mounting and mating
+# planes found by face_classes, skipping fillets and small faces.
+def measured_faces(body:adsk.fusion.BRepBody)->list:
+    faces = list(futil.cached(body).faces)
+    if face_classes is None:
+        return [(index, face) for index, face in enumerate(faces) if face.area > 0.5]
+    planar = [face.geometry.surfaceType == adsk.core.SurfaceTypes.PlaneSurfaceType for face in faces]
+    normals = [face.geometry.normal.asArray() if is_planar else (0.0, 0.0, 0.0) for face, is_planar in zip(faces, planar)]
+    centroids = [[c * 10 for c in face.centroid.asArray()] for face in faces]
+    areas = [face.area * 100 for face in faces]
+    return [(int(index), faces[index]) for index in face_classes.mounting_faces(normals, centroids, areas, planar)]
+
+# Rebuilds describe_body's output from a cached record. Face tempIds change
+# between sessions, so they are read again from the live faces.
+def describe_from_record(body:adsk.fusion.BRepBody, record:dict):
+    outString = f'- {body.name}:\n'
+    outBody = Object()
+    outBody.name = body.name
+    outBody.faces = []
+    outBody.BRepFaces = []
+    for cachedFace in record['faces']:
+        face = body.faces.item(cachedFace['index'])
+        outBody.BRepFaces.append(futil.unwrap(face, read_only=True))
+        outFace = Object()
+        outFace.tempId = face.tempId
+        outFace.area = cachedFace['area']
+        outFace.centroid = cachedFace['centroid']
+        outBody.positionOne = cachedFace['positionOne']
+        outString += f'  Face{face.tempId}:\n' + cachedFace['text']
+        outBody.faces.append(outFace)
     return outString, outBody
 
 def create_finger_base(selected_body:adsk.fusion.BRepBody, finger_name:str, translate:Points, angles:Angle3D):
@@ -267,9 +347,13 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
 
     selection_input.addSelection(rootComp.bRepBodies.item(0))
 
+    inputs.addBoolValueInput('mirror_input', 'Also build the mirrored hand', True, '', False)
+    inputs.addBoolValueInput('dry_run_input', 'Dry run (plan only)', True, '', False)
+
 
 # This function will be called when the user clicks the OK button in the command dialog.
 def command_execute(args: adsk.core.CommandEventArgs):
+    global source_body
     futil.log(f'{CMD_NAME} Command Execute Event')
 
     inputs = args.command.commandInputs
@@ -283,55 +367,299 @@ def command_execute(args: adsk.core.CommandEventArgs):
 
     futil.log(f"Replicating {rootComp.name} {selected_body.name} to fingers")
 
-    bodies = rootComp.bRepBodies
-    output = ""
-    outBodies = []
-    compareBodies = []
+    # The run is split into steps that each leave the design consistent, so
+    # it can be advanced on idle ticks and cancelled between steps.
+    report = Object()
+    report.output = ""
+    report.outBodies = []
+    report.compareBodies = []
+
+    # Completed steps are journaled so an interrupted run resumes where it stopped.
+    with open(path, "rb") as csvfile:
+        signature = hashlib.sha1(csvfile.read() + f'{rootComp.name}/{selected_body.name}'.encode()).hexdigest()
+    # A dry run only reads the journal to plan the remaining steps: it keeps a
+    # stale journal and does not restore the report, which may measure bodies.
+    dry_run_input: adsk.core.BoolValueCommandInput = inputs.itemById('dry_run_input')
+    journal = futil.Journal(os.path.splitext(path)[0] + ".journal.json", signature, snapshot=lambda: report_snapshot(report))
+    state = journal.resume(keep=dry_run_input.value)
+    if state is not None and not dry_run_input.value:
+        restore_report(report, state)
+        futil.log(f'{CMD_NAME}: resuming after {len(journal.done)} completed steps')
+
+    mirror_input: adsk.core.BoolValueCommandInput = inputs.itemById('mirror_input')
+    mirrored = mirror_input.value
+
+    # Faces each describe step measured, by label.
+    measured = {}
+
+    def counted(label:str, step):
+        def run():
+            before = measurements_made
+            step()
+            measured[label] = measurements_made - before
+        return run
+
+    steps = []
+    for body in rootComp.bRepBodies:
+        # Bodies generated by the interrupted run were not there when it described the design.
+        if "_generated" in body.name and 'Deleting generated bodies' in journal.done:
+            continue
+        steps.append((f'Describing {body.name}', counted(f'Describing {body.name}', lambda body=body: describe_step(body, report))))
+    steps.append(('Deleting generated bodies', delete_generated_bodies))
+
+    # Files are written on a worker, so those steps are journaled when the
+    # worker is done rather than when they return, and the journal is only
+    # discarded once the last of them has finished.
+    writes = {'pending': set(), 'completed': False}
+
+    def written(label:str):
+        journal.mark(label)
+        writes['pending'].discard(label)
+        if writes['completed'] and not writes['pending']:
+            journal.discard()
+
+    def write_step(label:str, write):
+        def run():
+            writes['pending'].add(label)
+            write(lambda: written(label))
+        return run
+
+    def report_written(report_path:str, done):
+        futil.log(f'{CMD_NAME}: wrote {report_path}')
+        done()
+
+    steps.append(('Writing report', write_step('Writing report', lambda done: futil.submit(
+        write_report, os.path.splitext(path)[0] + f"{rootComp.name}.yaml", report.output,
+        on_done=lambda report_path: report_written(report_path, done)))))
+
+    with open(path, "r") as csvfile:
+        for finger in csv.DictReader(csvfile):
+            steps.append((f'Generating {finger["name"]}', lambda finger=finger: generate_step(selected_body, finger)))
+            if mirrored:
+                steps.append((f'Mirroring {finger["name"]}', lambda finger=finger: mirror_step(finger["name"])))
+    if mirrored:
+        steps.append(('Writing mirrored table', write_step('Writing mirrored table', lambda done: write_mirrored_table(path, done))))
+
+    steps = [(label, step if label in ('Writing report', 'Writing mirrored table') else journal.record(label, step))
+             for label, step in steps if label not in journal.done]
+
+    # Only a dry run classifies and fingerprints every body up front. A real run
+    # estimates from face counts, an upper bound that is cheap to read, and
+    # calibrates from what its describe steps really measured.
+    plan = plan_steps(path, steps, mirrored, exact=dry_run_input.value)
+    estimate = cost_model.estimate(plan)
+    if not dry_run_input.value:
+        source_body = selected_body
+    if dry_run_input.value:
+        futil.log(f'{CMD_NAME} dry run of {os.path.basename(path)}:\n{planner.format_plan(plan, cost_model)}')
+        ui.messageBox(f'{len(plan.steps)} steps: {plan.features} features to add, {plan.deletes} bodies to delete, '
+                      f'{plan.measurements} measurements.\nEstimated time {estimate:.0f}s. '
+                      f'The full plan is in the Text Commands window.', CMD_Description)
+        return
+    if estimate > config.max_run_seconds:
+        answer = ui.messageBox(f'This run could take up to {estimate:.0f}s ({len(plan.steps)} steps). Start it anyway?',
+                               CMD_Description, adsk.core.MessageBoxButtonTypes.YesNoButtonType,
+                               adsk.core.MessageBoxIconTypes.WarningIconType)
+        if answer != adsk.core.DialogResults.DialogYes:
+            return
+
+    def completed(job:futil.Job):
+        writes['completed'] = True
+        if not writes['pending']:
+            journal.discard()
+        plan.set_measured(measured)
+        cost_model.calibrate(plan, job.timings)
+        log_cache_stats(job)
+
+    def cancelled(job:futil.Job):
+        plan.set_measured(measured)
+        cost_model.calibrate(plan, job.timings)
+        generation_cancelled(job)
+
+    futil.run_job(CMD_ID, steps, title=CMD_Description, on_complete=completed, on_cancel=cancelled)
+
+
+# Plans the steps about to run without changing the design. The exact plan
+# classifies every body's faces and looks each measurement up in the cache,
+# including every thumb compare; otherwise every face of every described body
+# is counted as measured, which only reads the face counts.
+def plan_steps(path:str, steps:list, mirrored:bool, exact:bool = False)->planner.Plan:
+    bodies = []
+    all_bodies = list(futil.cached(rootComp.bRepBodies))
+    if not exact:
+        for body in all_bodies:
+            bodies.append(planner.BodyInfo(body.name, body.faces.count if planner.describe_kind(body.name) else 0))
+    else:
+        faces = {}
+        prints = {}
+        for body in all_bodies:
+            faces[body.name] = measured_faces(body) if planner.describe_kind(body.name) else []
+            prints[body.name] = futil.body_fingerprint(body) if faces[body.name] else None
+        partners = planner.compare_partners([body.name for body in all_bodies])
+        for body in all_bodies:
+            cached = bool(faces[body.name]) and measure_cache.contains(measure_key(body, body_print=prints[body.name]))
+            compare_cached = 0
+            partner = partners.get(body.name)
+            if partner:
+                compare_cached = sum(measure_cache.contains(measure_key(body, face, prints[body.name], prints[partner]))
+                                     for index, face in faces[partner])
+            bodies.append(planner.BodyInfo(body.name, len(faces[body.name]), cached, compare_cached))
+    plan = planner.plan_run(transforms.read_table(path), bodies, mirrored)
+    labels = {label for label, step in steps}
+    plan.steps = [step for step in plan.steps if step.label in labels]
+    return plan
+
+
+def generate_step(selected_body:adsk.fusion.BRepBody, finger:dict):
+    # A step that failed halfway may have left its body behind; start it again.
+    for body in reversed(futil.cached(rootComp.bRepBodies)):
+        if body.name == finger["name"] + "_generated":
+            body.deleteMe()
+    create_finger_base(selected_body, finger["name"],
+                       translate = Points(float(finger["tx"]), float(finger["ty"]), float(finger["tz"])),
+                       angles = Angle3D(float(finger["rx"]), float(finger["ry"]), float(finger["rz"])))
+
+
+# Mirrors a generated finger into the other hand. One mirror feature per
+# finger replaces regenerating it from a mirrored table.
+def mirror_step(finger_name:str):
+    name = finger_name + transforms.MIRROR_SUFFIX + "_generated"
+    for body in reversed(futil.cached(rootComp.bRepBodies)):
+        if body.name == name:
+            body.deleteMe()
+    entities = adsk.core.ObjectCollection.create()
+    entities.add(rootComp.bRepBodies.itemByName(finger_name + "_generated"))
+    plane = {'yz': rootComp.yZConstructionPlane, 'xz': rootComp.xZConstructionPlane, 'xy': rootComp.xYConstructionPlane}[config.mirror_plane]
+    mirror_feature = rootComp.features.mirrorFeatures.add(rootComp.features.mirrorFeatures.createInput(entities, plane))
+    mirrored_body = mirror_feature.bodies.item(0)
+    mirrored_body.name = name
+    mirrored_body.opacity = 0.5
+
+
+# Writes the table of the mirrored hand next to the original, on a worker
+# thread. The mirror maths needs numpy, which Fusion does not bundle.
+# Its rows place a mirrored base body, which this add-in never makes: the
+# *_mirrored_generated bodies come from mirror features instead. Running
+# multiply_bases on the mirrored table with the original base only gives the
+# mirror image if the base body is itself symmetric in the mirror plane.
+def write_mirrored_table(path:str, done=None):
+    try:
+        from ...lib.handex import mirror
+    except ImportError:
+        futil.log(f'{CMD_NAME}: numpy is not available, run "python -m lib.handex mirror" to write the mirrored table')
+        if done:
+            done()
+        return
+
+    def written(table_path:str):
+        futil.log(f'{CMD_NAME}: wrote {table_path}; its rows place a mirrored base body, so use it with '
+                  f'a base mirrored in the {config.mirror_plane} plane, not the original')
+        if done:
+            done()
+
+    futil.submit(mirror.mirror_table, path, os.path.splitext(path)[0] + f"{transforms.MIRROR_SUFFIX}.csv",
+                 config.mirror_plane, on_done=written)
+
+
+def describe_step(body:adsk.fusion.BRepBody, report):
+    body = futil.cached(body)
     compareType = "thumb"
-    for body in bodies:
         
-        # Compare matching body faces 
-        if compareType in body.name:
-            outstring,outBody = describe_body(body)
-            if len(compareBodies) > 0:
-                futil.log(f"Comparing {compareType} Type")
-                compareBody = compareBodies.pop()
-                for compareBodyFace in compareBody.BRepFaces:
-                    outString,outBody = describe_body(body, compareBodyFace)
-                    output += outstring.replace(compareType, f"{compareType}_compare")
-                    outBody.name = outBody.name + "_compare"
-                    outBodies.append(outBody)
-            else:
-                futil.log(f"Adding {compareType} compare")
-                compareBodies.append(outBody)
-            
-        if "-base" in body.name or "-source" in body.name:
-            futil.log(f"Comparing base type {body.name}")
-            outstring,outBody = describe_body(body)
-            output += outstring
-            outBodies.append(outBody)
-            
-        if "_generated" in body.name:
-            futil.log(f"Comparing generated type {body.name}")
-            outstring,outBody = describe_body(body)
-            output += outstring
-            outBodies.append(outBody)
-    
+    # Compare matching body faces 
+    if compareType in body.name:
+        body_print = futil.body_fingerprint(body)
+        outstring,outBody = describe_body(body, body_print=body_print)
+        if len(report.compareBodies) > 0:
+            futil.log(f"Comparing {compareType} Type")
+            compareBody = report.compareBodies.pop()
+            compare_print = futil.body_fingerprint(futil.cached(compareBody.BRepFaces[0].body)) if compareBody.BRepFaces else None
+            for compareBodyFace in compareBody.BRepFaces:
+                outString,outBody = describe_body(body, compareBodyFace, body_print, compare_print)
+                report.output += outstring.replace(compareType, f"{compareType}_compare")
+                outBody.name = outBody.name + "_compare"
+                report.outBodies.append(outBody)
+        else:
+            futil.log(f"Adding {compareType} compare")
+            report.compareBodies.append(outBody)
+        
+    if "-base" in body.name or "-source" in body.name:
+        futil.log(f"Comparing base type {body.name}")
+        outstring,outBody = describe_body(body)
+        report.output += outstring
+        report.outBodies.append(outBody)
+        
+    if "_generated" in body.name:
+        futil.log(f"Comparing generated type {body.name}")
+        outstring,outBody = describe_body(body)
+        report.output += outstring
+        report.outBodies.append(outBody)
+
+
+# The report state the journal keeps between sessions. Faces cannot be saved,
+# so bodies are saved by name; the thumb waiting to be compared is described
+# again on resume, which its cached measurements make cheap.
+def report_snapshot(report)->dict:
+    return {'output': report.output,
+            'compareBodies': [body.name for body in report.compareBodies],
+            'outBodies': [body.name for body in report.outBodies]}
+
+
+def restore_report(report, state:dict):
+    report.output = state.get('output', '')
+    for name in state.get('compareBodies', []):
+        body = rootComp.bRepBodies.itemByName(name)
+        if body is None:
+            futil.log(f'{CMD_NAME}: {name} is gone, its compare entries will be missing from the report')
+            continue
+        report.compareBodies.append(describe_body(body)[1])
+    # Their text is already in output; only the names are kept.
+    for name in state.get('outBodies', []):
+        outBody = Object()
+        outBody.name = name
+        outBody.faces = []
+        outBody.BRepFaces = []
+        report.outBodies.append(outBody)
+
+
+def delete_generated_bodies():
+    bodies = futil.cached(rootComp.bRepBodies)
     for body in reversed(bodies):
         if "_generated" in body.name:
             body.deleteMe()
-    
-    f = open(path.replace(".csv", f"{rootComp.name}.yaml"), "w")
+
+
+# Runs on a worker thread, so it must not touch the Fusion API.
+def write_report(path:str, output:str)->str:
+    f = open(path, "w")
     f.write(output)
     f.close()
-
-    with open(path, "r") as csvfile:
-        fingers = csv.DictReader(csvfile)
-        for finger in fingers:
-            create_finger_base(selected_body, finger["name"], 
-                               translate = Points(float(finger["tx"]), float(finger["ty"]), float(finger["tz"])), 
-                               angles = Angle3D(float(finger["rx"]), float(finger["ry"]), float(finger["rz"]))
-                              )
+    return path
+
+
+def log_cache_stats(job:futil.Job):
+    stats = measure_cache.stats()
+    futil.log(f'{CMD_NAME}: measurement cache hit rate {stats["hit_rate"]:.0%} '
+              f'({stats["hits"]} hits, {stats["misses"]} misses, {stats["records"]} records, {stats["bytes"]} bytes)')
+
+
+def generation_cancelled(job:futil.Job):
+    log_cache_stats(job)
+    # Each finger is generated by a single step, so the fingers that exist are complete.
+    ran = [label for label, step in job.steps[:job.done]]
+    skipped = [label for label, step in job.steps[job.done:] if label.startswith('Generating')]
+    if skipped:
+        futil.log(f'{CMD_NAME}: run stopped before {", ".join(skipped)}')
+    futil.log(f'{CMD_NAME}: completed steps are journaled, run the command again to resume')
+
+    # Steps run outside a command, so each is its own undo entry and the
+    # design is left as the last completed step made it.
+    if 'Deleting generated bodies' in ran and skipped:
+        built = [label[len('Generating '):] for label in ran if label.startswith('Generating')]
+        ui.messageBox(f'The run was stopped after the old generated bodies were deleted. '
+                      f'{"Only " + ", ".join(built) + " were" if built else "No fingers were"} generated again; '
+                      f'{", ".join(label[len("Generating "):] for label in skipped)} are missing.\n\n'
+                      f'Run the command again to finish, or undo each step from Edit > Undo to get the old bodies back.',
+                      CMD_Description)
     
 
 # This function will be called when the user changes anything in the command dialog.
@@ -356,6 +684,5 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    futil.clear_handlers(local_handlers)
     futil.log(f'{CMD_NAME} Command Destroy Event')
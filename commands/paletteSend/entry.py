@@ -1,4 +1,3 @@
-import json
 import adsk.core
 import os
 from ...lib import fusion360utils as futil
@@ -121,12 +120,9 @@ def command_execute(args: adsk.core.CommandEventArgs):
         'myExpression': value_input.expression,
         'myText': text_input.formattedText
     }
-    # JSON strings are a useful way to translate between javascript objects and python dictionaries
-    message_json = json.dumps(message_data)
-
-    # Get a reference to the palette and send the message to the palette javascript
-    palette = ui.palettes.itemById(PALETTE_ID)
-    palette.sendInfoToHTML(message_action, message_json)
+    # Queue the message on the palette's bus. Later updates replace this one if it
+    # has not been sent yet, and everything queued goes out in a single crossing.
+    futil.palette_bus(PALETTE_ID).post(message_action, message_data, key=message_action)
 
 
 # This function will be called when the command needs to compute a new preview in the graphics window
@@ -144,6 +140,5 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
 # This event handler is called when the command terminates.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    futil.clear_handlers(local_handlers)
     futil.log(f'{CMD_NAME} Command Destroy Event')
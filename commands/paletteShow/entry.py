@@ -1,8 +1,11 @@
 import json
 import adsk.core
 import os
+import time
 from ...lib import fusion360utils as futil
 from ... import config
+from . import transform_editor
+from . import layout_preview
 from datetime import datetime
 
 app = adsk.core.Application.get()
@@ -22,6 +25,9 @@ PALETTE_ID = config.sample_palette_id
 # such as 'https://www.autodesk.com/'
 PALETTE_URL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'html', 'index.html')
 
+# The palette loads a single bundled file with the scripts inlined.
+PALETTE_BUNDLE = PALETTE_URL.replace('index.html', 'index.bundle.html')
+
 # The path function builds a valid OS path. This fixes it to be a valid local URL.
 PALETTE_URL = PALETTE_URL.replace('\\', '/')
 
@@ -43,6 +49,17 @@ ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource
 # they are not released and garbage collected.
 local_handlers = []
 
+# Handlers connected to the palette live as long as the palette does.
+palette_handlers = []
+
+# Batched messages to and from palette.js.
+bus = futil.palette_bus(PALETTE_ID)
+transform_editor.attach(bus)
+layout_preview.attach(bus)
+
+# When the palette was created, used to log how long the page took to load.
+_created_at = None
+
 
 # Executed when add-in is run.
 def start():
@@ -65,6 +82,10 @@ def start():
     # Specify if the command is promoted to the main toolbar. 
     control.isPromoted = IS_PROMOTED
 
+    # Start the palette's browser in the background once Fusion is idle.
+    if config.palette_prewarm:
+        futil.defer(f'{CMD_ID}_prewarm', lambda: create_palette(is_visible=False))
+
 
 # Executed when add-in is stopped.
 def stop():
@@ -84,6 +105,9 @@ def stop():
         command_definition.deleteMe()
 
     # Delete the Palette
+    transform_editor.detach()
+    bus.close()
+    futil.clear_handlers(palette_handlers)
     if palette:
         palette.deleteMe()
 
@@ -107,29 +131,52 @@ def command_execute(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME}: Command execute event.')
 
-    palettes = ui.palettes
-    palette = palettes.itemById(PALETTE_ID)
+    started = time.perf_counter()
+    palette = ui.palettes.itemById(PALETTE_ID)
+    warm = palette is not None
     if palette is None:
-        palette = palettes.add(
-            id=PALETTE_ID,
-            name=PALETTE_NAME,
-            htmlFileURL=PALETTE_URL,
-            isVisible=True,
-            showCloseButton=True,
-            isResizable=True,
-            width=650,
-            height=600,
-            useNewWebBrowser=True
-        )
-        futil.add_handler(palette.closed, palette_closed)
-        futil.add_handler(palette.navigatingURL, palette_navigating)
-        futil.add_handler(palette.incomingFromHTML, palette_incoming)
-        futil.log(f'{CMD_NAME}: Created a new palette: ID = {palette.id}, Name = {palette.name}')
+        palette = create_palette(is_visible=True)
 
     if palette.dockingState == adsk.core.PaletteDockingStates.PaletteDockStateFloating:
         palette.dockingState = PALETTE_DOCKING
 
     palette.isVisible = True
+    futil.log(f'{CMD_NAME}: {"Warm" if warm else "Cold"} open took {1000 * (time.perf_counter() - started):.1f} ms')
+
+
+def create_palette(is_visible: bool) -> adsk.core.Palette:
+    global _created_at
+    palette = ui.palettes.itemById(PALETTE_ID)
+    if palette is not None:
+        return palette
+
+    _created_at = time.perf_counter()
+    bundle_url = futil.bundle_html(PALETTE_URL, PALETTE_BUNDLE).replace('\\', '/')
+    palette = ui.palettes.add(
+        id=PALETTE_ID,
+        name=PALETTE_NAME,
+        htmlFileURL=bundle_url,
+        isVisible=is_visible,
+        showCloseButton=True,
+        isResizable=True,
+        width=650,
+        height=600,
+        useNewWebBrowser=True
+    )
+    futil.add_handler(palette.closed, palette_closed, local_handlers=palette_handlers)
+    futil.add_handler(palette.navigatingURL, palette_navigating, local_handlers=palette_handlers)
+    futil.add_handler(palette.incomingFromHTML, palette_incoming, local_handlers=palette_handlers)
+    futil.log(f'{CMD_NAME}: Created a new palette: ID = {palette.id}, Name = {palette.name}, visible = {is_visible}')
+    return palette
+
+
+# Sent by palette.js once the page has loaded.
+@bus.on('paletteReady')
+def palette_ready(data: dict):
+    if _created_at is not None:
+        futil.log(f'{CMD_NAME}: Palette page ready {1000 * (time.perf_counter() - _created_at):.1f} ms after creation '
+                  f'({data.get("loadMs", 0):.1f} ms in the browser)')
+    return True
 
 
 # Use this to handle a user closing your palette.
@@ -159,6 +206,11 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME}: Palette incoming event.')
 
+    # Batches from bus.js carry their own actions and request ids.
+    if html_args.action == futil.BUS_ACTION:
+        bus.handle(html_args)
+        return
+
     message_data: dict = json.loads(html_args.data)
     message_action = html_args.action
 
@@ -171,12 +223,8 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
 
     # Read message sent from palette javascript and react appropriately.
     if message_action == 'messageFromPalette':
-        arg1 = message_data.get('arg1', 'arg1 not sent')
-        arg2 = message_data.get('arg2', 'arg2 not sent')
-
-        msg = 'An event has been fired from the html to Fusion with the following data:<br/>'
-        msg += f'<b>Action</b>: {message_action}<br/><b>arg1</b>: {arg1}<br/><b>arg2</b>: {arg2}'               
-        ui.messageBox(msg)
+        html_args.returnData = message_from_palette(message_data)
+        return
 
     # Return value.
     now = datetime.now()
@@ -184,10 +232,24 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
     html_args.returnData = f'OK - {currentTime}'
 
 
+@bus.on('messageFromPalette')
+def message_from_palette(message_data: dict):
+    arg1 = message_data.get('arg1', 'arg1 not sent')
+    arg2 = message_data.get('arg2', 'arg2 not sent')
+
+    msg = 'An event has been fired from the html to Fusion with the following data:<br/>'
+    msg += f'<b>Action</b>: messageFromPalette<br/><b>arg1</b>: {arg1}<br/><b>arg2</b>: {arg2}'               
+    ui.messageBox(msg)
+
+    # Return value.
+    now = datetime.now()
+    currentTime = now.strftime('%H:%M:%S')
+    return f'OK - {currentTime}'
+
+
 # This event handler is called when the command terminates.
 def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME}: Command destroy event.')
 
-    global local_handlers
-    local_handlers = []
+    futil.clear_handlers(local_handlers)
@@ -0,0 +1,56 @@
+# Client-side preview of finger layouts in the palette.
+#
+# The finger base mesh is sent once as packed typed arrays. After that a
+# layout is just one 4x4 matrix per finger, compiled from a transform table
+# without touching the design, so trying a layout costs one small message.
+
+import glob
+import os
+
+import adsk.core
+import adsk.fusion
+from ...lib import fusion360utils as futil
+from ...lib.handex import transforms
+from ..multiply_bases import entry as multiplyBases
+
+app = adsk.core.Application.get()
+
+TABLE_FOLDER = os.path.dirname(os.path.abspath(multiplyBases.__file__))
+
+
+def attach(bus: futil.PaletteBus):
+    """Registers the preview's actions on the palette bus."""
+    bus.on('previewTables', preview_tables)
+    bus.on('previewMesh', preview_mesh)
+    bus.on('previewLayout', preview_layout)
+
+
+def preview_tables(data=None):
+    return sorted(os.path.basename(path) for path in glob.glob(os.path.join(TABLE_FOLDER, 'fingerTransforms*.csv')))
+
+
+def preview_mesh(data=None):
+    # The body multiply_bases last copied, or the first body before it ran.
+    body = multiplyBases.source_body
+    if body is None or not body.isValid:
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        body = design.rootComponent.bRepBodies.item(0)
+
+    calculator = body.meshManager.createMeshCalculator()
+    calculator.setQuality(adsk.fusion.TriangleMeshQualityOptions.LowQualityTriangleMesh)
+    mesh = calculator.calculate()
+    return {
+        'name': body.name,
+        'positions': futil.pack_array(mesh.nodeCoordinatesAsFloat, 'f'),
+        'normals': futil.pack_array(mesh.normalVectorsAsFloat, 'f'),
+        'indices': futil.pack_array(mesh.nodeIndices, 'I'),
+    }
+
+
+def preview_layout(data: dict):
+    table = os.path.basename(data['table'])
+    rows = transforms.read_table(os.path.join(TABLE_FOLDER, table))
+    matrices = []
+    for row in rows:
+        matrices.extend(transforms.column_major(transforms.finger_matrix(row)))
+    return {'names': [row.name for row in rows], 'matrices': futil.pack_array(matrices, 'f')}
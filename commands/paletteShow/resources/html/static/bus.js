@@ -0,0 +1,145 @@
+// Batched, correlated messages between the palette and the add-in.
+// Must be loaded before palette.js. Pairs with fusion360utils/palette_utils.py.
+window.fusionBus = (function () {
+    const BUS_ACTION = "bus";
+    const TYPED_ARRAYS = {
+        $f32: Float32Array,
+        $f64: Float64Array,
+        $u32: Uint32Array,
+        $i32: Int32Array,
+        $u8: Uint8Array,
+    };
+
+    const actions = {};
+    const waiting = {};
+    let queue = [];
+    let nextId = 1;
+    let flushScheduled = false;
+
+    // Turns {"$f32": "<base64>"} payloads back into typed arrays.
+    function unpack(value) {
+        if (Array.isArray(value)) {
+            return value.map(unpack);
+        }
+        if (value && typeof value === "object") {
+            const keys = Object.keys(value);
+            if (keys.length === 1 && TYPED_ARRAYS[keys[0]]) {
+                const binary = atob(value[keys[0]]);
+                const bytes = new Uint8Array(binary.length);
+                for (let i = 0; i < binary.length; i++) {
+                    bytes[i] = binary.charCodeAt(i);
+                }
+                return new TYPED_ARRAYS[keys[0]](bytes.buffer);
+            }
+            const out = {};
+            for (const key of keys) {
+                out[key] = unpack(value[key]);
+            }
+            return out;
+        }
+        return value;
+    }
+
+    function flush() {
+        flushScheduled = false;
+        if (queue.length === 0) {
+            return;
+        }
+        // Fusion injects the adsk object shortly after the page starts loading.
+        if (!window.adsk) {
+            flushScheduled = true;
+            setTimeout(flush, 10);
+            return;
+        }
+        const batch = {id: nextId++, messages: queue};
+        queue = [];
+        const ids = batch.messages.map((message) => message.id);
+        // Anything in the batch still waiting once the reply is handled will never be answered.
+        const rejectRest = (error) => {
+            for (const id of ids) {
+                const pending = waiting[id];
+                delete waiting[id];
+                if (pending) {
+                    pending.reject(error);
+                }
+            }
+        };
+        let sent;
+        try {
+            sent = adsk.fusionSendData(BUS_ACTION, JSON.stringify(batch));
+        } catch (e) {
+            rejectRest(e);
+            return;
+        }
+        Promise.resolve(sent).then((result) => {
+            const reply = JSON.parse(result);
+            for (const answer of reply.replies) {
+                const pending = waiting[answer.id];
+                delete waiting[answer.id];
+                if (!pending) {
+                    continue;
+                }
+                if (!answer.ok) {
+                    pending.reject(new Error(answer.error));
+                    continue;
+                }
+                try {
+                    pending.resolve(unpack(answer.data));
+                } catch (e) {
+                    pending.reject(e);
+                }
+            }
+            rejectRest(new Error(`No reply to bus batch ${batch.id}`));
+        }).catch(rejectRest);
+    }
+
+    // Sends a request to Python. Requests made in the same task share one round-trip.
+    // A request with a key replaces a queued request with the same key.
+    function request(action, data, key) {
+        return new Promise((resolve, reject) => {
+            const id = nextId++;
+            if (key !== undefined) {
+                queue = queue.filter((message) => {
+                    if (message.key !== key) {
+                        return true;
+                    }
+                    waiting[message.id].resolve(null);
+                    delete waiting[message.id];
+                    return false;
+                });
+            }
+            queue.push({id: id, action: action, data: data, key: key});
+            waiting[id] = {resolve: resolve, reject: reject};
+            if (!flushScheduled) {
+                flushScheduled = true;
+                setTimeout(flush, 0);
+            }
+        });
+    }
+
+    // Registers a handler for messages posted from Python.
+    function on(action, callback) {
+        actions[action] = callback;
+    }
+
+    // Handles one batch sent by PaletteBus.flush.
+    function receive(data) {
+        const batch = JSON.parse(data);
+        for (const message of batch.messages) {
+            const callback = actions[message.action];
+            if (!callback) {
+                console.log(`Unexpected bus action: ${message.action}`);
+                continue;
+            }
+            try {
+                callback(unpack(message.data));
+            } catch (e) {
+                console.log(e);
+                console.log(`Exception caught with bus action: ${message.action}`);
+            }
+        }
+        return "OK";
+    }
+
+    return {BUS_ACTION: BUS_ACTION, request: request, on: on, receive: receive, unpack: unpack};
+})();
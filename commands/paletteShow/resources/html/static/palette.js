@@ -11,16 +11,18 @@ function sendInfoToFusion() {
         arg2: getDateString()
     };
 
-    // Send the data to Fusion as a JSON string. The return value is a Promise.
-    adsk.fusionSendData("messageFromPalette", JSON.stringify(args)).then((result) =>
+    // Send the data to Fusion through the bus. The return value is a Promise.
+    fusionBus.request("messageFromPalette", args).then((result) =>
         document.getElementById("returnValue").innerHTML = `${result}`
     );
 
 }
 
-function updateMessage(messageString) {
-    // Message is sent from the add-in as a JSON string.
-    const messageData = JSON.parse(messageString);
+function updateMessage(messageData) {
+    // Messages sent directly with sendInfoToHTML arrive as a JSON string.
+    if (typeof messageData === "string") {
+        messageData = JSON.parse(messageData);
+    }
 
     // Update a paragraph with the data passed in.
     document.getElementById("fusionMessage").innerHTML =
@@ -29,10 +31,17 @@ function updateMessage(messageString) {
         `<b>Your value</b>: ${messageData.myValue}`;
 }
 
+fusionBus.on("updateMessage", updateMessage);
+
+// Lets the add-in log how long the palette took to become usable.
+window.addEventListener("load", () => fusionBus.request("paletteReady", {loadMs: performance.now()}));
+
 window.fusionJavaScriptHandler = {
     handle: function (action, data) {
         try {
-            if (action === "updateMessage") {
+            if (action === fusionBus.BUS_ACTION) {
+                return fusionBus.receive(data);
+            } else if (action === "updateMessage") {
                 updateMessage(data);
             } else if (action === "debugger") {
                 debugger;
@@ -0,0 +1,87 @@
+// Editable finger transform table. Every slider or field change is sent as an
+// editTransform request; the add-in throttles a preview on its side. Releasing
+// a slider or typing a value commits the edit, which rebuilds the real body.
+const TRANSFORM_RANGES = {
+    tx: [-60, 60, 0.01],
+    ty: [-60, 60, 0.01],
+    tz: [-60, 60, 0.01],
+    rx: [-180, 180, 0.1],
+    ry: [-180, 180, 0.1],
+    rz: [-180, 180, 0.1],
+};
+
+function sendTransformEdit(name, field, value) {
+    // Keyed by finger and field so only the latest value of a drag is sent.
+    fusionBus.request("editTransform", {name: name, field: field, value: value}, `${name}.${field}`)
+        .catch((e) => setTransformStatus(e.message));
+}
+
+function commitTransformEdits() {
+    fusionBus.request("commitTransforms").catch((e) => setTransformStatus(e.message));
+}
+
+function transformCell(row, field) {
+    const [min, max, step] = TRANSFORM_RANGES[field];
+    const cell = document.createElement("td");
+    const slider = document.createElement("input");
+    const number = document.createElement("input");
+
+    slider.type = "range";
+    number.type = "number";
+    for (const input of [slider, number]) {
+        input.min = min;
+        input.max = max;
+        input.step = step;
+        input.value = row[field];
+    }
+    number.style.width = "5em";
+
+    slider.addEventListener("input", () => {
+        number.value = slider.value;
+        sendTransformEdit(row.name, field, parseFloat(slider.value));
+    });
+    // Fires once when the slider is released.
+    slider.addEventListener("change", commitTransformEdits);
+    number.addEventListener("change", () => {
+        slider.value = number.value;
+        sendTransformEdit(row.name, field, parseFloat(number.value));
+        commitTransformEdits();
+    });
+
+    cell.appendChild(slider);
+    cell.appendChild(number);
+    return cell;
+}
+
+function setTransformStatus(text) {
+    document.getElementById("transformStatus").textContent = text;
+}
+
+function loadTransforms() {
+    fusionBus.request("loadTransforms").then((table) => {
+        const head = document.getElementById("transformHead");
+        const body = document.getElementById("transformBody");
+        head.innerHTML = "<th>name</th>" + table.fields.map((field) => `<th>${field}</th>`).join("");
+        body.innerHTML = "";
+        for (const row of table.rows) {
+            const tr = document.createElement("tr");
+            const name = document.createElement("td");
+            name.textContent = row.name;
+            tr.appendChild(name);
+            for (const field of table.fields) {
+                tr.appendChild(transformCell(row, field));
+            }
+            body.appendChild(tr);
+        }
+    });
+}
+
+function saveTransforms() {
+    fusionBus.request("saveTransforms").then((path) => setTransformStatus(`Saved ${path}`));
+}
+
+fusionBus.on("transformsRegenerated", (result) =>
+    setTransformStatus(`Regenerated ${result.names.join(", ")} in ${result.seconds.toFixed(2)}s`)
+);
+
+window.addEventListener("load", loadTransforms);
@@ -0,0 +1,231 @@
+// Small WebGL viewer for finger layouts. The base mesh is requested once;
+// each layout only sends one column-major 4x4 matrix per finger.
+const FINGER_COLORS = [
+    [0.90, 0.45, 0.35],
+    [0.35, 0.65, 0.90],
+    [0.45, 0.80, 0.45],
+    [0.90, 0.75, 0.30],
+    [0.70, 0.45, 0.85],
+    [0.40, 0.80, 0.80],
+];
+
+const VERTEX_SHADER = `
+attribute vec3 position;
+attribute vec3 normal;
+uniform mat4 model;
+uniform mat4 viewProjection;
+varying vec3 worldNormal;
+void main() {
+    worldNormal = (model * vec4(normal, 0.0)).xyz;
+    gl_Position = viewProjection * model * vec4(position, 1.0);
+}`;
+
+const FRAGMENT_SHADER = `
+precision mediump float;
+uniform vec3 color;
+varying vec3 worldNormal;
+void main() {
+    float light = 0.35 + 0.65 * abs(dot(normalize(worldNormal), normalize(vec3(0.4, 0.8, 0.5))));
+    gl_FragColor = vec4(color * light, 1.0);
+}`;
+
+const viewer = {
+    gl: null,
+    program: null,
+    mesh: null,
+    layout: null,
+    yaw: 0.6,
+    pitch: 0.4,
+    distance: 20,
+    center: [0, 0, 0],
+};
+
+function multiply4(a, b) {
+    const out = new Float32Array(16);
+    for (let col = 0; col < 4; col++) {
+        for (let row = 0; row < 4; row++) {
+            let sum = 0;
+            for (let k = 0; k < 4; k++) {
+                sum += a[k * 4 + row] * b[col * 4 + k];
+            }
+            out[col * 4 + row] = sum;
+        }
+    }
+    return out;
+}
+
+function perspective(fovy, aspect, near, far) {
+    const f = 1 / Math.tan(fovy / 2);
+    const out = new Float32Array(16);
+    out[0] = f / aspect;
+    out[5] = f;
+    out[10] = (far + near) / (near - far);
+    out[11] = -1;
+    out[14] = (2 * far * near) / (near - far);
+    return out;
+}
+
+function lookAt(eye, target) {
+    const sub = (a, b) => [a[0] - b[0], a[1] - b[1], a[2] - b[2]];
+    const cross = (a, b) => [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]];
+    const normalize = (a) => {
+        const length = Math.hypot(a[0], a[1], a[2]) || 1;
+        return [a[0] / length, a[1] / length, a[2] / length];
+    };
+    const dot = (a, b) => a[0] * b[0] + a[1] * b[1] + a[2] * b[2];
+    const z = normalize(sub(eye, target));
+    const x = normalize(cross([0, 1, 0], z));
+    const y = cross(z, x);
+    return new Float32Array([
+        x[0], y[0], z[0], 0,
+        x[1], y[1], z[1], 0,
+        x[2], y[2], z[2], 0,
+        -dot(x, eye), -dot(y, eye), -dot(z, eye), 1,
+    ]);
+}
+
+function compileProgram(gl) {
+    const program = gl.createProgram();
+    for (const [type, source] of [[gl.VERTEX_SHADER, VERTEX_SHADER], [gl.FRAGMENT_SHADER, FRAGMENT_SHADER]]) {
+        const shader = gl.createShader(type);
+        gl.shaderSource(shader, source);
+        gl.compileShader(shader);
+        gl.attachShader(program, shader);
+    }
+    gl.linkProgram(program);
+    return program;
+}
+
+function uploadMesh(gl, mesh) {
+    const buffer = (target, data) => {
+        const id = gl.createBuffer();
+        gl.bindBuffer(target, id);
+        gl.bufferData(target, data, gl.STATIC_DRAW);
+        return id;
+    };
+    // WebGL 1 only guarantees 16 bit indices.
+    const indices = mesh.positions.length / 3 <= 65536 ? new Uint16Array(mesh.indices) : mesh.indices;
+    if (indices instanceof Uint32Array) {
+        gl.getExtension("OES_element_index_uint");
+    }
+    return {
+        positions: buffer(gl.ARRAY_BUFFER, mesh.positions),
+        normals: buffer(gl.ARRAY_BUFFER, mesh.normals),
+        indices: buffer(gl.ELEMENT_ARRAY_BUFFER, indices),
+        indexType: indices instanceof Uint16Array ? gl.UNSIGNED_SHORT : gl.UNSIGNED_INT,
+        count: indices.length,
+        source: mesh.positions,
+    };
+}
+
+// Centres the camera on the transformed bounding box of every finger.
+function frameLayout() {
+    const min = [Infinity, Infinity, Infinity];
+    const max = [-Infinity, -Infinity, -Infinity];
+    const positions = viewer.mesh.source;
+    const matrices = viewer.layout.matrices;
+    for (let f = 0; f < matrices.length / 16; f++) {
+        const m = matrices.subarray(f * 16, f * 16 + 16);
+        for (let i = 0; i < positions.length; i += 3) {
+            for (let axis = 0; axis < 3; axis++) {
+                const value = m[axis] * positions[i] + m[4 + axis] * positions[i + 1] + m[8 + axis] * positions[i + 2] + m[12 + axis];
+                min[axis] = Math.min(min[axis], value);
+                max[axis] = Math.max(max[axis], value);
+            }
+        }
+    }
+    viewer.center = [0, 1, 2].map((axis) => (min[axis] + max[axis]) / 2);
+    viewer.distance = 2 * Math.hypot(max[0] - min[0], max[1] - min[1], max[2] - min[2]) || 20;
+}
+
+function drawLayout() {
+    const gl = viewer.gl;
+    if (!gl || !viewer.mesh || !viewer.layout) {
+        return;
+    }
+    const canvas = gl.canvas;
+    gl.viewport(0, 0, canvas.width, canvas.height);
+    gl.clearColor(0.15, 0.15, 0.17, 1);
+    gl.clear(gl.COLOR_BUFFER_BIT | gl.DEPTH_BUFFER_BIT);
+    gl.enable(gl.DEPTH_TEST);
+    gl.useProgram(viewer.program);
+
+    const eye = [
+        viewer.center[0] + viewer.distance * Math.cos(viewer.pitch) * Math.sin(viewer.yaw),
+        viewer.center[1] + viewer.distance * Math.sin(viewer.pitch),
+        viewer.center[2] + viewer.distance * Math.cos(viewer.pitch) * Math.cos(viewer.yaw),
+    ];
+    const viewProjection = multiply4(
+        perspective(Math.PI / 4, canvas.width / canvas.height, viewer.distance / 100, viewer.distance * 10),
+        lookAt(eye, viewer.center)
+    );
+    const uniform = (name) => gl.getUniformLocation(viewer.program, name);
+    gl.uniformMatrix4fv(uniform("viewProjection"), false, viewProjection);
+
+    const attribute = (name, buffer) => {
+        const location = gl.getAttribLocation(viewer.program, name);
+        gl.bindBuffer(gl.ARRAY_BUFFER, buffer);
+        gl.enableVertexAttribArray(location);
+        gl.vertexAttribPointer(location, 3, gl.FLOAT, false, 0, 0);
+    };
+    attribute("position", viewer.mesh.positions);
+    attribute("normal", viewer.mesh.normals);
+    gl.bindBuffer(gl.ELEMENT_ARRAY_BUFFER, viewer.mesh.indices);
+
+    const matrices = viewer.layout.matrices;
+    for (let f = 0; f < matrices.length / 16; f++) {
+        gl.uniformMatrix4fv(uniform("model"), false, matrices.subarray(f * 16, f * 16 + 16));
+        gl.uniform3fv(uniform("color"), FINGER_COLORS[f % FINGER_COLORS.length]);
+        gl.drawElements(gl.TRIANGLES, viewer.mesh.count, viewer.mesh.indexType, 0);
+    }
+}
+
+function previewLayout(table) {
+    const meshReady = viewer.mesh
+        ? Promise.resolve()
+        : fusionBus.request("previewMesh").then((mesh) => viewer.mesh = uploadMesh(viewer.gl, mesh));
+    return meshReady
+        .then(() => fusionBus.request("previewLayout", {table: table}))
+        .then((layout) => {
+            viewer.layout = layout;
+            document.getElementById("previewNames").textContent = layout.names.join(", ");
+            frameLayout();
+            drawLayout();
+        });
+}
+
+function initViewer() {
+    const canvas = document.getElementById("previewCanvas");
+    viewer.gl = canvas.getContext("webgl");
+    if (!viewer.gl) {
+        document.getElementById("previewNames").textContent = "WebGL is not available";
+        return;
+    }
+    viewer.program = compileProgram(viewer.gl);
+
+    let dragging = null;
+    canvas.addEventListener("mousedown", (e) => dragging = [e.clientX, e.clientY]);
+    window.addEventListener("mouseup", () => dragging = null);
+    window.addEventListener("mousemove", (e) => {
+        if (!dragging) {
+            return;
+        }
+        viewer.yaw -= (e.clientX - dragging[0]) * 0.01;
+        viewer.pitch = Math.max(-1.5, Math.min(1.5, viewer.pitch + (e.clientY - dragging[1]) * 0.01));
+        dragging = [e.clientX, e.clientY];
+        drawLayout();
+    });
+    canvas.addEventListener("wheel", (e) => {
+        e.preventDefault();
+        viewer.distance *= e.deltaY > 0 ? 1.1 : 0.9;
+        drawLayout();
+    });
+
+    const select = document.getElementById("previewTable");
+    select.addEventListener("change", () => previewLayout(select.value));
+    fusionBus.request("previewTables").then((tables) => {
+        select.innerHTML = tables.map((table) => `<option>${table}</option>`).join("");
+    });
+}
+
+window.addEventListener("load", initViewer);
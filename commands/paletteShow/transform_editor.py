@@ -0,0 +1,192 @@
+# Live editing of the finger transform table from the palette.
+#
+# Edits stream in through the palette bus and only update the table in memory.
+# While a slider moves, a throttle moves a custom graphics preview of each
+# touched finger at most once per REGENERATE_INTERVAL, which adds nothing to
+# the timeline. The real <name>_generated bodies are rebuilt once per edit,
+# when the slider is released or the table is saved.
+
+import csv
+import os
+import time
+
+import adsk.core
+import adsk.fusion
+from ...lib import fusion360utils as futil
+from ...lib.handex import transforms
+from ..multiply_bases import entry as multiplyBases
+
+app = adsk.core.Application.get()
+
+FIELDS = ['tx', 'ty', 'tz', 'rx', 'ry', 'rz']
+TRANSFORMS_PATH = os.path.join(os.path.dirname(os.path.abspath(multiplyBases.__file__)), 'fingerTransforms.csv')
+
+# Minimum number of seconds between two preview updates.
+REGENERATE_INTERVAL = 0.25
+
+_rows = []
+# Fingers whose preview is behind the table, and fingers whose generated body is.
+_dirty = set()
+_edited = set()
+# Custom graphics group and per-finger preview bodies.
+_graphics = None
+_previews = {}
+_throttle = None
+_bus = None
+
+
+def attach(bus: futil.PaletteBus):
+    """Registers the editor's actions on the palette bus."""
+    global _bus
+    _bus = bus
+    bus.on('loadTransforms', load_transforms)
+    bus.on('editTransform', edit_transform)
+    bus.on('commitTransforms', commit_transforms)
+    bus.on('saveTransforms', save_transforms)
+
+
+def detach():
+    global _throttle
+    if _throttle is not None:
+        _throttle.close()
+        _throttle = None
+    _dirty.clear()
+    _edited.clear()
+    clear_previews()
+
+
+def load_transforms(data=None):
+    with open(TRANSFORMS_PATH, 'r') as csvfile:
+        _rows[:] = [dict(row) for row in csv.DictReader(csvfile)]
+    return {'fields': FIELDS, 'rows': _rows}
+
+
+def edit_transform(data: dict):
+    global _throttle
+    if data['field'] not in FIELDS:
+        raise ValueError(f'Unknown transform field {data["field"]}')
+    row = _find_row(data['name'])
+    if row is None:
+        # The table was reloaded without this finger since the palette showed it.
+        futil.log(f'Ignoring edit of {data["name"]}, it is no longer in the table')
+        return False
+    row[data['field']] = str(float(data['value']))
+    _dirty.add(row['name'])
+    _edited.add(row['name'])
+
+    if _throttle is None:
+        _throttle = futil.Throttle(f'{multiplyBases.CMD_ID}_live_edit', REGENERATE_INTERVAL, preview_dirty)
+    _throttle.trigger()
+    return True
+
+
+def save_transforms(data=None):
+    commit_transforms()
+    with open(TRANSFORMS_PATH, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['name'] + FIELDS, lineterminator='\r\n')
+        writer.writeheader()
+        writer.writerows(_rows)
+    return TRANSFORMS_PATH
+
+
+def preview_dirty():
+    global _graphics
+    if not _dirty:
+        return
+    base_body = _base_body()
+    if base_body is None:
+        _dirty.clear()
+        return
+
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    bodies = design.rootComponent.bRepBodies
+    if _graphics is None or not _graphics.isValid:
+        _graphics = design.rootComponent.customGraphicsGroups.add()
+        _previews.clear()
+    names = [name for name in sorted(_dirty) if _find_row(name) is not None]
+    _dirty.clear()
+    for name in names:
+        preview = _previews.get(name)
+        if preview is None:
+            preview = _graphics.addBRepBody(adsk.fusion.TemporaryBRepManager.get().copy(base_body))
+            _previews[name] = preview
+            # The preview stands in for the generated body until the edit is committed.
+            generated = bodies.itemByName(f'{name}_generated')
+            if generated:
+                generated.isLightBulbOn = False
+        preview.transform = _matrix3d(_find_row(name))
+    app.activeViewport.refresh()
+
+
+def commit_transforms(data=None):
+    """Rebuilds the generated body of every finger edited since the last commit.
+
+    Each rebuild adds copy, move and remove features to the timeline, so the
+    palette only asks for it when a slider is released or a value is typed.
+    """
+    names = [name for name in sorted(_edited) if _find_row(name) is not None]
+    _edited.clear()
+    _dirty.clear()
+    if not names:
+        clear_previews()
+        return []
+    base_body = _base_body()
+    if base_body is None:
+        clear_previews()
+        return []
+
+    started = time.perf_counter()
+    bodies = adsk.fusion.Design.cast(app.activeProduct).rootComponent.bRepBodies
+    for name in names:
+        row = _find_row(name)
+        generated = bodies.itemByName(f'{name}_generated')
+        if generated:
+            generated.deleteMe()
+        multiplyBases.create_finger_base(base_body, name,
+                                         translate = multiplyBases.Points(float(row['tx']), float(row['ty']), float(row['tz'])),
+                                         angles = multiplyBases.Angle3D(float(row['rx']), float(row['ry']), float(row['rz'])))
+    clear_previews()
+
+    elapsed = time.perf_counter() - started
+    futil.log(f'Regenerated {", ".join(names)} in {elapsed:.2f}s')
+    _bus.post('transformsRegenerated', {'names': names, 'seconds': elapsed}, key='transformsRegenerated')
+    return names
+
+
+def clear_previews():
+    global _graphics
+    if _graphics is not None and _graphics.isValid:
+        _graphics.deleteMe()
+    _graphics = None
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    if design and _previews:
+        for name in _previews:
+            generated = design.rootComponent.bRepBodies.itemByName(f'{name}_generated')
+            if generated:
+                generated.isLightBulbOn = True
+        app.activeViewport.refresh()
+    _previews.clear()
+
+
+def _base_body() -> adsk.fusion.BRepBody:
+    # Fingers are previewed and regenerated from the body multiply_bases copied them from.
+    base_body = multiplyBases.source_body
+    if base_body is None or not base_body.isValid:
+        futil.log('Run multiplyBases once before editing transforms live, so they have a body to copy')
+        return None
+    return base_body
+
+
+def _matrix3d(row: dict) -> adsk.core.Matrix3D:
+    # The transform create_finger_base applies, in Fusion's internal units.
+    transform = transforms.FingerTransform(row['name'], *(float(row[field]) for field in FIELDS))
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setWithArray([value for row in transforms.finger_matrix(transform) for value in row])
+    return matrix
+
+
+def _find_row(name: str):
+    for row in _rows:
+        if row['name'] == name:
+            return row
+    return None
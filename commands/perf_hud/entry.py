@@ -0,0 +1,150 @@
+import adsk.core
+import os
+from ...lib import fusion360utils as futil
+from ... import config
+from ..paletteShow import entry as paletteShow
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_NAME = os.path.basename(os.path.dirname(__file__))
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_{CMD_NAME}'
+CMD_Description = 'Latency, API reads, logging and memory of each command'
+PALETTE_NAME = 'Handex Performance'
+IS_PROMOTED = False
+
+PALETTE_ID = config.perf_hud_palette_id
+
+# The page is bundled like the sample palette's and shares its bus.js.
+PALETTE_URL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'html', 'index.html')
+PALETTE_BUNDLE = PALETTE_URL.replace('index.html', 'index.bundle.html')
+
+PALETTE_DOCKING = adsk.core.PaletteDockingStates.PaletteDockStateRight
+
+# The button goes right after the sample palette's.
+WORKSPACE_ID = paletteShow.WORKSPACE_ID
+PANEL_ID = paletteShow.PANEL_ID
+COMMAND_BESIDE_ID = paletteShow.CMD_ID
+
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# Live figures are pushed to the palette at most this often, in seconds.
+UPDATE_INTERVAL = 1.0
+
+local_handlers = []
+palette_handlers = []
+
+bus = futil.palette_bus(PALETTE_ID)
+throttle = None
+
+
+# Executed when add-in is run.
+def start():
+    global throttle
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+    recorder = futil.perf_recorder()
+    if recorder is not None:
+        # The palette's own handlers would otherwise show up in every update they send.
+        recorder.ignore.add(CMD_NAME)
+        throttle = futil.Throttle(CMD_ID, UPDATE_INTERVAL, push_summary)
+        recorder.listeners.append(sample_recorded)
+
+
+# Executed when add-in is stopped.
+def stop():
+    global throttle
+    recorder = futil.perf_recorder()
+    if recorder is not None and sample_recorded in recorder.listeners:
+        recorder.listeners.remove(sample_recorded)
+    if throttle is not None:
+        throttle.close()
+        throttle = None
+
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    command_control = panel.controls.itemById(CMD_ID)
+    command_definition = ui.commandDefinitions.itemById(CMD_ID)
+    palette = ui.palettes.itemById(PALETTE_ID)
+
+    if command_control:
+        command_control.deleteMe()
+
+    if command_definition:
+        command_definition.deleteMe()
+
+    bus.close()
+    futil.clear_handlers(palette_handlers)
+    if palette:
+        palette.deleteMe()
+
+
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log(f'{CMD_NAME}: Command created event.')
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+def command_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME}: Command execute event.')
+    palette = ui.palettes.itemById(PALETTE_ID)
+    if palette is None:
+        bundle_url = futil.bundle_html(PALETTE_URL, PALETTE_BUNDLE).replace('\\', '/')
+        palette = ui.palettes.add(
+            id=PALETTE_ID,
+            name=PALETTE_NAME,
+            htmlFileURL=bundle_url,
+            isVisible=True,
+            showCloseButton=True,
+            isResizable=True,
+            width=650,
+            height=500,
+            useNewWebBrowser=True
+        )
+        futil.add_handler(palette.incomingFromHTML, palette_incoming, local_handlers=palette_handlers)
+
+    if palette.dockingState == adsk.core.PaletteDockingStates.PaletteDockStateFloating:
+        palette.dockingState = PALETTE_DOCKING
+    palette.isVisible = True
+
+
+def palette_incoming(html_args: adsk.core.HTMLEventArgs):
+    if html_args.action == futil.BUS_ACTION:
+        bus.handle(html_args)
+
+
+@bus.on('perfSummary')
+def perf_summary(data=None):
+    recorder = futil.perf_recorder()
+    if recorder is None:
+        return {'enabled': False, 'rows': [], 'memory': futil.MEMORY_KIND}
+    return {'enabled': True, 'rows': recorder.summary(), 'memory': futil.MEMORY_KIND}
+
+
+@bus.on('perfHistory')
+def perf_history(data: dict):
+    recorder = futil.perf_recorder()
+    if recorder is None:
+        return []
+    return recorder.history(data['command'], int(data.get('days', 30)))
+
+
+def sample_recorded(command: str, stage: str):
+    palette = ui.palettes.itemById(PALETTE_ID)
+    if palette is not None and palette.isVisible:
+        throttle.trigger()
+
+
+def push_summary():
+    bus.post('perfSummary', perf_summary(), key='perfSummary')
+
+
+def command_destroy(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME}: Command destroy event.')
+    futil.clear_handlers(local_handlers)
@@ -0,0 +1,70 @@
+// Performance HUD. Pairs with commands/perf_hud/entry.py.
+
+function ms(seconds) {
+    return (1000 * seconds).toFixed(1);
+}
+
+function mb(bytes) {
+    return bytes ? (bytes / 1048576).toFixed(0) : "";
+}
+
+function fillTable(bodyId, rows, cells, onClick) {
+    const body = document.getElementById(bodyId);
+    body.innerHTML = "";
+    for (const row of rows) {
+        const tr = document.createElement("tr");
+        for (const value of cells(row)) {
+            const td = document.createElement("td");
+            td.textContent = value;
+            tr.appendChild(td);
+        }
+        if (onClick) {
+            tr.onclick = () => onClick(row);
+        }
+        body.appendChild(tr);
+    }
+}
+
+function showSummary(summary) {
+    document.getElementById("hudStatus").textContent = summary.enabled
+        ? `${summary.rows.length} command stages, updated ${new Date().toLocaleTimeString()}`
+        : "Recording is off. Set perf_history = True in config.py and restart the add-in.";
+    // Outside Windows only the peak of the process is known, which never goes down.
+    for (const header of document.getElementsByClassName("memoryHeader")) {
+        header.textContent = summary.memory === "peak" ? "Peak memory MB" : "Memory MB";
+    }
+    fillTable("summaryBody", summary.rows, (row) => [
+        row.command, row.stage, row.calls, ms(row.last), ms(row.median), row.apiReads, row.logMessages, mb(row.memory)
+    ], (row) => loadHistory(row.command));
+}
+
+function loadHistory(command) {
+    document.getElementById("historyTitle").textContent = `History of ${command}`;
+    fusionBus.request("perfHistory", {command: command, days: 30}).then((rows) =>
+        fillTable("historyBody", rows, (row) => [
+            row.day, row.stage, row.calls, ms(row.mean), ms(row.max), row.apiReads.toFixed(0), mb(row.memory)
+        ])
+    );
+}
+
+fusionBus.on("perfSummary", showSummary);
+
+window.addEventListener("load", () => fusionBus.request("perfSummary").then(showSummary));
+
+window.fusionJavaScriptHandler = {
+    handle: function (action, data) {
+        try {
+            if (action === fusionBus.BUS_ACTION) {
+                return fusionBus.receive(data);
+            } else if (action === "debugger") {
+                debugger;
+            } else {
+                return `Unexpected command type: ${action}`;
+            }
+        } catch (e) {
+            console.log(e);
+            console.log(`Exception caught with command: ${action}, data: ${data}`);
+        }
+        return "OK";
+    },
+};
@@ -295,6 +295,5 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    futil.clear_handlers(local_handlers)
     futil.log(f'{CMD_NAME} Command Destroy Event')
@@ -20,6 +20,44 @@ COMPANY_NAME = 'Handex'
 
 # Palettes
 sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
+perf_hud_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_perf_hud_palette_id'
+
+# Create the sample palette hidden while the add-in starts so the first time
+# it is shown the embedded browser is already running. This costs a hidden
+# browser on every start, so it is off unless the palette is used often.
+palette_prewarm = False
+
+# Measurements of unchanged bodies are kept in this SQLite file in the add-in
+# folder, and the least recently used are dropped past the size limit.
+measure_cache_file = 'measurements.sqlite'
+measure_cache_max_bytes = 16 * 1024 * 1024
+
+# multiply_bases asks before starting a run estimated to take longer than
+# this many seconds. Step timings of each run calibrate the estimate.
+max_run_seconds = 120
+run_costs_file = 'run_costs.json'
+
+# multiply_bases mirrors the generated fingers in this origin plane ('yz',
+# 'xz' or 'xy') to build the other hand.
+mirror_plane = 'yz'
+
+# Latency of every command handler and job step is kept in this SQLite file
+# in the add-in folder and shown by the perf_hud palette.
+perf_history = True
+perf_history_file = 'perf_history.sqlite'
+# Samples older than this many days are dropped when the add-in starts, and
+# the oldest go first while the file is larger than the byte limit.
+perf_history_days = 90
+perf_history_max_bytes = 8 * 1024 * 1024
+
+# Record what each command's event handlers leave allocated and write it to
+# this file in the add-in folder. Slows every handler down; leave it off
+# unless you are chasing memory growth.
+profile_allocations = False
+allocation_profile_file = 'allocations.txt'
+
+# Default folder, relative to the add-in, for exported finger bases.
+export_folder = 'exports'
 
 
 # Add tabs and panels to the UI using the following constants
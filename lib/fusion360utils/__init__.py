@@ -1,2 +1,9 @@
 from .general_utils import *
 from .event_utils import *
+from .proxy_utils import *
+from .job_utils import *
+from .worker_utils import *
+from .palette_utils import *
+from .geometry_utils import *
+from .profile_utils import *
+from .perf_utils import *
@@ -10,22 +10,56 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import sys
+import weakref
 from typing import Callable
 
 import adsk.core
-from .general_utils import handle_error
+from .general_utils import log, handle_error
+from .proxy_utils import flush_cache
+from .profile_utils import _before_dispatch, _after_dispatch
+from .perf_utils import _before_dispatch_sample, _after_dispatch_sample
 
 
 # Global Variable to hold Event Handlers
 _handlers = []
 
+# One Handler subclass per Fusion handler type, shared by every subscription.
+_handler_classes = {}
+
+# Routing table from id(handler) to the callback it dispatches to.
+_routes = {}
+
+# Log a warning each time the number of live handlers passes a multiple of this.
+LEAK_WARNING_STEP = 200
+_leak_warning_at = LEAK_WARNING_STEP
+
+
+class _Route:
+    __slots__ = ('callback', 'name', 'event', 'handler_type', 'handler_ref', 'owner')
+
+    def __init__(self, handler, callback, name, event, handler_type, owner=None):
+        self.callback = callback
+        self.name = name
+        self.event = event
+        self.handler_type = handler_type
+        self.owner = owner
+        try:
+            self.handler_ref = weakref.ref(handler)
+        except TypeError:
+            self.handler_ref = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self.handler_ref is None or self.handler_ref() is not None
+
 
 def add_handler(
         event: adsk.core.Event,
         callback: Callable,
         *,
         name: str = None,
-        local_handlers: list = None
+        local_handlers: list = None,
+        owner: str = None
 ):
     """Adds an event handler to the specified event.
 
@@ -41,23 +75,75 @@ def add_handler(
                       specified the handler is added to a global list and can
                       be cleared using the clear_handlers function. You may want
                       to maintain your own handler list so it can be managed 
-                      independently for each command.
+                      independently for each command. Pass the same list to
+                      clear_handlers when the command or palette goes away.
+    owner -- The command the callback works for, in allocation profiles. By default
+             the command is taken from the callback's module, which is wrong for
+             handlers the utilities register on a command's behalf. An empty
+             string leaves the callback out; it attributes its own work. This
+             argument must be specified by its keyword.
 
     :returns:
         The event handler that was created.  You don't often need this reference, but it can be useful in some cases.
     """   
     module = sys.modules[event.__module__]
     handler_type = module.__dict__[event.add.__annotations__['handler']]
-    handler = _create_handler(handler_type, callback, event, name, local_handlers)
+    handler = _create_handler(handler_type, callback, event, name, local_handlers, owner)
     event.add(handler)
     return handler
 
 
-def clear_handlers():
-    """Clears the global list of handlers.
+def remove_handler(handler, local_handlers: list = None):
+    """Disconnects a handler from its event and drops its route.
+
+    Arguments:
+    handler -- A handler returned by add_handler.
+    local_handlers -- The list the handler was added to, if it was not the global list.
+    """
+    route = _routes.pop(id(handler), None)
+    if route is not None:
+        try:
+            route.event.remove(handler)
+        except:
+            # The event's owner (a destroyed command, a deleted palette) may already be gone.
+            pass
+
+    handlers = local_handlers if local_handlers is not None else _handlers
+    if handler in handlers:
+        handlers.remove(handler)
+
+
+def clear_handlers(local_handlers: list = None):
+    """Disconnects and releases handlers.
+
+    Arguments:
+    local_handlers -- A list of handlers passed to add_handler. If not specified the
+                      global list of handlers is cleared.
+    """
+    handlers = local_handlers if local_handlers is not None else _handlers
+    for handler in list(handlers):
+        remove_handler(handler, handlers)
+    handlers.clear()
+    _prune_routes()
+
+
+def handler_counts() -> dict:
+    """Returns the number of live handlers for each handler type.
+
+    Handlers that were released without going through clear_handlers or
+    remove_handler are pruned first, so a count that keeps growing points at
+    handlers that are still referenced somewhere.
     """
-    global _handlers
-    _handlers = []
+    _prune_routes()
+    counts = {}
+    for route in _routes.values():
+        counts[route.handler_type.__name__] = counts.get(route.handler_type.__name__, 0) + 1
+    return counts
+
+
+def _prune_routes():
+    for key in [key for key, route in _routes.items() if not route.is_alive]:
+        del _routes[key]
 
 
 def _create_handler(
@@ -65,24 +151,51 @@ def _create_handler(
         callback: Callable,
         event: adsk.core.Event,
         name: str = None,
-        local_handlers: list = None
+        local_handlers: list = None,
+        owner: str = None
 ):
-    handler = _define_handler(handler_type, callback, name)()
+    global _leak_warning_at
+    handler = _define_handler(handler_type)()
+    _routes[id(handler)] = _Route(handler, callback, name or handler_type.__name__, event, handler_type, owner)
     (local_handlers if local_handlers is not None else _handlers).append(handler)
+
+    if len(_routes) >= _leak_warning_at:
+        _prune_routes()
+        if len(_routes) >= _leak_warning_at:
+            log(f'{len(_routes)} event handlers are alive: {handler_counts()}', adsk.core.LogLevels.WarningLogLevel)
+            _leak_warning_at += LEAK_WARNING_STEP
     return handler
 
 
-def _define_handler(handler_type, callback, name: str = None):
-    name = name or handler_type.__name__
+def _define_handler(handler_type):
+    handler_class = _handler_classes.get(handler_type)
+    if handler_class is not None:
+        return handler_class
 
     class Handler(handler_type):
         def __init__(self):
             super().__init__()
 
         def notify(self, args):
-            try:
-                callback(args)
-            except:
-                handle_error(name)
+            _dispatch(self, args)
 
+    _handler_classes[handler_type] = Handler
     return Handler
+
+
+def _dispatch(handler, args):
+    route = _routes.get(id(handler))
+    if route is None:
+        # Removed while an event for it was already queued.
+        return
+    allocations = _before_dispatch() if route.owner != '' else None
+    sample = _before_dispatch_sample(route.callback)
+    try:
+        route.callback(args)
+    except:
+        handle_error(route.name)
+    finally:
+        # Values read through cached() proxies only live for one callback.
+        flush_cache()
+        _after_dispatch_sample(sample)
+        _after_dispatch(route.callback, allocations, route.owner)
@@ -23,6 +23,9 @@ try:
 except:
     DEBUG = False
 
+# Messages and characters logged since the add-in started.
+_log_stats = {'messages': 0, 'characters': 0}
+
 
 def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
     """Utility function to easily handle logging in your app.
@@ -32,6 +35,9 @@ def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLe
     level -- The logging severity level.
     force_console -- Forces the message to be written to the Text Command window. 
     """    
+    _log_stats['messages'] += 1
+    _log_stats['characters'] += len(message)
+
     # Always print to console, only seen through IDE.
     print(message)  
 
@@ -46,6 +52,11 @@ def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLe
         app.log(message, level, log_type)
 
 
+def log_stats() -> dict:
+    """Returns the number of messages and characters logged since the add-in started."""
+    return dict(_log_stats)
+
+
 def handle_error(name: str, show_message_box: bool = False):
     """Utility function to simplify error handling.
 
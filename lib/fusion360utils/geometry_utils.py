@@ -0,0 +1,53 @@
+import hashlib
+
+import adsk.fusion
+
+# Values are rounded to this many decimals (of centimetres) before hashing so
+# that recomputing the same geometry gives the same fingerprint.
+FINGERPRINT_DIGITS = 6
+
+
+def body_fingerprint(body: adsk.fusion.BRepBody, digits: int = FINGERPRINT_DIGITS, face_areas: bool = True) -> str:
+    """Hashes the shape of a body: face count, face areas, bounding box and volume.
+
+    The name and the entity token are left out on purpose, so a body that is
+    deleted and regenerated with the same geometry keeps its fingerprint,
+    while any change to the shape or position changes it.
+
+    Arguments:
+    body -- A BRepBody or a cached() proxy of one.
+    digits -- Decimals kept before hashing.
+    face_areas -- Include every face's area. Without them the fingerprint costs a
+                  few reads instead of one per face, but a change that keeps the
+                  face count, volume and bounding box goes unnoticed.
+
+    :returns:
+        A hex digest.
+    """
+    box = body.boundingBox
+    values = [body.faces.count, round(body.volume, digits)]
+    values += [round(v, digits) for v in box.minPoint.asArray() + box.maxPoint.asArray()]
+    if face_areas:
+        values += sorted(round(face.area, digits) for face in body.faces)
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+def entity_fingerprint(entity, digits: int = FINGERPRINT_DIGITS, body_print: str = None) -> str:
+    """Hashes a face or construction plane used as a measurement reference.
+
+    Faces are identified by their body's fingerprint plus area and centroid,
+    construction planes by name and plane geometry.
+
+    Arguments:
+    entity -- A BRepFace or ConstructionPlane, or a cached() proxy of one.
+    digits -- Decimals kept before hashing.
+    body_print -- The body_fingerprint of a face's body, when the caller already
+                  has it. Fingerprinting a body reads every one of its faces.
+    """
+    if entity.objectType == adsk.fusion.BRepFace.classType():
+        values = [body_print or body_fingerprint(entity.body, digits), round(entity.area, digits)]
+        values += [round(v, digits) for v in entity.centroid.asArray()]
+    else:
+        plane = entity.geometry
+        values = [entity.name] + [round(v, digits) for v in plane.origin.asArray() + plane.normal.asArray()]
+    return hashlib.sha1(repr(values).encode()).hexdigest()
@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import threading
+from typing import Callable
+
+import adsk.core
+from .general_utils import app, ui, log, handle_error
+from .event_utils import add_handler, clear_handlers
+from .perf_utils import _sample_start, _job_sample_end, _command_of
+from .profile_utils import _labels
+
+
+# Jobs that are currently running, by name.
+_jobs = {}
+
+
+class Job:
+    """A list of steps advanced a few at a time from a custom event.
+
+    Each tick runs steps until time_budget seconds have passed (always at
+    least one), updates the progress dialog and then fires the job's custom
+    event again so Fusion can process the UI before the next tick. Every step
+    should leave the design in a usable state on its own; cancelling stops
+    between steps, never inside one.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            steps: list,
+            *,
+            title: str = None,
+            on_complete: Callable = None,
+            on_cancel: Callable = None,
+            time_budget: float = 0.1
+    ):
+        self.name = name
+        self.steps = list(steps)
+        self.title = title or name
+        self.on_complete = on_complete
+        self.on_cancel = on_cancel
+        self.time_budget = time_budget
+        self.event_id = f'{name}_job_tick'
+        self.done = 0
+        self.started = 0.0
+        # (label, seconds) of every step that ran.
+        self.timings = []
+        self.finished = False
+        self.cancelled = False
+        self._handlers = []
+        self._event = None
+        self._dialog = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Completed steps per second."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def start(self):
+        self._event = app.registerCustomEvent(self.event_id)
+        add_handler(self._event, self._tick, name=self.event_id, local_handlers=self._handlers, owner=_command_of(self.name))
+
+        self._dialog = ui.createProgressDialog()
+        self._dialog.isCancelButtonShown = True
+        self._dialog.cancelButtonText = 'Cancel'
+        self._dialog.show(self.title, 'Starting', 0, max(len(self.steps), 1), 0)
+
+        self.started = time.perf_counter()
+        app.fireCustomEvent(self.event_id)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _tick(self, args: adsk.core.CustomEventArgs):
+        if self.finished:
+            return
+
+        if self._dialog.wasCancelled:
+            self.cancelled = True
+
+        tick_started = time.perf_counter()
+        while not self.cancelled and self.done < len(self.steps):
+            label, step = self.steps[self.done]
+            step_started = time.perf_counter()
+            sample = _sample_start()
+            try:
+                step()
+            except:
+                handle_error(f'{self.name}: {label}')
+                self.cancelled = True
+                break
+            self.timings.append((label, time.perf_counter() - step_started))
+            _job_sample_end(self.name, label, sample)
+            self.done += 1
+            if time.perf_counter() - tick_started >= self.time_budget:
+                break
+
+        if self.cancelled or self.done >= len(self.steps):
+            self._finish()
+            return
+
+        self._dialog.progressValue = self.done
+        self._dialog.message = f'{self.steps[self.done][0]}  ({self.throughput:.1f} steps/s)'
+        app.fireCustomEvent(self.event_id)
+
+    def _finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self._dialog.hide()
+        clear_handlers(self._handlers)
+        app.unregisterCustomEvent(self.event_id)
+        _jobs.pop(self.name, None)
+
+        state = 'cancelled' if self.cancelled else 'completed'
+        log(f'{self.name}: {state} {self.done} of {len(self.steps)} steps in '
+            f'{self.elapsed:.2f}s ({self.throughput:.1f} steps/s)')
+
+        callback = self.on_cancel if self.cancelled else self.on_complete
+        if callback:
+            callback(self)
+
+
+class Throttle:
+    """Coalesces bursts of triggers into at most one callback per interval.
+
+    The callback runs on the main thread from a custom event, interval seconds
+    after the previous run at the earliest. Triggers that arrive while a run is
+    already scheduled are folded into it.
+    """
+
+    def __init__(self, name: str, interval: float, callback: Callable):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.event_id = f'{name}_throttle'
+        self._last = 0.0
+        self._timer = None
+        self._event = None
+        self._handlers = []
+
+    def trigger(self):
+        if self._timer is not None:
+            return
+        if self._event is None:
+            self._event = app.registerCustomEvent(self.event_id)
+            add_handler(self._event, self._fire, name=self.name, local_handlers=self._handlers, owner=_labels(self.callback)[0])
+
+        delay = max(0.0, self._last + self.interval - time.perf_counter())
+        # fireCustomEvent is safe to call from the timer thread.
+        self._timer = threading.Timer(delay, app.fireCustomEvent, (self.event_id,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        clear_handlers(self._handlers)
+        if self._event is not None:
+            app.unregisterCustomEvent(self.event_id)
+            self._event = None
+
+    def _fire(self, args: adsk.core.CustomEventArgs):
+        self._timer = None
+        self._last = time.perf_counter()
+        self.callback()
+
+
+class Journal:
+    """Records the completed steps of a job in a JSON file next to its input.
+
+    Wrap each step with record(); after it returns, its label and a snapshot
+    of any state the later steps need are written out. When a run is
+    interrupted the file stays behind, and the next run with the same
+    signature can skip the labels in done. Labels must be unique within a run.
+    """
+
+    def __init__(self, path: str, signature: str, snapshot: Callable = None):
+        """
+        Arguments:
+        path -- The journal file.
+        signature -- Identifies the run's inputs; a journal with another signature is discarded.
+        snapshot -- Returns a JSON-serializable dict saved with every completed step.
+        """
+        self.path = path
+        self.signature = signature
+        self.snapshot = snapshot
+        self.done = []
+
+    def resume(self, keep: bool = False):
+        """Loads a journal left by an interrupted run with the same signature.
+
+        Arguments:
+        keep -- Leave a journal with another signature in place, for callers
+                such as dry runs that must not change anything.
+
+        :returns:
+            The last saved snapshot, or None when there is nothing to resume.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('signature') != self.signature:
+            if not keep:
+                log(f'{os.path.basename(self.path)}: inputs changed since the interrupted run, starting over')
+                self.discard()
+            return None
+        self.done = saved.get('done', [])
+        return saved.get('state', {})
+
+    def record(self, label: str, step: Callable) -> Callable:
+        def run():
+            step()
+            self.mark(label)
+        return run
+
+    def mark(self, label: str):
+        """Records a step as completed. Use this instead of record() for steps that
+        finish later, such as work handed to a worker, from their completion callback."""
+        self.done.append(label)
+        self._save()
+
+    def discard(self):
+        self.done = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _save(self):
+        state = self.snapshot() if self.snapshot else {}
+        # Write a new file and swap it in so a crash never leaves half a journal.
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({'signature': self.signature, 'done': self.done, 'state': state}, f)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def defer(name: str, callback: Callable):
+    """Runs callback once on the main thread the next time Fusion is idle.
+
+    Arguments:
+    name -- A unique name used for the custom event and in logging errors.
+    callback -- A function taking no arguments.
+    """
+    event_id = f'{name}_deferred'
+    handlers = []
+
+    def fire(args: adsk.core.CustomEventArgs):
+        clear_handlers(handlers)
+        app.unregisterCustomEvent(event_id)
+        callback()
+
+    add_handler(app.registerCustomEvent(event_id), fire, name=name, local_handlers=handlers, owner=_labels(callback)[0])
+    app.fireCustomEvent(event_id)
+
+
+def run_job(name: str, steps: list, **kwargs) -> Job:
+    """Runs steps in the background of the UI with a cancellable progress dialog.
+
+    Arguments:
+    name -- A unique name for the job. Only one job with a given name can run at a time.
+    steps -- A list of (label, callable) tuples. Each callable takes no arguments and
+             should leave the design consistent when it returns.
+    kwargs -- Passed on to Job: title, on_complete, on_cancel and time_budget.
+
+    :returns:
+        The started Job, or None if a job with the same name is already running.
+    """
+    if name in _jobs:
+        log(f'{name}: a job with this name is already running')
+        return None
+    job = Job(name, steps, **kwargs)
+    _jobs[name] = job
+    job.start()
+    return job
+
+
+def cancel_jobs():
+    """Stops every running job after its current step. Call this when the add-in stops."""
+    for job in list(_jobs.values()):
+        job.cancel()
+        job._finish()
@@ -0,0 +1,202 @@
+import os
+import re
+import sys
+import json
+import array
+import base64
+from collections import OrderedDict
+from typing import Callable
+
+import adsk.core
+from .general_utils import app, ui, log, handle_error
+from .event_utils import add_handler, clear_handlers
+
+
+# The single HTML action name used for every batch in both directions.
+BUS_ACTION = 'bus'
+
+# Typed array tags understood by bus.js, by array module type code.
+_ARRAY_TAGS = {'f': '$f32', 'd': '$f64', 'I': '$u32', 'i': '$i32', 'B': '$u8'}
+
+_buses = {}
+
+_SCRIPT_TAG = re.compile(r'<script src="([^"]+)"></script>')
+_STYLE_TAG = re.compile(r'<link rel="stylesheet" href="([^"]+)"\s*/?>')
+
+
+def palette_bus(palette_id: str) -> 'PaletteBus':
+    """Returns the message bus for a palette, creating it on first use.
+
+    Arguments:
+    palette_id -- The id of the palette the bus talks to.
+    """
+    bus = _buses.get(palette_id)
+    if bus is None:
+        bus = _buses[palette_id] = PaletteBus(palette_id)
+    return bus
+
+
+def pack_array(values, typecode: str = 'f') -> dict:
+    """Packs numbers into a compact base64 payload that bus.js turns into a typed array.
+
+    Arguments:
+    values -- An iterable of numbers, or an array.array.
+    typecode -- 'f' (Float32Array), 'd' (Float64Array), 'I' (Uint32Array),
+                'i' (Int32Array) or 'B' (Uint8Array).
+    """
+    packed = values if isinstance(values, array.array) and values.typecode == typecode else array.array(typecode, values)
+    if sys.byteorder == 'big':
+        packed = array.array(typecode, packed)
+        packed.byteswap()
+    return {_ARRAY_TAGS[typecode]: base64.b64encode(packed.tobytes()).decode('ascii')}
+
+
+def bundle_html(html_path: str, bundle_path: str) -> str:
+    """Inlines a page's local scripts and stylesheets into one file.
+
+    The embedded browser then loads a single file instead of one request per
+    asset. The page and its stylesheets are minified; scripts are inlined as
+    they are, since their strings and template literals may span lines. The bundle is only rebuilt when the page or one of its assets is
+    newer than it.
+
+    Arguments:
+    html_path -- The page to bundle.
+    bundle_path -- Where to write the bundle.
+
+    :returns:
+        bundle_path
+    """
+    folder = os.path.dirname(html_path)
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    assets = [os.path.join(folder, src) for src in _SCRIPT_TAG.findall(html) + _STYLE_TAG.findall(html)]
+
+    if os.path.exists(bundle_path):
+        built = os.path.getmtime(bundle_path)
+        # This file counts as an input too, so bundles follow changes to how they are built.
+        if all(os.path.getmtime(path) <= built for path in [html_path, __file__] + assets):
+            return bundle_path
+
+    def inline(tag: str, minify: bool):
+        def replace(match):
+            with open(os.path.join(folder, match.group(1)), 'r', encoding='utf-8') as f:
+                text = f.read()
+            return f'<{tag}>{_minify(text) if minify else text}</{tag}>'
+        return replace
+
+    # The page is minified before the scripts go in, so they are left untouched.
+    html = _STYLE_TAG.sub(inline('style', True), _minify(html))
+    html = _SCRIPT_TAG.sub(inline('script', False), html)
+    with open(bundle_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return bundle_path
+
+
+def _minify(text: str) -> str:
+    # For HTML and CSS only: drops indentation and blank lines.
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+class PaletteBus:
+    """Batched, correlated messages between Python and a palette's bus.js.
+
+    Incoming batches carry several actions per fusionSendData call and are
+    answered with one reply holding a result for every request id. Outgoing
+    messages posted during an event are queued and sent together with a
+    single sendInfoToHTML once Fusion is idle; a message posted with a key
+    replaces any queued message with the same key, so only the latest of a
+    stream of updates crosses the bridge.
+    """
+
+    def __init__(self, palette_id: str):
+        self.palette_id = palette_id
+        self.flush_event_id = f'{palette_id}_bus_flush'
+        self._actions = {}
+        self._pending = OrderedDict()
+        self._sequence = 0
+        self._flush_event = None
+        self._flush_scheduled = False
+        self._handlers = []
+
+    def on(self, action: str, callback: Callable = None):
+        """Registers callback(data) to answer requests for action.
+
+        The return value of the callback is sent back as the reply. Can also be
+        used as a decorator.
+        """
+        if callback is None:
+            return lambda fn: self.on(action, fn)
+        self._actions[action] = callback
+        return callback
+
+    def handle(self, html_args: adsk.core.HTMLEventArgs):
+        """Answers a batch sent by bus.js. Call this from the palette's incomingFromHTML handler."""
+        batch = json.loads(html_args.data)
+        replies = []
+        for message in batch.get('messages', []):
+            replies.append(self._answer(message))
+        html_args.returnData = json.dumps({'id': batch.get('id'), 'replies': replies}, separators=(',', ':'))
+        self.flush()
+
+    def post(self, action: str, data=None, *, key: str = None):
+        """Queues a message for the palette.
+
+        Arguments:
+        action -- The action name registered with fusionBus.on in the palette.
+        data -- Any JSON serializable value. Use pack_array for bulk numbers.
+        key -- Messages with the same key supersede each other while queued.
+        """
+        if key is None:
+            self._sequence += 1
+            key = self._sequence
+        else:
+            self._pending.pop(key, None)
+        self._pending[key] = {'action': action, 'data': data}
+        self._schedule_flush()
+
+    def flush(self) -> bool:
+        """Sends every queued message in one crossing. Returns False if the palette does not exist."""
+        self._flush_scheduled = False
+        if not self._pending:
+            return True
+
+        palette = ui.palettes.itemById(self.palette_id)
+        messages = list(self._pending.values())
+        self._pending.clear()
+        if palette is None:
+            log(f'{self.palette_id}: dropped {len(messages)} messages, the palette does not exist')
+            return False
+
+        palette.sendInfoToHTML(BUS_ACTION, json.dumps({'messages': messages}, separators=(',', ':')))
+        return True
+
+    def close(self):
+        """Releases the flush event. Call this when the palette is deleted."""
+        self._pending.clear()
+        clear_handlers(self._handlers)
+        if self._flush_event is not None:
+            app.unregisterCustomEvent(self.flush_event_id)
+            self._flush_event = None
+        _buses.pop(self.palette_id, None)
+
+    def _answer(self, message: dict) -> dict:
+        action = message.get('action')
+        callback = self._actions.get(action)
+        if callback is None:
+            return {'id': message.get('id'), 'ok': False, 'error': f'Unexpected action: {action}'}
+        try:
+            return {'id': message.get('id'), 'ok': True, 'data': callback(message.get('data'))}
+        except Exception as e:
+            handle_error(f'{self.palette_id}: {action}')
+            return {'id': message.get('id'), 'ok': False, 'error': str(e)}
+
+    def _schedule_flush(self):
+        if self._flush_scheduled:
+            return
+        if self._flush_event is None:
+            self._flush_event = app.registerCustomEvent(self.flush_event_id)
+            add_handler(self._flush_event, lambda args: self.flush(), name=self.flush_event_id,
+                        local_handlers=self._handlers)
+        self._flush_scheduled = True
+        app.fireCustomEvent(self.flush_event_id)
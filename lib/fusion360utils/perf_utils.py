@@ -0,0 +1,239 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import os
+import sys
+import time
+import sqlite3
+import statistics
+from collections import deque
+from typing import Callable
+
+from .general_utils import log_stats
+from .proxy_utils import cache_stats
+from .profile_utils import _labels
+
+# Attempt to read the add-in name from parent config to shorten job names.
+try:
+    from ... import config
+    _JOB_PREFIX = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_'
+except:
+    _JOB_PREFIX = ''
+
+# Samples kept in memory per command and stage for the live figures.
+RECENT_SAMPLES = 50
+
+# Samples are written to the store in batches of this many.
+COMMIT_EVERY = 20
+
+# What process_memory() measures on this platform, for labelling it.
+MEMORY_KIND = 'working set' if sys.platform == 'win32' else 'peak'
+
+_recorder = None
+
+
+class PerfRecorder:
+    """Timings of command handlers and job steps, kept in SQLite across sessions.
+
+    A sample is one handler call or job step: its latency, the Fusion API reads
+    made through cached() proxies, the messages logged and the process memory
+    afterwards. Stages are the handler (execute, preview, input_changed, ...)
+    or the first word of a job step's label, with the full label kept as the
+    sample's detail.
+    """
+
+    def __init__(self, path: str, max_age_days: float = None, max_bytes: int = None):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.ignore = set()
+        self.recent = {}
+        self.listeners = []
+        self._pending = []
+        self._db = None
+
+    def record(self, command: str, stage: str, seconds: float, api_reads: int = 0, log_messages: int = 0,
+               memory: int = 0, detail: str = ''):
+        sample = (time.time(), command, stage, detail, seconds, api_reads, log_messages, memory)
+        self.recent.setdefault((command, stage), deque(maxlen=RECENT_SAMPLES)).append(sample)
+        self._pending.append(sample)
+        if len(self._pending) >= COMMIT_EVERY:
+            self.flush()
+        for listener in self.listeners:
+            listener(command, stage)
+
+    def summary(self) -> list:
+        """Last and median latency per command and stage, from this session's samples."""
+        rows = []
+        for (command, stage), samples in sorted(self.recent.items()):
+            last = samples[-1]
+            rows.append({
+                'command': command,
+                'stage': stage,
+                'calls': len(samples),
+                'last': last[4],
+                'median': statistics.median(sample[4] for sample in samples),
+                'apiReads': last[5],
+                'logMessages': last[6],
+                'memory': last[7],
+            })
+        return rows
+
+    def history(self, command: str, days: int = 30) -> list:
+        """Daily latency per stage of a command over the last days, oldest first."""
+        self.flush()
+        query = ('SELECT date(at, \'unixepoch\', \'localtime\') AS day, stage, COUNT(*), AVG(seconds), MAX(seconds), '
+                 'AVG(api_reads), MAX(memory) FROM samples WHERE command = ? AND at >= ? GROUP BY day, stage ORDER BY day, stage')
+        return [{'day': day, 'stage': stage, 'calls': calls, 'mean': mean, 'max': longest, 'apiReads': reads, 'memory': memory}
+                for day, stage, calls, mean, longest, reads, memory
+                in self._connection().execute(query, (command, time.time() - days * 86400))]
+
+    def prune(self):
+        """Drops samples older than max_age_days, then the oldest samples while the
+        file is larger than max_bytes, and compacts the file if anything went."""
+        db = self._connection()
+        removed = 0
+        if self.max_age_days:
+            removed += self._delete('DELETE FROM samples WHERE at < ?', time.time() - self.max_age_days * 86400)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if self.max_bytes and size > self.max_bytes:
+            count = db.execute('SELECT COUNT(*) FROM samples').fetchone()[0]
+            # Rows are about the same size, so keep the newest share that fits with some headroom.
+            keep = int(count * self.max_bytes * 0.9 / size)
+            removed += self._delete('DELETE FROM samples WHERE rowid IN (SELECT rowid FROM samples ORDER BY at LIMIT ?)',
+                                    count - keep)
+        return removed
+
+    def _delete(self, query: str, value) -> int:
+        # Compacts right away so the file size reflects what is left.
+        db = self._connection()
+        removed = db.execute(query, (value,)).rowcount
+        db.commit()
+        if removed:
+            db.execute('VACUUM')
+        return removed
+
+    def flush(self):
+        if not self._pending:
+            return
+        db = self._connection()
+        db.executemany('INSERT INTO samples (at, command, stage, detail, seconds, api_reads, log_messages, memory) '
+                       'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self._pending)
+        db.commit()
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute('CREATE TABLE IF NOT EXISTS samples (at REAL NOT NULL, command TEXT NOT NULL, '
+                             'stage TEXT NOT NULL, detail TEXT, seconds REAL NOT NULL, api_reads INTEGER, '
+                             'log_messages INTEGER, memory INTEGER)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS samples_command ON samples (command, at)')
+        return self._db
+
+
+def start_perf_recorder(path: str, max_age_days: float = None, max_bytes: int = None) -> PerfRecorder:
+    """Starts recording command handler and job step timings to the SQLite file at path.
+
+    Arguments:
+    path -- The SQLite file, created if needed.
+    max_age_days -- Samples older than this are dropped now. Kept forever if None.
+    max_bytes -- The oldest samples are dropped now until the file is about this size.
+    """
+    global _recorder
+    if _recorder is None:
+        _recorder = PerfRecorder(path, max_age_days, max_bytes)
+        _recorder.prune()
+    return _recorder
+
+
+def stop_perf_recorder():
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
+
+
+def perf_recorder() -> PerfRecorder:
+    """Returns the running recorder, or None if recording is off."""
+    return _recorder
+
+
+def process_memory() -> int:
+    """Memory of the Fusion process in bytes, or 0 if it cannot be read.
+
+    The working set on Windows; elsewhere the peak resident size, which is all
+    the standard library offers and never goes down. MEMORY_KIND says which.
+    """
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class Counters(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + \
+                           [(name, ctypes.c_size_t) for name in (
+                               'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                               'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+            counters = Counters()
+            counters.cb = ctypes.sizeof(counters)
+            ctypes.windll.kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            ctypes.windll.psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD]
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return 0
+
+
+def _sample_start():
+    if _recorder is None:
+        return None
+    return time.perf_counter(), cache_stats()['misses'], log_stats()['messages']
+
+
+def _sample_end(command: str, stage: str, started, detail: str = ''):
+    if _recorder is None or started is None or command in _recorder.ignore:
+        return
+    at, reads, messages = started
+    _recorder.record(command, stage, time.perf_counter() - at, cache_stats()['misses'] - reads,
+                     log_stats()['messages'] - messages, process_memory(), detail)
+
+
+def _before_dispatch_sample(callback: Callable):
+    # Only handlers of commands are recorded, not the utilities' own events.
+    command, handler = _labels(callback)
+    return (command, handler, _sample_start()) if '.commands.' in f'.{getattr(callback, "__module__", "")}.' else None
+
+
+def _after_dispatch_sample(state):
+    if state is not None:
+        command, handler, started = state
+        _sample_end(command, handler[len('command_'):] if handler.startswith('command_') else handler, started)
+
+
+def _command_of(job_name: str) -> str:
+    # Jobs are named after their command's id; the add-in prefix is dropped.
+    return job_name[len(_JOB_PREFIX):] if _JOB_PREFIX and job_name.startswith(_JOB_PREFIX) else job_name
+
+
+def _job_sample_end(job_name: str, label: str, started):
+    _sample_end(_command_of(job_name), label.split(' ', 1)[0], started, label)
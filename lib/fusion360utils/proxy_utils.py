@@ -0,0 +1,190 @@
+# Method names that only read from the Fusion API and can safely be memoized
+# with their arguments. Any other method called through a proxy is treated as
+# mutating and flushes every cached read.
+READ_ONLY_METHODS = frozenset({
+    'item',
+    'itemById',
+    'itemByName',
+    'selection',
+    'asArray',
+    'distanceTo',
+    'angleTo',
+    'isEqualTo',
+    'isParallelTo',
+    'isPerpendicularTo',
+    'getNormalAtPoint',
+    'getParamAtPoint',
+    'getPointAtParam',
+})
+
+# Bumped by flush_cache(). Proxies compare against it lazily, so flushing is
+# O(1) no matter how many proxies are alive.
+_generation = 0
+
+_stats = {'hits': 0, 'misses': 0, 'flushes': 0}
+
+
+def cached(obj):
+    """Wraps a Fusion API object in a read-through memoizing proxy.
+
+    Property reads and read-only method calls made through the proxy are
+    answered from memory until the cache is flushed. Objects returned from the
+    proxy are wrapped as well, so face.centroid.asArray() is only fetched once.
+    The cache is flushed after every event handler returns, whenever a
+    mutating method is called or an attribute is set through a proxy, and
+    when flush_cache() is called directly.
+
+    Proxies are not Fusion objects; use unwrap() before passing one to an API
+    call made outside of a proxy or to isinstance()/cast() checks.
+
+    Read-only calls are memoized by their arguments: plain values as they are,
+    entities by entityToken and points and vectors by their coordinates. Calls
+    with any other argument go straight to Fusion every time.
+
+    Arguments:
+    obj -- The Fusion API object to wrap. Proxies are returned unchanged.
+    """
+    if isinstance(obj, CachedProxy) or not _is_api_object(obj):
+        return obj
+    return CachedProxy(obj)
+
+
+def unwrap(obj, read_only: bool = False):
+    """Returns the Fusion API object behind a proxy, or obj unchanged.
+
+    Changes made through the returned object cannot be seen by the proxies,
+    so unwrapping a proxy flushes the cache unless the caller promises to
+    only read through it.
+
+    Arguments:
+    obj -- A proxy or any other object.
+    read_only -- The object is only passed to reads, such as a measurement.
+    """
+    if isinstance(obj, CachedProxy):
+        if not read_only:
+            flush_cache()
+        return object.__getattribute__(obj, '_target')
+    return obj
+
+
+def flush_cache():
+    """Invalidates every value memoized by cached() proxies.
+
+    Call this after changing the design through objects that are not wrapped.
+    """
+    global _generation
+    _generation += 1
+    _stats['flushes'] += 1
+
+
+def cache_stats() -> dict:
+    """Returns the number of cache hits, misses and flushes since the add-in started."""
+    return dict(_stats)
+
+
+def _is_api_object(value) -> bool:
+    return type(value).__module__.startswith('adsk.')
+
+
+def _wrap(value):
+    if isinstance(value, tuple):
+        return tuple(_wrap(v) for v in value)
+    if isinstance(value, list):
+        return [_wrap(v) for v in value]
+    return cached(value)
+
+
+def _unwrap_all(args, kwargs):
+    return [unwrap(a, True) for a in args], {k: unwrap(v, True) for k, v in kwargs.items()}
+
+
+class _Unkeyable(Exception):
+    pass
+
+
+def _memo_key(value):
+    # reprs of API objects include their addresses, so they are never used as keys.
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)):
+        return tuple(_memo_key(v) for v in value)
+    if _is_api_object(value):
+        token = getattr(value, 'entityToken', None)
+        if isinstance(token, str) and token:
+            return 'entity', token
+        if hasattr(value, 'asArray'):
+            return type(value).__name__, tuple(value.asArray())
+    raise _Unkeyable()
+
+
+class CachedProxy:
+    __slots__ = ('_target', '_memo', '_generation')
+
+    def __init__(self, target):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_memo', {})
+        object.__setattr__(self, '_generation', _generation)
+
+    def _lookup(self, key, fetch):
+        memo = object.__getattribute__(self, '_memo')
+        if object.__getattribute__(self, '_generation') != _generation:
+            memo.clear()
+            object.__setattr__(self, '_generation', _generation)
+        if key in memo:
+            _stats['hits'] += 1
+            return memo[key]
+        _stats['misses'] += 1
+        value = fetch()
+        memo[key] = value
+        return value
+
+    def __getattr__(self, name):
+        target = object.__getattribute__(self, '_target')
+        value = self._lookup(name, lambda: _wrap(getattr(target, name)))
+        if not callable(value):
+            return value
+        if name in READ_ONLY_METHODS:
+            def read(*args, **kwargs):
+                args, kwargs = _unwrap_all(args, kwargs)
+                try:
+                    key = (name, _memo_key(args), tuple(sorted((k, _memo_key(v)) for k, v in kwargs.items())))
+                except _Unkeyable:
+                    _stats['misses'] += 1
+                    return _wrap(value(*args, **kwargs))
+                return self._lookup(key, lambda: _wrap(value(*args, **kwargs)))
+            return read
+
+        def mutate(*args, **kwargs):
+            args, kwargs = _unwrap_all(args, kwargs)
+            flush_cache()
+            return _wrap(value(*args, **kwargs))
+        return mutate
+
+    def __setattr__(self, name, value):
+        flush_cache()
+        setattr(object.__getattribute__(self, '_target'), name, unwrap(value, True))
+
+    def __iter__(self):
+        target = object.__getattribute__(self, '_target')
+        return iter(self._lookup('__iter__', lambda: [cached(item) for item in target]))
+
+    def __len__(self):
+        target = object.__getattribute__(self, '_target')
+        return self._lookup('__len__', lambda: len(target))
+
+    def __getitem__(self, index):
+        target = object.__getattribute__(self, '_target')
+        return self._lookup(('__getitem__', index), lambda: _wrap(target[index]))
+
+    def __bool__(self):
+        return bool(object.__getattribute__(self, '_target'))
+
+    def __eq__(self, other):
+        # Comparing is a read, so it must not flush the memo.
+        return object.__getattribute__(self, '_target') == unwrap(other, read_only=True)
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, '_target'))
+
+    def __repr__(self):
+        return f'cached({object.__getattribute__(self, "_target")!r})'
@@ -0,0 +1,158 @@
+import os
+import sys
+import queue
+import multiprocessing
+from concurrent import futures
+from typing import Callable
+
+import adsk.core
+from .general_utils import app, log, handle_error
+from .event_utils import add_handler, clear_handlers
+from .profile_utils import _before_dispatch, _after_dispatch
+
+# Attempt to read the add-in name from parent config for a unique event id.
+try:
+    from ... import config
+    RESULTS_EVENT_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_worker_results'
+except:
+    RESULTS_EVENT_ID = 'fusion360utils_worker_results'
+
+
+_thread_pool = None
+_process_pool = None
+_results_event = None
+_results_handlers = []
+
+# Finished futures waiting to be handed back to the main thread.
+_finished = queue.SimpleQueue()
+
+
+def submit(
+        fn: Callable,
+        *args,
+        on_done: Callable = None,
+        name: str = None,
+        use_processes: bool = False,
+        **kwargs
+) -> futures.Future:
+    """Runs a pure Python function on a worker and reports back on the main thread.
+
+    Only code that does not touch the Fusion API may run on a worker. When the
+    work finishes, on_done is called with the result from a custom event on
+    the main thread, where it is safe to use the API again. Exceptions raised
+    by fn or on_done are reported with handle_error.
+
+    Arguments:
+    fn -- The function to run. It must not call the Fusion API.
+    args -- Positional arguments for fn.
+    on_done -- Called on the main thread with the return value of fn. This argument
+               must be specified by its keyword.
+    name -- A name to use in logging errors. Defaults to the name of fn.
+    use_processes -- Run fn in a process pool instead of a thread pool. Use this for
+                     heavy numeric work that holds the GIL. Only functions from lib/handex
+                     can run in a process, since the rest of the add-in imports adsk; for
+                     any other function, or when Fusion's Python cannot be found, fn runs
+                     on a thread and the reason is logged.
+    kwargs -- Keyword arguments for fn.
+
+    :returns:
+        A concurrent.futures.Future. Calling cancel() on it before it starts skips
+        both fn and on_done.
+    """
+    _register_results_event()
+    name = name or getattr(fn, '__name__', 'worker')
+    if use_processes:
+        reason = _process_problem(fn)
+        if reason:
+            log(f'{name}: running on a thread instead of a process, {reason}')
+            use_processes = False
+    future = _executor(use_processes).submit(fn, *args, **kwargs)
+    future.add_done_callback(lambda f: _post(f, on_done, name))
+    return future
+
+
+def shutdown_workers():
+    """Cancels queued work and releases the pools. Call this when the add-in stops."""
+    global _thread_pool, _process_pool, _results_event
+    for pool in (_thread_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    _thread_pool = _process_pool = None
+
+    if _results_event is not None:
+        clear_handlers(_results_handlers)
+        app.unregisterCustomEvent(RESULTS_EVENT_ID)
+        _results_event = None
+
+
+def _python() -> str:
+    # Inside Fusion sys.executable is Fusion itself; spawned workers need the
+    # interpreter it bundles, which is only known by where it usually lives.
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    for candidate in ('python.exe', 'bin/python3', 'bin/python', 'Python'):
+        python = os.path.join(sys.exec_prefix, candidate)
+        if os.path.isfile(python):
+            return python
+    return None
+
+
+def _process_problem(fn: Callable) -> str:
+    # Returns why fn cannot run in a worker process, or None if it can.
+    parts = getattr(fn, '__module__', '').split('.')
+    if not any(a == 'lib' and b == 'handex' for a, b in zip(parts, parts[1:])):
+        return f'{getattr(fn, "__module__", fn)} is not in lib/handex and may import adsk'
+    if _process_pool is None and _python() is None:
+        return f'no Python interpreter was found in {sys.exec_prefix}'
+    return None
+
+
+def _executor(use_processes: bool) -> futures.Executor:
+    global _thread_pool, _process_pool
+    if use_processes:
+        if _process_pool is None:
+            context = multiprocessing.get_context('spawn')
+            context.set_executable(_python())
+            _process_pool = futures.ProcessPoolExecutor(mp_context=context)
+        return _process_pool
+
+    if _thread_pool is None:
+        _thread_pool = futures.ThreadPoolExecutor(thread_name_prefix='futil-worker')
+    return _thread_pool
+
+
+def _register_results_event():
+    global _results_event
+    if _results_event is None:
+        _results_event = app.registerCustomEvent(RESULTS_EVENT_ID)
+        # Results are profiled one by one, under the command each on_done belongs to.
+        add_handler(_results_event, _deliver_results, name=RESULTS_EVENT_ID, local_handlers=_results_handlers, owner='')
+
+
+def _post(future: futures.Future, on_done: Callable, name: str):
+    # Runs on the worker side; fireCustomEvent is safe to call from any thread.
+    _finished.put((future, on_done, name))
+    app.fireCustomEvent(RESULTS_EVENT_ID)
+
+
+def _deliver_results(args: adsk.core.CustomEventArgs):
+    while True:
+        try:
+            future, on_done, name = _finished.get_nowait()
+        except queue.Empty:
+            return
+
+        if future.cancelled():
+            log(f'{name}: cancelled')
+            continue
+
+        allocations = _before_dispatch() if on_done else None
+        try:
+            result = future.result()
+            if on_done:
+                on_done(result)
+        except:
+            handle_error(name)
+        finally:
+            if on_done:
+                _after_dispatch(on_done, allocations)
@@ -0,0 +1,3 @@
+# Pure Python parts of the Handex add-in: transform tables, finger matrices
+# and reports. Nothing in this package imports adsk, so it can be used from
+# the command line and in CI as well as from the commands.
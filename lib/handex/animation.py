@@ -0,0 +1,120 @@
+"""Keyframed finger poses interpolated into transform buffers.
+
+Each transform table is one keyframe. Fingers are matched by name; every
+finger's translation is interpolated linearly and its rotation with slerp,
+then the whole animation is turned into one (frames, fingers, 4, 4) array of
+the matrices create_finger_base would apply. Playing a frame is then just a
+lookup, with no maths left for the UI thread.
+"""
+
+import csv
+import json
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+from . import rotations
+from .transforms import PIVOT_OFFSET, mm, read_table
+
+
+@dataclass
+class Keyframes:
+    names: List[str]
+    times: np.ndarray         # (keys,)
+    translations: np.ndarray  # (keys, fingers, 3) in mm
+    quaternions: np.ndarray   # (keys, fingers, 4)
+
+
+def load_keyframes(paths: Sequence[str], times: Sequence[float] = None) -> Keyframes:
+    """Reads transform tables as keyframes.
+
+    Arguments:
+    paths -- Two or more fingerTransforms*.csv tables, in playback order.
+    times -- Time of each keyframe; evenly spaced from 0 to 1 if omitted.
+
+    :returns:
+        Keyframes for the fingers present in every table, in the order of the first.
+    """
+    if len(paths) < 2:
+        raise ValueError('an animation needs at least two keyframes')
+    tables = [{row.name: row for row in read_table(path)} for path in paths]
+    names = [name for name in tables[0] if all(name in table for table in tables)]
+    if not names:
+        raise ValueError('the tables have no fingers in common')
+
+    times = np.linspace(0.0, 1.0, len(paths)) if times is None else np.asarray(times, dtype=np.float64)
+    if len(times) != len(paths) or np.any(np.diff(times) <= 0):
+        raise ValueError('keyframe times must be increasing, one per table')
+
+    translations = np.array([[table[name].translation for name in names] for table in tables])
+    angles = np.array([[table[name].angles for name in names] for table in tables])
+    quaternions = rotations.euler_to_quaternion(angles.reshape(-1, 3)).reshape(len(paths), len(names), 4)
+    return Keyframes(names, times, translations, quaternions)
+
+
+def interpolate(keyframes: Keyframes, frames: int):
+    """Samples the keyframes at evenly spaced frames, first and last keyframe included.
+
+    :returns:
+        (translations (frames, fingers, 3) in mm, quaternions (frames, fingers, 4)).
+    """
+    t = np.linspace(keyframes.times[0], keyframes.times[-1], frames)
+    segment = np.clip(np.searchsorted(keyframes.times, t, side='right') - 1, 0, len(keyframes.times) - 2)
+    start, end = keyframes.times[segment], keyframes.times[segment + 1]
+    u = ((t - start) / (end - start))[:, None]
+
+    translations = (1 - u)[..., None] * keyframes.translations[segment] + u[..., None] * keyframes.translations[segment + 1]
+
+    fingers = len(keyframes.names)
+    q0 = keyframes.quaternions[segment].reshape(-1, 4)
+    q1 = keyframes.quaternions[segment + 1].reshape(-1, 4)
+    quaternions = rotations.slerp(q0, q1, np.repeat(u[:, 0], fingers)).reshape(frames, fingers, 4)
+    return translations, quaternions
+
+
+def frame_matrices(translations: np.ndarray, quaternions: np.ndarray, unit: str = 'cm') -> np.ndarray:
+    """Builds the row-major 4x4 finger matrices for every frame.
+
+    Uses the same composition as transforms.finger_matrix: the point x moves
+    to R (x - PIVOT_OFFSET) + t + PIVOT_OFFSET.
+    """
+    shape = translations.shape[:-1]
+    scale = mm(1.0) if unit == 'cm' else 1.0
+    offset = np.asarray(PIVOT_OFFSET) * scale
+    r = rotations.quaternion_to_matrix(quaternions.reshape(-1, 4)).reshape(shape + (3, 3))
+
+    matrices = np.zeros(shape + (4, 4))
+    matrices[..., :3, :3] = r
+    matrices[..., :3, 3] = translations * scale + offset - r @ offset
+    matrices[..., 3, 3] = 1.0
+    return matrices
+
+
+def animate(paths: Sequence[str], frames: int, times: Sequence[float] = None, unit: str = 'cm'):
+    """Loads the keyframe tables and returns (finger names, (frames, fingers, 4, 4) matrices)."""
+    keyframes = load_keyframes(paths, times)
+    return keyframes.names, frame_matrices(*interpolate(keyframes, frames), unit)
+
+
+def write_frames(path: str, names: List[str], matrices: np.ndarray):
+    """Exports the frame sequence.
+
+    .npz keeps the arrays, .json writes {names, frames} with column-major
+    matrices for WebGL, and anything else a CSV with one row per frame and
+    finger.
+    """
+    if path.endswith('.npz'):
+        np.savez_compressed(path, names=np.array(names), matrices=matrices)
+    elif path.endswith('.json'):
+        frames = np.swapaxes(matrices, -1, -2).reshape(len(matrices), len(names), 16)
+        with open(path, 'w') as f:
+            json.dump({'names': names, 'frames': frames.round(9).tolist()}, f)
+    else:
+        with open(path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile, lineterminator='\r\n')
+            writer.writerow(['frame', 'name'] + [f'm{i}{j}' for i in range(4) for j in range(4)])
+            for frame, per_finger in enumerate(matrices):
+                for name, matrix in zip(names, per_finger):
+                    writer.writerow([frame, name] + [f'{value:.9g}' for value in matrix.ravel()])
+    return path
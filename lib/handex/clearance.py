@@ -0,0 +1,261 @@
+"""Minimum distances between triangle meshes using bounding volume hierarchies.
+
+Every mesh gets an axis-aligned BVH over its triangles. All mesh pairs are
+then traversed together, one tree level at a time, as flat NumPy arrays of
+candidate node pairs: pairs whose boxes are further apart than the best
+distance already guaranteed for their mesh pair are dropped, the rest are
+split, and the surviving leaf pairs are resolved with exact, vectorized
+triangle-triangle distances.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+LEAF_SIZE = 8
+
+
+@dataclass
+class Bvh:
+    lower: np.ndarray      # (nodes, 3) box minimum
+    upper: np.ndarray      # (nodes, 3) box maximum
+    children: np.ndarray   # (nodes, 2) child node indices, -1 for leaves
+    start: np.ndarray      # (nodes,) first entry in order for leaves
+    count: np.ndarray      # (nodes,) number of triangles in leaves
+    order: np.ndarray      # triangle indices grouped by leaf
+
+
+@dataclass
+class Clearance:
+    a: str
+    b: str
+    distance: float
+
+    def below(self, gap: float) -> bool:
+        return self.distance < gap
+
+
+def build_bvh(triangles: np.ndarray, leaf_size: int = LEAF_SIZE) -> Bvh:
+    """Builds a BVH over triangles given as a (n, 3, 3) array of corner coordinates."""
+    tri_lower = triangles.min(axis=1)
+    tri_upper = triangles.max(axis=1)
+    centroids = triangles.mean(axis=1)
+
+    order = np.arange(len(triangles))
+    lower, upper, children, start, count = [], [], [], [], []
+    stack = [(0, len(triangles), -1, 0)]
+    while stack:
+        begin, end, parent, side = stack.pop()
+        node = len(lower)
+        if parent >= 0:
+            children[parent][side] = node
+        indices = order[begin:end]
+        lower.append(tri_lower[indices].min(axis=0))
+        upper.append(tri_upper[indices].max(axis=0))
+        children.append([-1, -1])
+        start.append(begin)
+        count.append(end - begin)
+
+        if end - begin <= leaf_size:
+            continue
+        # Median split along the longest axis of the centroid box.
+        spread = centroids[indices].max(axis=0) - centroids[indices].min(axis=0)
+        axis = int(np.argmax(spread))
+        middle = (end - begin) // 2
+        order[begin:end] = indices[np.argpartition(centroids[indices, axis], middle)]
+        count[node] = 0
+        stack.append((begin + middle, end, node, 1))
+        stack.append((begin, begin + middle, node, 0))
+
+    return Bvh(np.array(lower), np.array(upper), np.array(children, dtype=np.int64),
+               np.array(start, dtype=np.int64), np.array(count, dtype=np.int64), order)
+
+
+def min_distances(meshes: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> List[Clearance]:
+    """Computes the minimum distance between every pair of meshes in one pass.
+
+    Arguments:
+    meshes -- Maps a name to (vertices (n, 3), triangle indices (m, 3)).
+
+    :returns:
+        One Clearance per pair of meshes, closest first. Touching or
+        intersecting meshes have a distance of 0.
+    """
+    names = list(meshes)
+    triangles = [np.asarray(v, dtype=np.float64)[np.asarray(f, dtype=np.int64)] for v, f in meshes.values()]
+    trees = [build_bvh(t) for t in triangles]
+
+    # Concatenate every tree and triangle list so one frontier can hold all pairs.
+    node_offsets = np.cumsum([0] + [len(t.lower) for t in trees])
+    tri_offsets = np.cumsum([0] + [len(t) for t in triangles])
+    lower = np.concatenate([t.lower for t in trees])
+    upper = np.concatenate([t.upper for t in trees])
+    children = np.concatenate([np.where(t.children >= 0, t.children + o, -1) for t, o in zip(trees, node_offsets)])
+    start = np.concatenate([t.start + o for t, o in zip(trees, tri_offsets)])
+    count = np.concatenate([t.count for t in trees])
+    order = np.concatenate([t.order + o for t, o in zip(trees, tri_offsets)])
+    all_triangles = np.concatenate(triangles)
+    # A corner of some triangle inside each node; the distance between two of
+    # these is a cheap upper bound on the distance between the meshes.
+    anchor = all_triangles[order[start], 0]
+
+    pairs = [(i, j) for i in range(len(names)) for j in range(i + 1, len(names))]
+    pair_ids = np.arange(len(pairs))
+    node_a = node_offsets[[i for i, _ in pairs]]
+    node_b = node_offsets[[j for _, j in pairs]]
+    best = np.full(len(pairs), np.inf)
+
+    leaf_pairs = []
+    while len(pair_ids):
+        near = _box_distance(lower[node_a], upper[node_a], lower[node_b], upper[node_b])
+        np.minimum.at(best, pair_ids, np.linalg.norm(anchor[node_a] - anchor[node_b], axis=1))
+        keep = near <= best[pair_ids]
+        pair_ids, node_a, node_b = pair_ids[keep], node_a[keep], node_b[keep]
+
+        leaf_a = children[node_a, 0] < 0
+        leaf_b = children[node_b, 0] < 0
+        done = leaf_a & leaf_b
+        leaf_pairs.append((pair_ids[done], node_a[done], node_b[done]))
+
+        # Split the larger of the two boxes, or the one that is not a leaf.
+        size_a = np.linalg.norm(upper[node_a] - lower[node_a], axis=1)
+        size_b = np.linalg.norm(upper[node_b] - lower[node_b], axis=1)
+        split_a = ~done & ~leaf_a & (leaf_b | (size_a >= size_b))
+        split_b = ~done & ~split_a
+
+        pair_ids = np.concatenate([pair_ids[split_a]] * 2 + [pair_ids[split_b]] * 2)
+        node_a, node_b = (
+            np.concatenate([children[node_a[split_a], 0], children[node_a[split_a], 1], node_a[split_b], node_a[split_b]]),
+            np.concatenate([node_b[split_a], node_b[split_a], children[node_b[split_b], 0], children[node_b[split_b], 1]]),
+        )
+
+    pair_ids = np.concatenate([p for p, _, _ in leaf_pairs])
+    node_a = np.concatenate([a for _, a, _ in leaf_pairs])
+    node_b = np.concatenate([b for _, _, b in leaf_pairs])
+    keep = _box_distance(lower[node_a], upper[node_a], lower[node_b], upper[node_b]) <= best[pair_ids]
+    tri_pair, tri_a, tri_b = _expand_leaves(pair_ids[keep], node_a[keep], node_b[keep], start, count, order)
+
+    exact = np.full(len(pairs), np.inf)
+    for chunk in range(0, len(tri_pair), 65536):
+        s = slice(chunk, chunk + 65536)
+        p, a, b = tri_pair[s], all_triangles[tri_a[s]], all_triangles[tri_b[s]]
+        # Triangle boxes prune again before the exact test.
+        keep = _box_distance(a.min(axis=1), a.max(axis=1), b.min(axis=1), b.max(axis=1)) <= np.minimum(best, exact)[p]
+        np.minimum.at(exact, p[keep], triangle_distances(a[keep], b[keep]))
+
+    results = [Clearance(names[i], names[j], float(d)) for (i, j), d in zip(pairs, exact)]
+    return sorted(results, key=lambda c: c.distance)
+
+
+def triangle_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Minimum distances between matching triangles of two (n, 3, 3) arrays."""
+    edges_a = [(a[:, i], a[:, (i + 1) % 3]) for i in range(3)]
+    edges_b = [(b[:, i], b[:, (i + 1) % 3]) for i in range(3)]
+
+    candidates = []
+    for i in range(3):
+        candidates.append(_point_triangle(a[:, i], b))
+        candidates.append(_point_triangle(b[:, i], a))
+    for p0, p1 in edges_a:
+        for q0, q1 in edges_b:
+            candidates.append(_segment_segment(p0, p1, q0, q1))
+    distance = np.min(candidates, axis=0)
+
+    # Crossing triangles are only caught by an edge of one piercing the other.
+    crossing = np.zeros(len(a), dtype=bool)
+    for p0, p1 in edges_a:
+        crossing |= _segment_hits_triangle(p0, p1, b)
+    for q0, q1 in edges_b:
+        crossing |= _segment_hits_triangle(q0, q1, a)
+    distance[crossing] = 0.0
+    return distance
+
+
+def _expand_leaves(pair_ids, node_a, node_b, start, count, order):
+    # Every triangle of leaf a against every triangle of leaf b.
+    per_pair = count[node_a] * count[node_b]
+    repeat = np.repeat(np.arange(len(pair_ids)), per_pair)
+    local = np.arange(per_pair.sum()) - np.repeat(np.cumsum(per_pair) - per_pair, per_pair)
+    cb = count[node_b][repeat]
+    tri_a = order[start[node_a][repeat] + local // cb]
+    tri_b = order[start[node_b][repeat] + local % cb]
+    return pair_ids[repeat], tri_a, tri_b
+
+
+def _box_distance(lower_a, upper_a, lower_b, upper_b):
+    gap = np.maximum(0.0, np.maximum(lower_a - upper_b, lower_b - upper_a))
+    return np.linalg.norm(gap, axis=1)
+
+
+def _dot(u, v):
+    return np.einsum('ij,ij->i', u, v)
+
+
+def _point_triangle(p, tri):
+    # Closest point on a triangle by Voronoi regions (Ericson, Real-Time Collision Detection 5.1.5).
+    a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+    ab, ac, ap = b - a, c - a, p - a
+    d1, d2 = _dot(ab, ap), _dot(ac, ap)
+    bp = p - b
+    d3, d4 = _dot(ab, bp), _dot(ac, bp)
+    cp = p - c
+    d5, d6 = _dot(ab, cp), _dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = va + vb + vc
+        v = np.where(denom != 0, vb / denom, 0.0)
+        w = np.where(denom != 0, vc / denom, 0.0)
+        closest = a + ab * v[:, None] + ac * w[:, None]
+
+        t_ab = np.where(d1 - d3 != 0, d1 / (d1 - d3), 0.0)
+        edge_ab = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        closest = np.where(edge_ab[:, None], a + ab * t_ab[:, None], closest)
+
+        t_ac = np.where(d2 - d6 != 0, d2 / (d2 - d6), 0.0)
+        edge_ac = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        closest = np.where(edge_ac[:, None], a + ac * t_ac[:, None], closest)
+
+        t_bc = np.where((d4 - d3) + (d5 - d6) != 0, (d4 - d3) / ((d4 - d3) + (d5 - d6)), 0.0)
+        edge_bc = (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)
+        closest = np.where(edge_bc[:, None], b + (c - b) * t_bc[:, None], closest)
+
+    closest = np.where(((d1 <= 0) & (d2 <= 0))[:, None], a, closest)
+    closest = np.where(((d3 >= 0) & (d4 <= d3))[:, None], b, closest)
+    closest = np.where(((d6 >= 0) & (d5 <= d6))[:, None], c, closest)
+    return np.linalg.norm(p - closest, axis=1)
+
+
+def _segment_segment(p0, p1, q0, q1):
+    # Closest points of two segments (Ericson 5.1.9), clamped for degenerate segments.
+    d1, d2, r = p1 - p0, q1 - q0, p0 - q0
+    a, e, f = _dot(d1, d1), _dot(d2, d2), _dot(d2, r)
+    c, b = _dot(d1, r), _dot(d1, d2)
+    denom = a * e - b * b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(denom > 1e-12, np.clip((b * f - c * e) / denom, 0.0, 1.0), 0.0)
+        t = np.where(e > 1e-12, (b * s + f) / e, 0.0)
+        s = np.where(t < 0, np.where(a > 1e-12, np.clip(-c / a, 0.0, 1.0), 0.0), s)
+        s = np.where(t > 1, np.where(a > 1e-12, np.clip((b - c) / a, 0.0, 1.0), 0.0), s)
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm((p0 + d1 * s[:, None]) - (q0 + d2 * t[:, None]), axis=1)
+
+
+def _segment_hits_triangle(p0, p1, tri):
+    # Moller-Trumbore restricted to the segment.
+    direction = p1 - p0
+    e1, e2 = tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]
+    h = np.cross(direction, e2)
+    det = _dot(e1, h)
+    valid = np.abs(det) > 1e-12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = np.where(valid, 1.0 / det, 0.0)
+        s = p0 - tri[:, 0]
+        u = inv * _dot(s, h)
+        q = np.cross(s, e1)
+        v = inv * _dot(direction, q)
+        t = inv * _dot(e2, q)
+    return valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0) & (t <= 1)
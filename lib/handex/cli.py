@@ -0,0 +1,260 @@
+"""Command line tools for transform tables and reports.
+
+Run from the add-in folder:
+
+    python -m lib.handex compile commands/multiply_bases/fingerTransforms.csv
+    python -m lib.handex validate commands/multiply_bases/fingerTransforms*.csv
+    python -m lib.handex diff-report old.yaml new.yaml
+    python -m lib.handex normalize fingerTransforms.csv -o fingerTransforms.csv
+    python -m lib.handex tolerance commands/multiply_bases/parameters.csv --tip 0 0 60 --samples 1000000
+    python -m lib.handex check-rotations commands/multiply_bases/fingerTransforms*.csv
+    python -m lib.handex animate fingerTransforms_20131021.csv fingerTransforms.csv --frames 60 -o frames.json
+    python -m lib.handex fit-scan hand.ply -o fingerTransforms_scan.csv
+    python -m lib.handex mirror fingerTransforms.csv --plane yz -o fingerTransforms_mirrored.csv
+    python -m lib.handex reach fingerTransforms.csv commands/key_plates/keyLayouts.csv --model commands/key_plates/handModel.csv -o reach.json
+
+Only the standard library is imported here so the tools start quickly;
+commands that need NumPy import their module when they run.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+from . import transforms
+from . import reports
+from . import parameters
+
+
+def compile_command(args) -> int:
+    rows = transforms.read_table(args.table)
+    matrices = {row.name: transforms.finger_matrix(row, args.unit) for row in rows}
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(matrices, out, indent=2)
+            out.write('\n')
+        else:
+            writer = csv.writer(out, lineterminator='\n')
+            writer.writerow(['name'] + [f'm{i}{j}' for i in range(4) for j in range(4)])
+            for name, matrix in matrices.items():
+                writer.writerow([name] + [f'{value:.9g}' for row in matrix for value in row])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def validate_command(args) -> int:
+    failed = 0
+    for path in args.tables:
+        problems = transforms.validate_table(path)
+        for problem in problems:
+            print(f'{path}: {problem}')
+        failed += bool(problems)
+    return 1 if failed else 0
+
+
+def diff_report_command(args) -> int:
+    differences = reports.diff_reports(reports.read_report(args.before), reports.read_report(args.after), args.tolerance)
+    for difference in differences:
+        print(difference)
+    return 1 if differences else 0
+
+
+def normalize_command(args) -> int:
+    transforms.write_table(args.output or args.table, transforms.read_table(args.table))
+    return 0
+
+
+def tolerance_command(args) -> int:
+    from . import tolerance
+
+    values = parameters.read_values(args.parameters)
+    fingers = transforms.read_table(args.table) if args.table else tolerance.fingers_from_parameters(values)
+    report = tolerance.simulate(
+        fingers,
+        args.tip,
+        args.samples,
+        tolerance.Tolerances(args.sigma_translation, args.sigma_rotation),
+        workers=args.workers,
+        seed=args.seed,
+        allowance=values.get(args.gap_parameter),
+    )
+    print(tolerance.format_report(report))
+    return 0
+
+
+def check_rotations_command(args) -> int:
+    import numpy as np
+    from . import rotations
+
+    failed = 0
+    for path in args.tables:
+        rows = transforms.read_table(path)
+        if not rows:
+            continue
+        angles = np.array([row.angles for row in rows])
+        matrices = rotations.euler_to_matrix(angles)
+        checks = {
+            'create_finger_base': np.array([[r[:3] for r in transforms.finger_matrix(row)[:3]] for row in rows]),
+            'euler': rotations.euler_to_matrix(rotations.matrix_to_euler(matrices)),
+            'quaternion': rotations.quaternion_to_matrix(rotations.matrix_to_quaternion(matrices)),
+            'axis-angle': rotations.axis_angle_to_matrix(*rotations.matrix_to_axis_angle(matrices)),
+            'intrinsic': rotations.euler_to_matrix(angles[:, ::-1], 'ZYX'),
+        }
+        for check, result in checks.items():
+            error = np.abs(result - matrices).max(axis=(1, 2))
+            for row, e in zip(rows, error):
+                if e > args.tolerance:
+                    print(f'{path}: {row.name}: {check} differs by {e:.3g}')
+                    failed += 1
+    return 1 if failed else 0
+
+
+def animate_command(args) -> int:
+    from . import animation
+
+    names, matrices = animation.animate(args.tables, args.frames, args.times, args.unit)
+    animation.write_frames(args.output, names, matrices)
+    print(f'{args.output}: {len(matrices)} frames of {len(names)} fingers')
+    return 0
+
+
+def fit_scan_command(args) -> int:
+    from . import scan_fit
+
+    fingers = scan_fit.fit_scan(args.scan, args.voxel_size, args.scale, args.flip_normal, args.min_length)
+    for finger in fingers:
+        print(f'{finger.name}: {len(finger.members)} voxels, ICP residual {finger.rms:.3f} mm')
+    if not fingers:
+        print(f'{args.scan}: no fingers found')
+        return 1
+    transforms.write_table(args.output, [finger.transform() for finger in fingers])
+    return 0
+
+
+def mirror_command(args) -> int:
+    from . import mirror
+
+    plane = args.normal if args.normal else args.plane
+    rows = mirror.mirror_transforms(transforms.read_table(args.table), plane, args.offset, args.suffix)
+    if args.output:
+        transforms.write_table(args.output, rows)
+    else:
+        writer = csv.DictWriter(sys.stdout, fieldnames=('name',) + transforms.FIELDS, lineterminator='\n')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row.as_row())
+    return 0
+
+
+def reach_command(args) -> int:
+    from . import key_layout
+    from . import reach
+
+    results = reach.reach_layouts(
+        transforms.read_table(args.table),
+        key_layout.read_layouts(args.layouts),
+        reach.read_models(args.model),
+        args.samples,
+        args.cell,
+        args.key_height,
+        args.voxels,
+    )
+    print(reach.format_coverage(results))
+    if args.output:
+        reach.write_maps(args.output, results)
+    return 1 if any(result and result.reachable < len(result.keys) for _, _, result in results) else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m lib.handex', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('compile', help='emit the 4x4 matrix create_finger_base applies to each finger')
+    command.add_argument('table')
+    command.add_argument('--unit', choices=('cm', 'mm'), default='cm')
+    command.add_argument('--format', choices=('csv', 'json'), default='csv')
+    command.add_argument('-o', '--output')
+    command.set_defaults(run=compile_command)
+
+    command = commands.add_parser('validate', help='check transform tables, exit 1 on problems')
+    command.add_argument('tables', nargs='+')
+    command.set_defaults(run=validate_command)
+
+    command = commands.add_parser('diff-report', help='compare two multiply_bases reports, exit 1 on differences')
+    command.add_argument('before')
+    command.add_argument('after')
+    command.add_argument('--tolerance', type=float, default=1e-6)
+    command.set_defaults(run=diff_report_command)
+
+    command = commands.add_parser('normalize', help='rewrite a transform table in the canonical CSV format')
+    command.add_argument('table')
+    command.add_argument('-o', '--output')
+    command.set_defaults(run=normalize_command)
+
+    command = commands.add_parser('tolerance', help='Monte Carlo spread of finger placement under print tolerances')
+    command.add_argument('parameters', help='parameters.csv with the nominal values and GapWidth')
+    command.add_argument('--table', help='take the nominal fingers from a transform table instead')
+    command.add_argument('--samples', type=int, default=1000000)
+    command.add_argument('--sigma-translation', type=float, default=0.1, help='mm')
+    command.add_argument('--sigma-rotation', type=float, default=0.5, help='degrees')
+    command.add_argument('--tip', type=float, nargs=3, required=True, metavar=('X', 'Y', 'Z'),
+                         help='point on the base body to follow, in mm, such as the far end of the finger')
+    command.add_argument('--gap-parameter', default='GapWidth')
+    command.add_argument('--workers', type=int, default=1)
+    command.add_argument('--seed', type=int)
+    command.set_defaults(run=tolerance_command)
+
+    command = commands.add_parser('check-rotations',
+                                  help='check the rotation library against create_finger_base, exit 1 on mismatches')
+    command.add_argument('tables', nargs='+')
+    command.add_argument('--tolerance', type=float, default=1e-9)
+    command.set_defaults(run=check_rotations_command)
+
+    command = commands.add_parser('animate', help='interpolate transform tables as keyframes and export the frames')
+    command.add_argument('tables', nargs='+', help='two or more tables, in playback order')
+    command.add_argument('--frames', type=int, default=60)
+    command.add_argument('--times', type=float, nargs='+', help='time of each keyframe, evenly spaced by default')
+    command.add_argument('--unit', choices=('cm', 'mm'), default='cm')
+    command.add_argument('-o', '--output', required=True, help='.csv, .json or .npz')
+    command.set_defaults(run=animate_command)
+
+    command = commands.add_parser('fit-scan', help='fit finger transforms to a hand scan')
+    command.add_argument('scan', help='.ply, .npy or .xyz point cloud')
+    command.add_argument('-o', '--output', required=True, help='transform table to write')
+    command.add_argument('--voxel-size', type=float, default=1.5, help='mm')
+    command.add_argument('--scale', type=float, default=1.0, help='factor from scan units to mm')
+    command.add_argument('--min-length', type=float, default=15.0, help='shortest finger in mm')
+    command.add_argument('--flip-normal', action='store_true', help='the scan shows the palm side up')
+    command.set_defaults(run=fit_scan_command)
+
+    command = commands.add_parser('mirror', help='mirror a transform table; its rows place the mirrored base body, not the original')
+    command.add_argument('table')
+    command.add_argument('--plane', choices=('yz', 'xz', 'xy'), default='yz')
+    command.add_argument('--normal', type=float, nargs=3, metavar=('X', 'Y', 'Z'), help='mirror in any plane instead')
+    command.add_argument('--offset', type=float, default=0.0, help='mm from the origin along the plane normal')
+    command.add_argument('--suffix', default=transforms.MIRROR_SUFFIX, help='appended to the finger names')
+    command.add_argument('-o', '--output')
+    command.set_defaults(run=mirror_command)
+
+    command = commands.add_parser('reach', help='map where each fingertip reaches over its key layout, exit 1 on unreachable keys')
+    command.add_argument('table')
+    command.add_argument('layouts', help='keyLayouts.csv, matched to the fingers by name')
+    command.add_argument('--model', required=True, help='hand model CSV with a row for every finger, knuckles in the hand frame')
+    command.add_argument('--samples', type=int, default=2000000, help='joint samples per finger')
+    command.add_argument('--cell', type=float, default=1.0, help='mm')
+    command.add_argument('--key-height', type=float, default=12.0, help='key tops above the plate, mm')
+    command.add_argument('--voxels', action='store_true', help='also export an occupancy grid (.npz only)')
+    command.add_argument('-o', '--output', help='.json for the palette or .npz')
+    command.set_defaults(run=reach_command)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.run(args)
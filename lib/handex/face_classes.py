@@ -0,0 +1,101 @@
+"""Finds a body's mounting and mating faces from its face normals and areas.
+
+Planar faces are clustered by direction, ignoring which way they face, and
+each direction is split into planes by the faces' offsets along it, so the
+coplanar pieces of one split top face count together. The direction with
+the most planar area holds the mounting faces, usually the top and bottom
+of a plate. Planes in other directions that are nearly as large are mating
+faces. Everything else, fillets, chamfers and small steps, is minor and is
+not worth measuring.
+
+Curved faces are always minor, however large: they have no single normal to
+cluster by, and measureAngle between a curved face and a plane is not a
+meaningful orientation. A body whose mating surface is curved has to be
+measured through its planar faces or not at all.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+MOUNTING = 'mounting'
+MATING = 'mating'
+MINOR = 'minor'
+
+
+@dataclass
+class FaceClassifier:
+    angle_tolerance: float = 2.0   # degrees between normals of one direction
+    plane_tolerance: float = 0.05  # mm between offsets of one plane
+    min_fraction: float = 0.25     # of the largest plane's area, for a plane to count
+
+    def classify(self, normals, centroids, areas, planar=None) -> np.ndarray:
+        """Classifies the faces of one body.
+
+        Arguments:
+        normals -- (n, 3) face normals; only the direction matters.
+        centroids -- (n, 3) face centroids in mm.
+        areas -- (n,) face areas.
+        planar -- (n,) bool, False for curved faces, which are always MINOR;
+                  all planar if omitted.
+
+        :returns:
+            (n,) array of MOUNTING, MATING or MINOR.
+        """
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        centroids = np.asarray(centroids, dtype=np.float64).reshape(-1, 3)
+        areas = np.asarray(areas, dtype=np.float64)
+        planar = np.ones(len(areas), dtype=bool) if planar is None else np.asarray(planar, dtype=bool)
+        labels = np.full(len(areas), MINOR, dtype=object)
+        if not planar.any():
+            return labels
+
+        lengths = np.linalg.norm(normals, axis=1)
+        planar = planar & (lengths > 0)
+        if not planar.any():
+            return labels
+        normals = normals / np.where(lengths > 0, lengths, 1.0)[:, None]
+
+        direction = self._directions(normals, areas, planar)
+        plane = np.full(len(areas), -1)
+        plane_areas = []
+        for d in np.unique(direction[direction >= 0]):
+            members = np.flatnonzero(direction == d)
+            axis = normals[members[np.argmax(areas[members])]]
+            offsets = centroids[members] @ axis
+            order = np.argsort(offsets)
+            # A new plane starts wherever consecutive offsets are further apart than the tolerance.
+            starts = np.concatenate([[True], np.diff(offsets[order]) > self.plane_tolerance])
+            groups = np.cumsum(starts) - 1 + len(plane_areas)
+            plane[members[order]] = groups
+            plane_areas.extend(np.bincount(groups - len(plane_areas), weights=areas[members[order]]))
+
+        plane_areas = np.asarray(plane_areas)
+        direction_areas = np.bincount(direction[planar], weights=areas[planar])
+        mounting_direction = np.argmax(direction_areas)
+        large = planar & (plane_areas[np.maximum(plane, 0)] >= self.min_fraction * plane_areas.max())
+        labels[large] = MATING
+        labels[large & (direction == mounting_direction)] = MOUNTING
+        return labels
+
+    def _directions(self, normals, areas, planar) -> np.ndarray:
+        # Greedy clustering, largest face first: each round takes the largest
+        # unassigned face and claims every face within the angle of it.
+        # Bodies have a handful of directions, so there are few rounds.
+        cos_tolerance = np.cos(np.radians(self.angle_tolerance))
+        direction = np.full(len(areas), -1)
+        unassigned = planar.copy()
+        count = 0
+        while unassigned.any():
+            seed = np.flatnonzero(unassigned)[np.argmax(areas[unassigned])]
+            claimed = unassigned & (np.abs(normals @ normals[seed]) >= cos_tolerance)
+            direction[claimed] = count
+            unassigned &= ~claimed
+            count += 1
+        return direction
+
+
+def mounting_faces(normals, centroids, areas, planar=None, classifier: FaceClassifier = None) -> np.ndarray:
+    """Indices of the mounting and mating faces, in the order given."""
+    classifier = classifier or FaceClassifier()
+    return np.flatnonzero(classifier.classify(normals, centroids, areas, planar) != MINOR)
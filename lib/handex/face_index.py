@@ -0,0 +1,186 @@
+"""Design-wide index of planar faces for suggesting face pairs.
+
+Faces are found by normal direction through buckets on a grid over the unit
+sphere, and by position through a KD-tree over their centroids. Both are
+updated one body at a time: replacing a body's faces moves them between
+buckets straight away, while the tree keeps the changed faces aside in a
+short list that is searched linearly until enough of them pile up to make
+rebuilding the tree worthwhile.
+
+Only the standard library is used, so the index runs inside Fusion.
+"""
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Normals are bucketed on a grid of this spacing over each component.
+BUCKET_SIZE = 0.05
+
+# The tree is rebuilt once this fraction of its entries has changed.
+REBUILD_FRACTION = 0.25
+
+
+@dataclass
+class IndexedFace:
+    body: str          # key of the body, such as its entity token
+    body_name: str
+    face: int          # tempId of the face in its body
+    centroid: Tuple[float, float, float]  # mm
+    normal: Tuple[float, float, float]    # unit
+    area: float        # mm**2
+
+
+@dataclass
+class Suggestion:
+    face: IndexedFace
+    angle: float       # degrees between the normals, ignoring their direction
+    distance: float    # mm between the centroids
+
+
+class FaceIndex:
+    def __init__(self, bucket_size: float = BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.faces: List[Optional[IndexedFace]] = []
+        self._bodies: Dict[str, Tuple[str, List[int]]] = {}
+        self._buckets: Dict[Tuple[int, int, int], List[int]] = {}
+        self._tree = None
+        self._tree_size = 0
+        self._pending: List[int] = []
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return sum(len(ids) for _, ids in self._bodies.values())
+
+    def fingerprint(self, body: str) -> Optional[str]:
+        """The fingerprint the body was indexed with, or None if it is not indexed."""
+        entry = self._bodies.get(body)
+        return entry[0] if entry else None
+
+    def bodies(self) -> List[str]:
+        return list(self._bodies)
+
+    def update_body(self, body: str, fingerprint: str, faces: Iterable[IndexedFace]):
+        """Replaces the faces of one body."""
+        self.remove_body(body)
+        ids = []
+        for face in faces:
+            ids.append(len(self.faces))
+            self.faces.append(face)
+            self._buckets.setdefault(self._bucket(face.normal), []).append(ids[-1])
+        self._bodies[body] = (fingerprint, ids)
+        self._pending.extend(ids)
+        self._maybe_rebuild()
+
+    def remove_body(self, body: str):
+        entry = self._bodies.pop(body, None)
+        if entry is None:
+            return
+        for i in entry[1]:
+            self._buckets[self._bucket(self.faces[i].normal)].remove(i)
+            self.faces[i] = None
+        self._removed += len(entry[1])
+        self._maybe_rebuild()
+
+    def suggest(self, base: IndexedFace, count: int = 5, max_angle: float = 5.0) -> List[Suggestion]:
+        """Faces of other bodies parallel to base within max_angle degrees, nearest first.
+
+        Parallel faces come from the normal buckets around both directions of
+        the base normal; the nearest of them are then found in the centroid
+        tree, so neither step looks at every face in the design.
+        """
+        parallel = set()
+        for normal in (base.normal, tuple(-n for n in base.normal)):
+            for key in self._nearby_buckets(normal, max_angle):
+                parallel.update(self._buckets.get(key, ()))
+
+        def accept(i: int) -> bool:
+            face = self.faces[i]
+            return i in parallel and face.body != base.body and _angle(face.normal, base.normal) <= max_angle
+
+        return [Suggestion(self.faces[i], _angle(self.faces[i].normal, base.normal), math.sqrt(d))
+                for d, i in self._nearest(base.centroid, count, accept)]
+
+    def _bucket(self, normal) -> Tuple[int, int, int]:
+        return tuple(int(math.floor(n / self.bucket_size)) for n in normal)
+
+    def _nearby_buckets(self, normal, max_angle: float):
+        # Unit normals within max_angle differ by at most the chord length in each component.
+        reach = int(math.ceil(2 * math.sin(math.radians(max_angle) / 2) / self.bucket_size))
+        cx, cy, cz = self._bucket(normal)
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                for z in range(cz - reach, cz + reach + 1):
+                    yield x, y, z
+
+    def _maybe_rebuild(self):
+        changed = len(self._pending) + self._removed
+        if changed > REBUILD_FRACTION * max(self._tree_size, 16):
+            self._rebuild()
+
+    def _rebuild(self):
+        live = [i for i, face in enumerate(self.faces) if face is not None]
+        # Compact the face list so removed faces stop costing memory.
+        remap = {old: new for new, old in enumerate(live)}
+        self.faces = [self.faces[i] for i in live]
+        self._bodies = {body: (fingerprint, [remap[i] for i in ids]) for body, (fingerprint, ids) in self._bodies.items()}
+        self._buckets = {}
+        for i, face in enumerate(self.faces):
+            self._buckets.setdefault(self._bucket(face.normal), []).append(i)
+        self._tree = _build([(face.centroid, i) for i, face in enumerate(self.faces)], 0)
+        self._tree_size = len(self.faces)
+        self._pending = []
+        self._removed = 0
+
+    def _nearest(self, point, count: int, accept) -> List[Tuple[float, int]]:
+        # Max-heap of the best (negated squared distance, id) found so far.
+        best: List[Tuple[float, int]] = []
+
+        def offer(d: float, i: int):
+            if self.faces[i] is None or not accept(i):
+                return
+            if len(best) < count:
+                heapq.heappush(best, (-d, i))
+            elif d < -best[0][0]:
+                heapq.heapreplace(best, (-d, i))
+
+        for i in self._pending:
+            if self.faces[i] is not None:
+                offer(_squared(self.faces[i].centroid, point), i)
+
+        # (node, squared distance from the point to the node's side of the split)
+        stack = [(self._tree, 0.0)] if self._tree else []
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == count and bound >= -best[0][0]:
+                continue
+            centroid, i, axis, left, right = node
+            offer(_squared(centroid, point), i)
+            delta = point[axis] - centroid[axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            if far is not None:
+                stack.append((far, max(bound, delta * delta)))
+            if near is not None:
+                stack.append((near, bound))
+        return sorted((-d, i) for d, i in best)
+
+
+def _build(points: list, depth: int):
+    if not points:
+        return None
+    axis = depth % 3
+    points.sort(key=lambda item: item[0][axis])
+    middle = len(points) // 2
+    centroid, i = points[middle]
+    return centroid, i, axis, _build(points[:middle], depth + 1), _build(points[middle + 1:], depth + 1)
+
+
+def _squared(a, b) -> float:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+def _angle(a, b) -> float:
+    # Parallel and anti-parallel faces both count as aligned.
+    dot = abs(a[0] * b[0] + a[1] * b[1] + a[2] * b[2])
+    return math.degrees(math.acos(min(1.0, dot)))
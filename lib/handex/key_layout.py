@@ -0,0 +1,120 @@
+"""Key-switch layouts for the finger bases.
+
+A layout puts a grid of square switch cutouts on a finger's plate: rows
+along the finger and columns across it, pitch apart, with the rows turned
+by the splay angle within the plate. Layouts are given in the base body's
+own frame, so the generated finger base's transform places them.
+"""
+
+import csv
+import math
+from dataclasses import dataclass
+from typing import List
+
+from .transforms import FingerTransform, finger_matrix, mm
+
+# The plate of the base body before it is transformed: keys run along
+# PLATE_ALONG and the cutouts go through the plate along PLATE_NORMAL.
+PLATE_ALONG = (0.0, 0.0, 1.0)
+PLATE_NORMAL = (0.0, 1.0, 0.0)
+
+# Square cutout for MX-style switches, in millimetres.
+DEFAULT_CUTOUT = 14.0
+
+
+@dataclass
+class KeyLayout:
+    name: str
+    rows: int
+    columns: int = 1
+    pitch: float = 19.05             # mm between key centres
+    splay: float = 0.0               # degrees, about PLATE_NORMAL
+    cutout: float = DEFAULT_CUTOUT   # mm
+    x: float = 0.0                   # first key centre on the base body, mm
+    y: float = 0.0
+    z: float = 0.0
+
+    @property
+    def keys(self) -> int:
+        return self.rows * self.columns
+
+
+@dataclass
+class KeyFrame:
+    """Where a layout lands in the design, in centimetres."""
+    origin: tuple   # first key centre
+    along: tuple    # unit direction of the rows
+    across: tuple   # unit direction of the columns
+    normal: tuple   # unit plate normal
+
+    def cutout_corners(self, cutout: float) -> list:
+        """Three corners of the first key's cutout, for a three point rectangle.
+
+        Arguments:
+        cutout -- Side of the square cutout in millimetres.
+        """
+        half = mm(cutout) / 2
+        return [_add(self.origin, _scale(self.along, -half), _scale(self.across, -half)),
+                _add(self.origin, _scale(self.along, half), _scale(self.across, -half)),
+                _add(self.origin, _scale(self.along, half), _scale(self.across, half))]
+
+
+def read_layouts(path: str) -> List[KeyLayout]:
+    """Reads a keyLayouts*.csv file.
+
+    The name, rows and pitch columns are required; columns, splay, cutout and
+    the x, y, z key origin default as in KeyLayout when missing or empty.
+    """
+    layouts = []
+    with open(path, 'r', newline='') as csvfile:
+        for line, row in enumerate(csv.DictReader(csvfile), start=2):
+            values = {key: value for key, value in row.items() if key and value not in (None, '')}
+            try:
+                layouts.append(KeyLayout(
+                    values['name'].strip(),
+                    int(values['rows']),
+                    int(values.get('columns', 1)),
+                    float(values['pitch']),
+                    *(float(values.get(field, default)) for field, default in
+                      (('splay', 0.0), ('cutout', DEFAULT_CUTOUT), ('x', 0.0), ('y', 0.0), ('z', 0.0)))))
+            except (KeyError, ValueError) as e:
+                raise ValueError(f'{path} line {line}: {e}') from e
+            if layouts[-1].rows < 1 or layouts[-1].columns < 1:
+                raise ValueError(f'{path} line {line}: a layout needs at least one row and column')
+    return layouts
+
+
+def key_frame(transform: FingerTransform, layout: KeyLayout) -> KeyFrame:
+    """Moves a layout onto the finger base generated from transform."""
+    matrix = finger_matrix(transform)
+    s, c = math.sin(math.radians(layout.splay)), math.cos(math.radians(layout.splay))
+    # Splay turns PLATE_ALONG about PLATE_NORMAL (Rodrigues, the two are perpendicular).
+    along = _add(_scale(PLATE_ALONG, c), _scale(_cross(PLATE_NORMAL, PLATE_ALONG), s))
+    across = _cross(PLATE_NORMAL, along)
+
+    origin = [mm(v) for v in (layout.x, layout.y, layout.z)]
+    return KeyFrame(tuple(sum(matrix[i][k] * origin[k] for k in range(3)) + matrix[i][3] for i in range(3)),
+                    _rotate(matrix, along), _rotate(matrix, across), _rotate(matrix, PLATE_NORMAL))
+
+
+def key_centers(frame: KeyFrame, layout: KeyLayout) -> list:
+    """Centres of every key, row by row, in centimetres."""
+    pitch = mm(layout.pitch)
+    return [_add(frame.origin, _scale(frame.along, row * pitch), _scale(frame.across, column * pitch))
+            for row in range(layout.rows) for column in range(layout.columns)]
+
+
+def _rotate(matrix: list, vector) -> tuple:
+    return tuple(sum(matrix[i][k] * vector[k] for k in range(3)) for i in range(3))
+
+
+def _cross(a, b) -> tuple:
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _scale(v, s: float) -> tuple:
+    return tuple(x * s for x in v)
+
+
+def _add(*vectors) -> tuple:
+    return tuple(sum(components) for components in zip(*vectors))
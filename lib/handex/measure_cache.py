@@ -0,0 +1,82 @@
+import json
+import sqlite3
+import time
+
+
+class MeasureCache:
+    """Measurement records kept on disk in SQLite, keyed by geometry fingerprint.
+
+    Records are any JSON-serializable value. The least recently used records
+    are evicted once the stored JSON grows past max_bytes. Hit and miss
+    counts are kept for the lifetime of the object.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str):
+        row = self._connection().execute('SELECT value FROM records WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._connection().execute('UPDATE records SET used = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0])
+
+    def contains(self, key: str) -> bool:
+        """Checks for a record without counting a lookup."""
+        return self._connection().execute('SELECT 1 FROM records WHERE key = ?', (key,)).fetchone() is not None
+
+    def put(self, key: str, value):
+        text = json.dumps(value)
+        db = self._connection()
+        db.execute('INSERT OR REPLACE INTO records (key, value, size, used) VALUES (?, ?, ?, ?)',
+                   (key, text, len(text), time.time()))
+        self._evict()
+        db.commit()
+
+    def clear(self):
+        self._connection().execute('DELETE FROM records')
+        self._db.commit()
+
+    def stats(self) -> dict:
+        count, size = self._connection().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM records').fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'records': count, 'bytes': size}
+
+    def close(self):
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.execute('CREATE TABLE IF NOT EXISTS records '
+                             '(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS records_used ON records (used)')
+        return self._db
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the oldest records until the rest fit, keeping a little headroom.
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        keys = []
+        for key, size in self._db.execute('SELECT key, size FROM records ORDER BY used'):
+            keys.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._db.executemany('DELETE FROM records WHERE key = ?', keys)
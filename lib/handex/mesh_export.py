@@ -0,0 +1,89 @@
+"""Writes triangle meshes as binary STL or 3MF.
+
+The meshes come from Fusion's mesh calculator as flat lists: node
+coordinates in centimetres and node indices, three per triangle. Only the
+standard library is used so the writers can run on a worker thread inside
+Fusion.
+"""
+
+import math
+import struct
+import zipfile
+from typing import Sequence
+
+_STL_TRIANGLE = struct.Struct('<12fH')
+
+_3MF_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>'
+)
+_3MF_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>'
+)
+
+
+def write_stl(path: str, coordinates: Sequence[float], indices: Sequence[int], name: str = '', scale: float = 10.0) -> str:
+    """Writes a binary STL file.
+
+    Arguments:
+    path -- File to write.
+    coordinates -- Flat x, y, z node coordinates.
+    indices -- Flat node indices, three per triangle.
+    name -- Stored in the 80 byte header.
+    scale -- Multiplies the coordinates; the default turns centimetres into millimetres.
+
+    :returns:
+        The path, so it can be used as a worker's result.
+    """
+    points = [(coordinates[i] * scale, coordinates[i + 1] * scale, coordinates[i + 2] * scale)
+              for i in range(0, len(coordinates), 3)]
+    count = len(indices) // 3
+    with open(path, 'wb') as f:
+        f.write(name.encode('ascii', 'replace')[:80].ljust(80, b' '))
+        f.write(struct.pack('<I', count))
+        for t in range(0, count * 3, 3):
+            a, b, c = points[indices[t]], points[indices[t + 1]], points[indices[t + 2]]
+            f.write(_STL_TRIANGLE.pack(*_normal(a, b, c), *a, *b, *c, 0))
+    return path
+
+
+def write_3mf(path: str, coordinates: Sequence[float], indices: Sequence[int], name: str = '', scale: float = 10.0) -> str:
+    """Writes a 3MF package with one object, in millimetres. Arguments as for write_stl."""
+    vertices = ''.join(f'<vertex x="{coordinates[i] * scale:.6g}" y="{coordinates[i + 1] * scale:.6g}" '
+                       f'z="{coordinates[i + 2] * scale:.6g}"/>' for i in range(0, len(coordinates), 3))
+    triangles = ''.join(f'<triangle v1="{indices[t]}" v2="{indices[t + 1]}" v3="{indices[t + 2]}"/>'
+                        for t in range(0, len(indices) - 2, 3))
+    model = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<model unit="millimeter" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+        f'<resources><object id="1" type="model" name="{_xml_escape(name)}">'
+        f'<mesh><vertices>{vertices}</vertices><triangles>{triangles}</triangles></mesh>'
+        '</object></resources><build><item objectid="1"/></build></model>'
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as package:
+        package.writestr('[Content_Types].xml', _3MF_CONTENT_TYPES)
+        package.writestr('_rels/.rels', _3MF_RELS)
+        package.writestr('3D/3dmodel.model', model)
+    return path
+
+
+WRITERS = {'stl': write_stl, '3mf': write_3mf}
+
+
+def _normal(a, b, c):
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    n = (uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx)
+    length = math.sqrt(n[0] * n[0] + n[1] * n[1] + n[2] * n[2]) or 1.0
+    return n[0] / length, n[1] / length, n[2] / length
+
+
+def _xml_escape(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
@@ -0,0 +1,76 @@
+"""Mirrors transform tables to build the other hand.
+
+A finger placed by the rigid transform M on the base body ends up, after
+reflecting everything in a plane S, at S M S applied to the mirrored base.
+S M S is again a proper rotation plus translation, so it has a table row:
+its rotation is written back as Euler angles in create_finger_base's order,
+which fixes the handedness, and its translation is solved for the table's
+pivot convention. The whole table is mirrored as one stack of matrices.
+
+A mirrored table only reproduces the other hand when it is applied to the
+mirrored base body. Applied to the original base it gives the mirror image
+only if the base is itself symmetric in the mirror plane; multiply_bases
+makes its mirrored fingers with mirror features instead.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+from . import rotations
+from .transforms import MIRROR_SUFFIX, PIVOT_OFFSET, FingerTransform, read_table, write_table
+
+# Mirror planes through the origin, by the normal they flip.
+PLANES = {'yz': (1.0, 0.0, 0.0), 'xz': (0.0, 1.0, 0.0), 'xy': (0.0, 0.0, 1.0)}
+
+
+def reflection(normal: Sequence[float], offset: float = 0.0) -> np.ndarray:
+    """Returns the 4x4 reflection in the plane n . x = offset, offset in mm."""
+    n = np.asarray(normal, dtype=np.float64)
+    n = n / np.linalg.norm(n)
+    s = np.eye(4)
+    s[:3, :3] -= 2.0 * np.outer(n, n)
+    s[:3, 3] = 2.0 * offset * n
+    return s
+
+
+def mirror_transforms(rows: List[FingerTransform], plane='yz', offset: float = 0.0,
+                      suffix: str = MIRROR_SUFFIX) -> List[FingerTransform]:
+    """Mirrors table rows in a plane.
+
+    Arguments:
+    rows -- Rows of a transform table, translations in mm.
+    plane -- A name in PLANES or the plane's normal.
+    offset -- Distance of the plane from the origin along the normal, in mm.
+    suffix -- Appended to every finger name.
+
+    :returns:
+        The rows that place the mirrored base body as the mirror image of each finger.
+    """
+    if not rows:
+        return []
+    s = reflection(PLANES[plane] if isinstance(plane, str) else plane, offset)
+    a, b = s[:3, :3], s[:3, 3]
+    o = np.asarray(PIVOT_OFFSET)
+
+    t = np.array([row.translation for row in rows])
+    r = rotations.euler_to_matrix(np.array([row.angles for row in rows]))
+    # The finger moves x to R x + T with T = t + o - R o.
+    translation = t + o - r @ o
+
+    # S M S x = A R A x + A R b + A T + b
+    mirrored_r = a @ r @ a
+    mirrored_translation = (a @ r @ b) + translation @ a.T + b
+    mirrored_t = mirrored_translation - o + mirrored_r @ o
+    # Round off the noise of the round trip through matrices, so mirroring
+    # twice gives back the table's own numbers.
+    mirrored_t = np.round(mirrored_t, 9) + 0.0
+    angles = np.round(rotations.matrix_to_euler(mirrored_r), 9) + 0.0
+    return [FingerTransform(row.name + suffix, *map(float, tr), *map(float, an))
+            for row, tr, an in zip(rows, mirrored_t, angles)]
+
+
+def mirror_table(path: str, output: str, plane='yz', offset: float = 0.0, suffix: str = MIRROR_SUFFIX) -> str:
+    """Writes the mirror image of a transform table; returns the output path."""
+    write_table(output, mirror_transforms(read_table(path), plane, offset, suffix))
+    return output
@@ -0,0 +1,62 @@
+import csv
+import re
+from dataclasses import dataclass
+from typing import Dict
+
+# A literal expression as Fusion exports it, e.g. "0.5 mm" or "-19.7 deg".
+_LITERAL = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z]*)\s*$')
+
+
+@dataclass
+class Parameter:
+    name: str
+    unit: str
+    expression: str
+    comment: str = ''
+
+
+def read_parameters(path: str) -> Dict[str, Parameter]:
+    """Reads a parameters.csv export: name, unit, expression, comment without a header."""
+    parameters = {}
+    with open(path, 'r', newline='') as csvfile:
+        for row in csv.reader(csvfile):
+            if not row or not row[0].strip():
+                continue
+            row = (row + ['', '', '', ''])[:4]
+            parameters[row[0].strip()] = Parameter(row[0].strip(), row[1].strip(), row[2].strip(), row[3].strip())
+    return parameters
+
+
+def resolve(parameters: Dict[str, Parameter]) -> Dict[str, float]:
+    """Evaluates every parameter to a number in its own unit.
+
+    Expressions are either literals such as "0.5 mm" or the name of another
+    parameter, e.g. d234 = GapWidth. Anything else raises ValueError.
+    """
+    values = {}
+
+    def value_of(name, chain):
+        if name in values:
+            return values[name]
+        if name in chain:
+            raise ValueError(f'circular parameter reference: {" -> ".join(chain + (name,))}')
+        parameter = parameters.get(name)
+        if parameter is None:
+            raise ValueError(f'unknown parameter: {name}')
+
+        literal = _LITERAL.match(parameter.expression)
+        if literal:
+            values[name] = float(literal.group(1))
+        elif parameter.expression in parameters:
+            values[name] = value_of(parameter.expression, chain + (name,))
+        else:
+            raise ValueError(f'{name}: cannot evaluate {parameter.expression!r}')
+        return values[name]
+
+    for name in parameters:
+        value_of(name, ())
+    return values
+
+
+def read_values(path: str) -> Dict[str, float]:
+    return resolve(read_parameters(path))
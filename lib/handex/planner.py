@@ -0,0 +1,184 @@
+"""Dry-run plans and time estimates for multiply_bases.
+
+A plan lists the steps multiply_bases would run, with the design changes and
+measurements each one makes, computed from the transform table and a
+snapshot of the bodies without touching the design. The cost model turns
+each step's units of work into seconds; it starts from rough defaults and
+is recalibrated from the step timings of every real run.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from .transforms import FingerTransform
+
+# Seconds per unit of work for each kind of step, before any calibration.
+DEFAULT_COSTS = {'describe': 0.15, 'delete': 0.05, 'report': 0.01, 'generate': 0.4, 'mirror': 0.2}
+
+# Weight of the latest run when recalibrating.
+CALIBRATION_WEIGHT = 0.3
+
+
+@dataclass
+class BodyInfo:
+    name: str
+    measured_faces: int   # faces describe_body measures
+    cached: bool = False  # measurements answered from the measurement cache
+    compare_cached: int = 0  # measurements against the partner thumb's faces that are cached
+
+
+@dataclass
+class Step:
+    label: str
+    kind: str
+    units: int
+    features: int = 0      # features added to the timeline
+    deletes: int = 0       # bodies deleted
+    measurements: int = 0  # measureAngle calls
+
+
+@dataclass
+class Plan:
+    steps: List[Step] = field(default_factory=list)
+
+    @property
+    def features(self) -> int:
+        return sum(step.features for step in self.steps)
+
+    @property
+    def deletes(self) -> int:
+        return sum(step.deletes for step in self.steps)
+
+    @property
+    def measurements(self) -> int:
+        return sum(step.measurements for step in self.steps)
+
+    def set_measured(self, measured: Dict[str, int]):
+        """Replaces the planned work of describe steps with what they measured.
+
+        Arguments:
+        measured -- Measurements made, by step label.
+        """
+        for step in self.steps:
+            if step.kind == 'describe' and step.label in measured:
+                step.units = step.features = step.measurements = measured[step.label]
+
+
+def describe_kind(name: str) -> bool:
+    # The bodies multiply_bases.describe_step reports on.
+    return 'thumb' in name or '-base' in name or '-source' in name or '_generated' in name
+
+
+def compare_partners(names: List[str]) -> Dict[str, str]:
+    """The earlier thumb each thumb body is compared against, in describe order.
+
+    multiply_bases.describe_step keeps the first thumb aside and compares the
+    next one against each of its measured faces, and so on in pairs.
+    """
+    partners = {}
+    waiting = []
+    for name in names:
+        if 'thumb' in name:
+            if waiting:
+                partners[name] = waiting.pop()
+            else:
+                waiting.append(name)
+    return partners
+
+
+def plan_run(rows: List[FingerTransform], bodies: List[BodyInfo], mirror: bool = False) -> Plan:
+    """Builds the step list multiply_bases.command_execute would run.
+
+    Labels match the job's step labels so timings can be matched back.
+    Describing a body measures each large face and draws a sketch for it,
+    unless the body's measurements are cached. A thumb compared against an
+    earlier one is also measured once per measured face of that thumb. Each
+    finger copies the base body and adds one move feature for the translation
+    and one per non-zero rotation. Mirroring adds one mirror feature per finger.
+    """
+    plan = Plan()
+    faces_of = {body.name: body.measured_faces for body in bodies}
+    partners = compare_partners([body.name for body in bodies])
+    for body in bodies:
+        faces = 0 if body.cached or not describe_kind(body.name) else body.measured_faces
+        if body.name in partners:
+            # Each cached compare record covers all of this thumb's measured faces.
+            faces += body.measured_faces * (faces_of[partners[body.name]] - body.compare_cached)
+        plan.steps.append(Step(f'Describing {body.name}', 'describe', faces, features=faces, measurements=faces))
+
+    generated = sum('_generated' in body.name for body in bodies)
+    plan.steps.append(Step('Deleting generated bodies', 'delete', generated, deletes=generated))
+    plan.steps.append(Step('Writing report', 'report', 1))
+
+    for row in rows:
+        features = 2 + sum(angle != 0 for angle in row.angles)
+        plan.steps.append(Step(f'Generating {row.name}', 'generate', features, features=features))
+        if mirror:
+            plan.steps.append(Step(f'Mirroring {row.name}', 'mirror', 1, features=1))
+    if mirror and rows:
+        plan.steps.append(Step('Writing mirrored table', 'report', 1))
+    return plan
+
+
+class CostModel:
+    """Seconds per unit of work by step kind, persisted as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.costs = dict(DEFAULT_COSTS)
+        self.runs = 0
+        try:
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            self.costs.update(saved.get('costs', {}))
+            self.runs = saved.get('runs', 0)
+        except (OSError, ValueError):
+            pass
+
+    def estimate(self, plan: Plan) -> float:
+        return sum(self.step_estimate(step) for step in plan.steps)
+
+    def step_estimate(self, step: Step) -> float:
+        return self.costs.get(step.kind, 0.0) * step.units
+
+    def calibrate(self, plan: Plan, timings: List[tuple]):
+        """Moves the costs towards those measured in a run.
+
+        Arguments:
+        plan -- The plan of the run.
+        timings -- (label, seconds) for every step that ran.
+        """
+        seconds: Dict[str, float] = {}
+        units: Dict[str, int] = {}
+        steps = {step.label: step for step in plan.steps}
+        for label, elapsed in timings:
+            step = steps.get(label)
+            if step is None or step.units == 0:
+                continue
+            seconds[step.kind] = seconds.get(step.kind, 0.0) + elapsed
+            units[step.kind] = units.get(step.kind, 0) + step.units
+
+        for kind, total in seconds.items():
+            measured = total / units[kind]
+            self.costs[kind] = (1 - CALIBRATION_WEIGHT) * self.costs.get(kind, measured) + CALIBRATION_WEIGHT * measured
+        self.runs += 1
+        with open(self.path, 'w') as f:
+            json.dump({'costs': self.costs, 'runs': self.runs}, f, indent=2)
+
+
+def format_plan(plan: Plan, model: CostModel) -> str:
+    lines = []
+    for step in plan.steps:
+        changes = []
+        if step.features:
+            changes.append(f'{step.features} features')
+        if step.deletes:
+            changes.append(f'{step.deletes} deletes')
+        if step.measurements:
+            changes.append(f'{step.measurements} measurements')
+        lines.append(f'{step.label}: {", ".join(changes) or "no changes"}, ~{model.step_estimate(step):.1f}s')
+    lines.append(f'Total: {len(plan.steps)} steps, {plan.features} features, {plan.deletes} bodies deleted, '
+                 f'{plan.measurements} measurements, ~{model.estimate(plan):.0f}s '
+                 f'(cost model from {model.runs} runs)')
+    return '\n'.join(lines)
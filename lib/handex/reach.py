@@ -0,0 +1,360 @@
+"""Reachability maps of the fingertips over the key plates.
+
+Each finger gets a simple planar joint model: three phalanges that flex
+about the knuckle (MCP), middle (PIP) and end (DIP) joints, with the whole
+chain turned sideways by the knuckle's abduction. Joint angles are sampled
+uniformly within their ranges and the fingertips are rasterized onto a
+heightmap over the plate, keeping the lowest and highest tip per cell.
+A key can be pressed where its top lies between the two.
+
+The knuckles are placed in the hand frame, the frame of the transform
+table, and every fingertip is mapped into the base body's own frame with
+the inverse of the finger's transform, so the heightmap lines up with the
+key layouts. A sweep therefore depends on the finger's transform but not on
+the layout. Every finger needs its own model, read from a hand model CSV;
+commands/key_plates/handModel.csv is a sample with the knuckles placed for
+fingerTransforms.csv and typical adult phalanx lengths, to be measured
+from the real hand.
+Sweeps are cached; changing a layout only looks the keys up again.
+"""
+
+import csv
+import dataclasses
+import functools
+import json
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import transforms
+from .key_layout import PLATE_ALONG, PLATE_NORMAL, KeyLayout, key_centers, key_frame
+from .transforms import FingerTransform
+
+CHUNK_SIZE = 262144
+
+# Height of a key top above the plate, in millimetres.
+DEFAULT_KEY_HEIGHT = 12.0
+
+
+@dataclass(frozen=True)
+class FingerModel:
+    """Joint model of one finger, lengths in mm and angles in degrees.
+
+    The knuckle sits at (x, y, z) in the hand frame, the frame the transform
+    table places the base bodies in. With every joint at zero the finger
+    points along PLATE_ALONG of that frame; flexion curls it towards
+    -PLATE_NORMAL.
+    """
+    name: str = ''
+    proximal: float = 45.0
+    middle: float = 25.0
+    distal: float = 20.0
+    x: float = 0.0
+    y: float = 35.0
+    z: float = -45.0
+    mcp: Tuple[float, float] = (-20.0, 90.0)
+    abduction: Tuple[float, float] = (-25.0, 25.0)
+    pip: Tuple[float, float] = (0.0, 110.0)
+    dip: Tuple[float, float] = (0.0, 80.0)
+
+    @property
+    def length(self) -> float:
+        return self.proximal + self.middle + self.distal
+
+    @property
+    def knuckle(self) -> Tuple[float, float, float]:
+        return (self.x, self.y, self.z)
+
+
+@dataclass
+class ReachMap:
+    """Fingertip heights over the plate, in the base body's frame.
+
+    Cell (i, j) covers along = along0 + i * cell and across = across0 + j * cell,
+    measured along PLATE_ALONG and PLATE_NORMAL x PLATE_ALONG from the origin
+    of the base body. Heights are along PLATE_NORMAL; cells no sample reached
+    hold NaN.
+    """
+    model: FingerModel
+    samples: int
+    cell: float
+    along0: float
+    across0: float
+    lowest: np.ndarray
+    highest: np.ndarray
+    counts: np.ndarray
+    height0: float = 0.0
+    # Occupied (along, across, height) cells, if the sweep was asked for them.
+    voxels: Optional[np.ndarray] = None
+
+    def lookup(self, along, across) -> Tuple[np.ndarray, np.ndarray]:
+        """Lowest and highest fingertip heights at plate positions, NaN outside the map."""
+        i = np.floor((np.asarray(along) - self.along0) / self.cell).astype(np.int64)
+        j = np.floor((np.asarray(across) - self.across0) / self.cell).astype(np.int64)
+        inside = (i >= 0) & (i < self.lowest.shape[0]) & (j >= 0) & (j < self.lowest.shape[1])
+        i, j = np.where(inside, i, 0), np.where(inside, j, 0)
+        return np.where(inside, self.lowest[i, j], np.nan), np.where(inside, self.highest[i, j], np.nan)
+
+
+@dataclass
+class KeyReach:
+    row: int
+    column: int
+    center: Tuple[float, float, float]  # mm on the base body
+    reachable: bool                     # the key top can be reached at the centre
+    fraction: float                     # of the cutout area where it can be reached
+
+
+@dataclass
+class Coverage:
+    finger: str
+    layout: str
+    keys: List[KeyReach] = field(default_factory=list)
+
+    @property
+    def reachable(self) -> int:
+        return sum(key.reachable for key in self.keys)
+
+    @property
+    def fraction(self) -> float:
+        return float(np.mean([key.fraction for key in self.keys])) if self.keys else 0.0
+
+
+def read_models(path: str) -> Dict[str, FingerModel]:
+    """Reads a hand model CSV, one finger per row, keyed by finger name.
+
+    Only the name column is required. Lengths and knuckle positions are single
+    columns; joint ranges are <joint>_min and <joint>_max. Missing or empty
+    values default as in FingerModel.
+    """
+    defaults = FingerModel()
+    models = {}
+    with open(path, 'r', newline='') as csvfile:
+        for line, row in enumerate(csv.DictReader(csvfile), start=2):
+            values = {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+            try:
+                name = values['name'].strip()
+                arguments = {}
+                for f in fields(FingerModel):
+                    default = getattr(defaults, f.name)
+                    if f.name == 'name':
+                        continue
+                    if isinstance(default, tuple):
+                        arguments[f.name] = (float(values.get(f'{f.name}_min', default[0])),
+                                             float(values.get(f'{f.name}_max', default[1])))
+                    else:
+                        arguments[f.name] = float(values.get(f.name, default))
+            except (KeyError, ValueError) as e:
+                raise ValueError(f'{path} line {line}: {e}') from e
+            models[name] = FingerModel(name, **arguments)
+    return models
+
+
+def fingertips(model: FingerModel, angles: np.ndarray) -> np.ndarray:
+    """Fingertip positions for (n, 4) MCP, abduction, PIP and DIP angles in degrees.
+
+    :returns:
+        (n, 3) positions in mm in the hand frame.
+    """
+    radians = np.radians(angles)
+    mcp, abduction, pip, dip = radians.T
+    proximal, middle, distal = mcp, mcp + pip, mcp + pip + dip
+    # Distance out along the finger and drop towards the plate, in the finger's own plane.
+    reach = model.proximal * np.cos(proximal) + model.middle * np.cos(middle) + model.distal * np.cos(distal)
+    drop = model.proximal * np.sin(proximal) + model.middle * np.sin(middle) + model.distal * np.sin(distal)
+    along, normal = np.asarray(PLATE_ALONG, dtype=np.float64), np.asarray(PLATE_NORMAL, dtype=np.float64)
+    offsets = (np.outer(reach * np.cos(abduction), along) + np.outer(reach * np.sin(abduction), np.cross(normal, along))
+               - np.outer(drop, normal))
+    return np.asarray(model.knuckle, dtype=np.float64) + offsets
+
+
+def sweep(model: FingerModel, transform: FingerTransform = None, samples: int = 2000000, cell: float = 1.0,
+          seed: int = 0, voxels: bool = False) -> ReachMap:
+    """Samples a finger's joint space and rasterizes the fingertips on its base.
+
+    Results are cached by their arguments, except the model's name, so
+    sweeping the same model on the same transform again, for instance after
+    a layout tweak or for another finger, costs nothing.
+
+    Arguments:
+    model -- The finger's joint model, in the hand frame.
+    transform -- The finger's row of the transform table; the hand frame is
+                 the base body's frame if omitted.
+    samples -- Joint configurations to sample.
+    cell -- Side of a heightmap cell, and of a voxel, in mm.
+    seed -- Seed of the sampler; the default makes sweeps repeatable.
+    voxels -- Also keep an occupancy grid of every cell a fingertip reached.
+
+    :returns:
+        A ReachMap covering every point the finger can reach.
+    """
+    matrix = tuple(tuple(row) for row in transforms.finger_matrix(transform, 'mm')) if transform else None
+    reach = _sweep(dataclasses.replace(model, name=''), matrix, samples, cell, seed, voxels)
+    return dataclasses.replace(reach, model=model)
+
+
+@functools.lru_cache(maxsize=32)
+def _sweep(model: FingerModel, matrix: Optional[tuple], samples: int, cell: float, seed: int,
+           voxels: bool) -> ReachMap:
+    # The matrix takes the base body into the hand frame; its inverse takes
+    # the fingertips back onto the base.
+    inverse = np.linalg.inv(np.array(matrix)) if matrix else np.eye(4)
+    rotation, translation = inverse[:3, :3], inverse[:3, 3]
+    knuckle = np.asarray(_plate_coordinates(rotation @ np.asarray(model.knuckle, dtype=np.float64) + translation))
+    # The fingertip stays within the finger's length of the knuckle.
+    low = np.floor((knuckle - model.length) / cell) * cell
+    shape = tuple(int(n) for n in np.ceil((knuckle + model.length - low) / cell).astype(np.int64) + 1)
+    lowest = np.full(shape[0] * shape[1], np.inf)
+    highest = np.full(shape[0] * shape[1], -np.inf)
+    counts = np.zeros(shape[0] * shape[1], dtype=np.int64)
+    occupied = np.zeros(shape, dtype=bool) if voxels else None
+
+    ranges = np.array([model.mcp, model.abduction, model.pip, model.dip], dtype=np.float64)
+    sizes = [min(CHUNK_SIZE, samples - start) for start in range(0, samples, CHUNK_SIZE)]
+    for size, chunk_seed in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        rng = np.random.default_rng(chunk_seed)
+        tips = np.stack(_plate_coordinates(fingertips(model, rng.uniform(ranges[:, 0], ranges[:, 1], (size, 4)))
+                                           @ rotation.T + translation), axis=1)
+        index = np.floor((tips - low) / cell).astype(np.int64)
+        flat = index[:, 0] * shape[1] + index[:, 1]
+        np.minimum.at(lowest, flat, tips[:, 2])
+        np.maximum.at(highest, flat, tips[:, 2])
+        counts += np.bincount(flat, minlength=len(counts))
+        if voxels:
+            occupied[index[:, 0], index[:, 1], index[:, 2]] = True
+
+    reached = counts > 0
+    return ReachMap(
+        model, samples, cell, float(low[0]), float(low[1]),
+        np.where(reached, lowest, np.nan).reshape(shape[:2]),
+        np.where(reached, highest, np.nan).reshape(shape[:2]),
+        counts.reshape(shape[:2]),
+        float(low[2]),
+        occupied,
+    )
+
+
+def coverage(reach: ReachMap, layout: KeyLayout, key_height: float = DEFAULT_KEY_HEIGHT) -> Coverage:
+    """Which keys of a layout the finger can press.
+
+    A key counts as reachable where some fingertip is at or below its top and
+    some other is at or above it, so the finger can be brought onto it. The
+    cutout is checked on a grid of the map's cell size.
+
+    Arguments:
+    reach -- The finger's sweep.
+    layout -- Key layout on the same finger's base.
+    key_height -- Height of the key tops above the plate, in mm.
+    """
+    # The identity transform leaves the layout on the base body, in cm.
+    frame = key_frame(FingerTransform(layout.name, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0), layout)
+    along, across = np.asarray(frame.along), np.asarray(frame.across)
+    steps = max(int(np.ceil(layout.cutout / reach.cell)), 1)
+    offsets = (np.arange(steps) + 0.5) * layout.cutout / steps - layout.cutout / 2
+    square = (offsets[:, None, None] * along + offsets[None, :, None] * across).reshape(-1, 3)
+
+    centers = np.asarray(key_centers(frame, layout)) * 10.0
+    top = _plate_coordinates(centers[0])[2] + key_height
+    result = Coverage(reach.model.name, layout.name)
+    for index, center in enumerate(centers):
+        points = np.vstack([center, center + square])
+        lowest, highest = reach.lookup(*_plate_coordinates(points)[:2])
+        hit = (lowest <= top) & (highest >= top)
+        result.keys.append(KeyReach(index // layout.columns, index % layout.columns, tuple(float(v) for v in center),
+                                    bool(hit[0]), float(hit[1:].mean())))
+    return result
+
+
+def reach_layouts(rows: List[FingerTransform], layouts: List[KeyLayout], models: Dict[str, FingerModel] = None,
+                  samples: int = 2000000, cell: float = 1.0, key_height: float = DEFAULT_KEY_HEIGHT,
+                  voxels: bool = False) -> List[Tuple[FingerTransform, ReachMap, Optional[Coverage]]]:
+    """Sweeps every finger of a transform table and checks its layout, matched by name.
+
+    Every finger needs a model, since one default knuckle cannot suit them
+    all; fingers without a layout get no coverage.
+
+    :raises ValueError:
+        If some finger of the table has no model.
+    """
+    models = models or {}
+    missing = [row.name for row in rows if row.name not in models]
+    if missing:
+        raise ValueError(f'No hand model for {", ".join(missing)}')
+    by_name = {layout.name: layout for layout in layouts}
+    results = []
+    for row in rows:
+        reach = sweep(models[row.name], row, samples, cell, voxels=voxels)
+        layout = by_name.get(row.name)
+        results.append((row, reach, coverage(reach, layout, key_height) if layout else None))
+    return results
+
+
+def write_maps(path: str, results: List[Tuple[FingerTransform, ReachMap, Optional[Coverage]]]):
+    """Exports the maps with each finger's transform.
+
+    .npz keeps the arrays under <finger>_<array> names; anything else is written
+    as JSON for the palette, with column-major mm matrices for WebGL, null for
+    unreached cells and the per-key coverage.
+    """
+    if path.endswith('.npz'):
+        arrays = {}
+        for row, reach, _ in results:
+            arrays[f'{row.name}_matrix'] = np.array(transforms.finger_matrix(row, 'mm'))
+            arrays[f'{row.name}_origin'] = np.array([reach.along0, reach.across0, reach.height0])
+            arrays[f'{row.name}_cell'] = np.array(reach.cell)
+            arrays[f'{row.name}_lowest'] = reach.lowest
+            arrays[f'{row.name}_highest'] = reach.highest
+            arrays[f'{row.name}_counts'] = reach.counts
+            if reach.voxels is not None:
+                arrays[f'{row.name}_voxels'] = reach.voxels
+        np.savez_compressed(path, names=np.array([row.name for row, _, _ in results]), **arrays)
+    else:
+        fingers = []
+        for row, reach, result in results:
+            fingers.append({
+                'name': row.name,
+                'matrix': transforms.column_major(transforms.finger_matrix(row, 'mm')),
+                'plate': {'along': PLATE_ALONG, 'normal': PLATE_NORMAL},
+                'origin': [reach.along0, reach.across0],
+                'cell': reach.cell,
+                'samples': reach.samples,
+                'lowest': _nullable(reach.lowest),
+                'highest': _nullable(reach.highest),
+                'keys': [{'row': key.row, 'column': key.column, 'center': key.center,
+                          'reachable': key.reachable, 'fraction': round(key.fraction, 4)}
+                         for key in result.keys] if result else [],
+            })
+        with open(path, 'w') as f:
+            json.dump({'fingers': fingers}, f)
+    return path
+
+
+def format_coverage(results: List[Tuple[FingerTransform, ReachMap, Optional[Coverage]]]) -> str:
+    lines = []
+    for row, reach, result in results:
+        reached = int((reach.counts > 0).sum())
+        line = f'{row.name}: {reach.samples} samples over {reached} cells of {reach.cell:g} mm'
+        if result is None:
+            lines.append(f'{line}, no layout')
+            continue
+        lines.append(f'{line}, {result.reachable} of {len(result.keys)} keys reachable, '
+                     f'{100 * result.fraction:.1f}% of the cutout area')
+        for key in result.keys:
+            if not key.reachable:
+                lines.append(f'    row {key.row} column {key.column} at {_vector(key.center)} mm is out of reach')
+    return '\n'.join(lines)
+
+
+def _plate_coordinates(points: np.ndarray):
+    # Along, across and height of points on the base body; any leading shape.
+    along, normal = np.asarray(PLATE_ALONG), np.asarray(PLATE_NORMAL)
+    return points @ along, points @ np.cross(normal, along), points @ normal
+
+
+def _nullable(values: np.ndarray) -> list:
+    return [[None if np.isnan(v) else round(float(v), 3) for v in row] for row in values]
+
+
+def _vector(values) -> str:
+    return '(' + ', '.join(f'{v:.3f}' for v in values) + ')'
@@ -0,0 +1,103 @@
+import ast
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class FaceReport:
+    name: str
+    values: Dict[str, object] = field(default_factory=dict)
+
+
+@dataclass
+class BodyReport:
+    name: str
+    faces: List[FaceReport] = field(default_factory=list)
+
+
+def parse_report(text: str) -> List[BodyReport]:
+    """Parses the YAML-like report multiply_bases writes next to its transform table.
+
+    The format is fixed by describe_body:
+
+        - body_name:
+          FaceNNN:
+            Key: value
+
+    Values are numbers or lists of numbers; anything else is kept as a string.
+    """
+    bodies = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or ':' not in stripped:
+            continue
+        indent = len(line) - len(line.lstrip())
+        key, _, value = stripped.partition(':')
+        value = value.strip()
+
+        if key.startswith('- '):
+            bodies.append(BodyReport(key[2:].strip()))
+        elif indent <= 2 and not value and bodies:
+            bodies[-1].faces.append(FaceReport(key))
+        elif bodies and bodies[-1].faces:
+            bodies[-1].faces[-1].values[key] = _parse_value(value)
+    return bodies
+
+
+def read_report(path: str) -> List[BodyReport]:
+    with open(path, 'r') as f:
+        return parse_report(f.read())
+
+
+def diff_reports(before: List[BodyReport], after: List[BodyReport], tolerance: float = 1e-6) -> List[str]:
+    """Lists the differences between two reports.
+
+    Bodies are matched by name and order of appearance, faces by their order
+    within the body since face ids change between Fusion sessions. Numeric
+    values are compared with an absolute tolerance.
+    """
+    differences = []
+    before_bodies = _index_bodies(before)
+    after_bodies = _index_bodies(after)
+
+    for key in before_bodies.keys() - after_bodies.keys():
+        differences.append(f'{key[0]}: only in the first report')
+    for key in after_bodies.keys() - before_bodies.keys():
+        differences.append(f'{key[0]}: only in the second report')
+
+    for key in [key for key in before_bodies if key in after_bodies]:
+        a, b = before_bodies[key], after_bodies[key]
+        if len(a.faces) != len(b.faces):
+            differences.append(f'{a.name}: {len(a.faces)} faces became {len(b.faces)}')
+        for index, (face_a, face_b) in enumerate(zip(a.faces, b.faces)):
+            for name in sorted(face_a.values.keys() | face_b.values.keys()):
+                delta = _delta(face_a.values.get(name), face_b.values.get(name))
+                if delta is None or delta > tolerance:
+                    differences.append(f'{a.name} face {index} {name}: {face_a.values.get(name)} -> {face_b.values.get(name)}')
+    return differences
+
+
+def _index_bodies(bodies: List[BodyReport]) -> dict:
+    seen = {}
+    index = {}
+    for body in bodies:
+        seen[body.name] = seen.get(body.name, 0) + 1
+        index[(body.name, seen[body.name])] = body
+    return index
+
+
+def _parse_value(value: str):
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def _delta(a, b):
+    # Largest absolute difference, or None when the values cannot be compared.
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return abs(a - b)
+    if isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+        deltas = [_delta(x, y) for x, y in zip(a, b)]
+        return None if None in deltas else max(deltas, default=0.0)
+    return 0.0 if a == b else None
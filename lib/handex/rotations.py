@@ -0,0 +1,243 @@
+"""Vectorized rotations: Euler angles, quaternions, axis-angle and matrices.
+
+Every function takes stacks of rotations, (n, 3) angles, (n, 4) quaternions
+or (n, 3, 3) matrices, and also accepts a single rotation.
+
+Conventions, pinned to create_finger_base:
+
+- Angles are in degrees unless degrees=False.
+- Lower-case orders are extrinsic, rotations about the fixed world axes in
+  the order given. create_finger_base rotates about world x, then y, then z,
+  which is order 'xyz' and the matrix Rz Ry Rx. This is the default.
+- Upper-case orders are intrinsic, about the rotated axes; 'ZYX' with angles
+  (c, b, a) is the same rotation as 'xyz' with (a, b, c).
+- Quaternions are scalar first, (w, x, y, z), as in pytransform3d, and are
+  returned with w >= 0.
+- Rotations are right-handed and act on column vectors, v' = R v.
+"""
+
+import numpy as np
+
+AXES = 'xyz'
+FINGER_ORDER = 'xyz'
+
+
+def euler_to_matrix(angles, order: str = FINGER_ORDER, degrees: bool = True) -> np.ndarray:
+    """Converts (n, 3) Euler angles, given in the order of the axes in order, to (n, 3, 3) matrices."""
+    angles, single = _stack(angles, 1)
+    i, j, k, angles = _extrinsic(order, angles)
+    if degrees:
+        angles = np.radians(angles)
+    return _unstack(_axis_matrix(k, angles[:, 2]) @ _axis_matrix(j, angles[:, 1]) @ _axis_matrix(i, angles[:, 0]), single)
+
+
+def matrix_to_euler(matrices, order: str = FINGER_ORDER, degrees: bool = True) -> np.ndarray:
+    """Converts (n, 3, 3) matrices to Euler angles in the given order.
+
+    The middle angle is kept within -90..90 degrees. At gimbal lock, where it
+    is +-90 degrees, the first angle is set to 0.
+    """
+    r, single = _stack(matrices, 2)
+    i, j, k, _ = _extrinsic(order, np.zeros((0, 3)))
+    # +1 for cyclic axis orders such as xyz, -1 for the others such as xzy.
+    e = 1.0 if (j - i) % 3 == 1 else -1.0
+
+    middle = np.arcsin(np.clip(-e * r[:, k, i], -1.0, 1.0))
+    locked = np.abs(r[:, k, i]) > 1 - 1e-9
+    first = np.where(locked, 0.0, np.arctan2(e * r[:, k, j], r[:, k, k]))
+    last = np.where(locked,
+                    np.arctan2(-e * r[:, i, j], r[:, j, j]),
+                    np.arctan2(e * r[:, j, i], r[:, i, i]))
+
+    angles = np.stack([first, middle, last], axis=1)
+    if degrees:
+        angles = np.degrees(angles)
+    if order.isupper():
+        angles = angles[:, ::-1]
+    return _unstack(angles, single)
+
+
+def quaternion_to_matrix(quaternions) -> np.ndarray:
+    q, single = _stack(quaternions, 1)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    w, x, y, z = q.T
+    r = np.empty((len(q), 3, 3))
+    r[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    r[:, 0, 1] = 2 * (x * y - z * w)
+    r[:, 0, 2] = 2 * (x * z + y * w)
+    r[:, 1, 0] = 2 * (x * y + z * w)
+    r[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    r[:, 1, 2] = 2 * (y * z - x * w)
+    r[:, 2, 0] = 2 * (x * z - y * w)
+    r[:, 2, 1] = 2 * (y * z + x * w)
+    r[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return _unstack(r, single)
+
+
+def matrix_to_quaternion(matrices) -> np.ndarray:
+    """Converts matrices to unit quaternions with w >= 0.
+
+    Uses the largest of w, x, y, z to divide by, so the result stays accurate
+    near 180 degree rotations.
+    """
+    r, single = _stack(matrices, 2)
+    trace = np.trace(r, axis1=1, axis2=2)
+    diagonal = np.stack([trace, r[:, 0, 0], r[:, 1, 1], r[:, 2, 2]], axis=1)
+    pick = np.argmax(diagonal, axis=1)
+
+    q = np.empty((len(r), 4))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for index in range(4):
+            rows = pick == index
+            m = r[rows]
+            if index == 0:
+                s = 2 * np.sqrt(1 + trace[rows])
+                q[rows] = np.stack([s / 4, (m[:, 2, 1] - m[:, 1, 2]) / s,
+                                    (m[:, 0, 2] - m[:, 2, 0]) / s, (m[:, 1, 0] - m[:, 0, 1]) / s], axis=1)
+                continue
+            a = index - 1
+            b, c = (a + 1) % 3, (a + 2) % 3
+            s = 2 * np.sqrt(1 + m[:, a, a] - m[:, b, b] - m[:, c, c])
+            q[rows, 0] = (m[:, c, b] - m[:, b, c]) / s
+            q[rows, 1 + a] = s / 4
+            q[rows, 1 + b] = (m[:, a, b] + m[:, b, a]) / s
+            q[rows, 1 + c] = (m[:, a, c] + m[:, c, a]) / s
+    return _unstack(_canonical(q), single)
+
+
+def euler_to_quaternion(angles, order: str = FINGER_ORDER, degrees: bool = True) -> np.ndarray:
+    return matrix_to_quaternion(euler_to_matrix(angles, order, degrees))
+
+
+def quaternion_to_euler(quaternions, order: str = FINGER_ORDER, degrees: bool = True) -> np.ndarray:
+    return matrix_to_euler(quaternion_to_matrix(quaternions), order, degrees)
+
+
+def axis_angle_to_quaternion(axes, angles, degrees: bool = True) -> np.ndarray:
+    """Converts (n, 3) axes, which need not be unit length, and (n,) angles to quaternions."""
+    axes, single = _stack(axes, 1)
+    angles = np.radians(angles) if degrees else np.asarray(angles, dtype=np.float64)
+    angles = np.broadcast_to(angles, (len(axes),))
+    half = angles / 2
+    axes = axes / np.linalg.norm(axes, axis=1, keepdims=True)
+    q = np.concatenate([np.cos(half)[:, None], axes * np.sin(half)[:, None]], axis=1)
+    return _unstack(_canonical(q), single)
+
+
+def quaternion_to_axis_angle(quaternions, degrees: bool = True):
+    """Converts quaternions to (axes, angles) with angles in 0..180 degrees.
+
+    The identity has no axis; x is returned for it.
+    """
+    q, single = _stack(quaternions, 1)
+    q = _canonical(q / np.linalg.norm(q, axis=1, keepdims=True))
+    length = np.linalg.norm(q[:, 1:], axis=1)
+    angles = 2 * np.arctan2(length, q[:, 0])
+    axes = np.where(length[:, None] > 1e-12, q[:, 1:] / np.maximum(length, 1e-300)[:, None], [1.0, 0.0, 0.0])
+    if degrees:
+        angles = np.degrees(angles)
+    return _unstack(axes, single), (angles[0] if single else angles)
+
+
+def axis_angle_to_matrix(axes, angles, degrees: bool = True) -> np.ndarray:
+    return quaternion_to_matrix(axis_angle_to_quaternion(axes, angles, degrees))
+
+
+def matrix_to_axis_angle(matrices, degrees: bool = True):
+    return quaternion_to_axis_angle(matrix_to_quaternion(matrices), degrees)
+
+
+def quaternion_multiply(a, b) -> np.ndarray:
+    """Hamilton product a b, the rotation b followed by a."""
+    a, single_a = _stack(a, 1)
+    b, single_b = _stack(b, 1)
+    aw, ax, ay, az = a.T
+    bw, bx, by, bz = b.T
+    q = np.stack([
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ], axis=1)
+    return _unstack(q, single_a and single_b)
+
+
+def angle_between(a, b, degrees: bool = True) -> np.ndarray:
+    """Angle of the rotation that takes matrices a to matrices b."""
+    a, single = _stack(a, 2)
+    b, _ = _stack(b, 2)
+    trace = np.einsum('nij,nij->n', a, b)
+    angles = np.arccos(np.clip((trace - 1) / 2, -1.0, 1.0))
+    angles = np.degrees(angles) if degrees else angles
+    return angles[0] if single else angles
+
+
+def slerp(q0, q1, t) -> np.ndarray:
+    """Spherical linear interpolation between quaternions along the shorter arc.
+
+    Arguments:
+    q0 -- Start quaternions, (4,) or (n, 4).
+    q1 -- End quaternions, (4,) or (n, 4).
+    t -- Interpolation parameters; a scalar, (n,) or (frames, n) array.
+
+    :returns:
+        Quaternions shaped t.shape + (4,), or (n, 4) for a scalar t.
+    """
+    q0 = np.atleast_2d(np.asarray(q0, dtype=np.float64))
+    q1 = np.atleast_2d(np.asarray(q1, dtype=np.float64))
+    t = np.asarray(t, dtype=np.float64)
+    if t.ndim == 0:
+        t = np.broadcast_to(t, (max(len(q0), len(q1)),))
+
+    q0 = q0 / np.linalg.norm(q0, axis=1, keepdims=True)
+    q1 = q1 / np.linalg.norm(q1, axis=1, keepdims=True)
+    cos = np.einsum('ni,ni->n', q0, q1)
+    q1 = np.where(cos[:, None] < 0, -q1, q1)
+    cos = np.abs(cos)
+
+    theta = np.arccos(np.clip(cos, -1.0, 1.0))
+    sin = np.sin(theta)
+    # Nearly identical rotations fall back to normalized linear interpolation.
+    linear = sin < 1e-6
+    safe = np.where(linear, 1.0, sin)
+    w0 = np.where(linear, 1 - t, np.sin((1 - t) * theta) / safe)
+    w1 = np.where(linear, t, np.sin(t * theta) / safe)
+    q = w0[..., None] * q0 + w1[..., None] * q1
+    return _canonical(q / np.linalg.norm(q, axis=-1, keepdims=True))
+
+
+def _axis_matrix(axis: int, angles: np.ndarray) -> np.ndarray:
+    # Right-handed rotations about one world axis, matching transforms.rotation.
+    c, s = np.cos(angles), np.sin(angles)
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    r = np.zeros((len(angles), 3, 3))
+    r[:, axis, axis] = 1.0
+    r[:, i, i] = c
+    r[:, i, j] = -s
+    r[:, j, i] = s
+    r[:, j, j] = c
+    return r
+
+
+def _extrinsic(order: str, angles: np.ndarray):
+    # Intrinsic orders are the reversed extrinsic order with reversed angles.
+    if len(order) != 3 or sorted(order.lower()) != sorted(AXES) or not (order.islower() or order.isupper()):
+        raise ValueError(f'unsupported Euler order {order!r}, expected e.g. "xyz" or "ZYX"')
+    axes = [AXES.index(a) for a in order.lower()]
+    if order.isupper():
+        axes, angles = axes[::-1], angles[:, ::-1]
+    return axes[0], axes[1], axes[2], angles
+
+
+def _canonical(q: np.ndarray) -> np.ndarray:
+    return np.where(q[..., :1] < 0, -q, q)
+
+
+def _stack(values, inner: int):
+    values = np.asarray(values, dtype=np.float64)
+    single = values.ndim == inner
+    return (values[None] if single else values), single
+
+
+def _unstack(values: np.ndarray, single: bool) -> np.ndarray:
+    return values[0] if single else values
@@ -0,0 +1,364 @@
+"""Seeding finger transforms from a hand scan.
+
+The scan is memory-mapped and reduced to voxel centroids in four chunked
+passes over the point buffer, for the lower and upper voxel bounds, the
+voxel keys and the per-voxel sums; nothing after that reads the points.
+On the voxels:
+
+1. A principal component analysis gives the hand's length axis, pointing to
+   the fingertips, and the normal of the palm.
+2. Sweeping a plane down the length axis, every finger starts as its own
+   connected component at the tip and ends where it merges with a
+   neighbour, the web between the fingers. That gives a tip and a knuckle
+   cluster for each finger.
+3. A capsule fitted between knuckle and tip is refined against the finger's
+   voxels with point-to-surface ICP, pairing each voxel with its closest
+   point on the capsule's surface.
+
+Each fitted finger frame has z along the finger from knuckle to tip, y along
+the back of the hand (the palm normal with sign chosen by flip_normal) and
+its origin at the tip. The frame is written as the translation and x, y, z
+angles that make create_finger_base place the base body in that frame.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from . import rotations
+from .transforms import PIVOT_OFFSET, FingerTransform
+
+FINGER_NAMES = ('thumb', 'index', 'middle', 'ring', 'pinky')
+
+VOXEL_SIZE = 1.5        # mm
+MIN_FINGER_LENGTH = 15  # mm of free finger between web and tip
+CHUNK_SIZE = 1 << 20
+ICP_ITERATIONS = 20
+
+_PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+# Half of the 26 neighbours of a voxel; the other half are their negatives.
+_NEIGHBOURS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)
+                        if (x, y, z) > (0, 0, 0)])
+
+
+@dataclass
+class Voxels:
+    centroids: np.ndarray  # (m, 3) mean of the points in each voxel
+    cells: np.ndarray      # (m, 3) integer voxel coordinates
+    counts: np.ndarray     # (m,) points per voxel
+
+
+@dataclass
+class Finger:
+    name: str
+    tip: np.ndarray
+    knuckle: np.ndarray
+    rotation: np.ndarray   # 3x3, columns are the finger frame's x, y, z
+    members: np.ndarray    # voxel indices of the free finger
+    rms: float             # ICP residual in mm
+
+    def transform(self) -> FingerTransform:
+        """The table row that places the base body in this finger's frame.
+
+        create_finger_base maps x to R (x - PIVOT_OFFSET) + t + PIVOT_OFFSET,
+        so for the frame x -> R x + tip the translation is
+        t = tip - PIVOT_OFFSET + R PIVOT_OFFSET.
+        """
+        offset = np.asarray(PIVOT_OFFSET)
+        t = self.tip - offset + self.rotation @ offset
+        angles = rotations.matrix_to_euler(self.rotation)
+        return FingerTransform(self.name, *(round(float(v), 3) for v in t), *(round(float(v), 2) for v in angles))
+
+
+def load_points(path: str) -> np.ndarray:
+    """Returns the scan's points as an (n, 3) array.
+
+    Binary PLY and .npy files are memory-mapped; for PLY the result is a
+    strided view of the x, y, z properties, so nothing is copied until it
+    is read. ASCII PLY and XYZ text files have to be parsed.
+    """
+    if path.lower().endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if path.lower().endswith('.ply'):
+        return _load_ply(path)
+    return np.loadtxt(path, usecols=(0, 1, 2), ndmin=2)
+
+
+def voxel_downsample(points: np.ndarray, size: float = VOXEL_SIZE) -> Voxels:
+    """Averages the points in each occupied voxel, reading the points in chunks."""
+    chunks = range(0, len(points), CHUNK_SIZE)
+    lower = np.min([np.floor(np.min(points[s:s + CHUNK_SIZE], axis=0) / size) for s in chunks], axis=0).astype(np.int64)
+    upper = np.max([np.floor(np.max(points[s:s + CHUNK_SIZE], axis=0) / size) for s in chunks], axis=0).astype(np.int64)
+    dims = upper - lower + 1
+
+    keys = np.concatenate([_pack(np.floor(points[s:s + CHUNK_SIZE] / size).astype(np.int64) - lower, dims) for s in chunks])
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    sums = np.zeros((len(unique), 3))
+    for s in chunks:
+        chunk = np.asarray(points[s:s + CHUNK_SIZE], dtype=np.float64)
+        for axis in range(3):
+            sums[:, axis] += np.bincount(inverse[s:s + CHUNK_SIZE], chunk[:, axis], len(unique))
+    return Voxels(sums / counts[:, None], _unpack(unique, dims) + lower, counts)
+
+
+def hand_axes(voxels: Voxels, flip_normal: bool = False):
+    """Returns (centre, length axis towards the fingertips, across axis, palm normal)."""
+    centre = np.average(voxels.centroids, axis=0, weights=voxels.counts)
+    _, _, axes = np.linalg.svd(voxels.centroids - centre, full_matrices=False)
+    length, across, normal = axes
+
+    # The fingertip end is split into more pieces than the wrist end.
+    h = (voxels.centroids - centre) @ length
+    band = 0.2 * (h.max() - h.min())
+    edges = _edges(voxels.cells)
+    top = len(_components(len(h), edges, h >= h.max() - band))
+    bottom = len(_components(len(h), edges, h <= h.min() + band))
+    if bottom > top:
+        length, across = -length, -across
+    if flip_normal:
+        normal, across = -normal, -across
+    return centre, length, across, normal
+
+
+def find_fingers(voxels: Voxels, length: np.ndarray, min_length: float = MIN_FINGER_LENGTH) -> List[dict]:
+    """Finds free fingers by sweeping down the length axis.
+
+    Voxels are added in order of height. A new component is a new tip; when
+    two components that are both longer than min_length meet, the fingers in
+    them end at that height, which is the web between them.
+
+    :returns:
+        One dict per finger with 'tip_height', 'web_height' and 'members'.
+    """
+    h = voxels.centroids @ length
+    order = np.argsort(-h)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    # Group every edge under whichever of its voxels is added last.
+    a, b = _edges(voxels.cells)
+    later = np.where(rank[a] > rank[b], a, b)
+    earlier = np.where(rank[a] > rank[b], b, a)
+    by_later = np.argsort(rank[later], kind='stable')
+    later, earlier = later[by_later], earlier[by_later]
+    starts = np.searchsorted(rank[later], np.arange(len(order) + 1))
+
+    parent = np.arange(len(order))
+    members = {}
+    closed = np.zeros(len(order), dtype=bool)
+    found = []
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    # Every root is the highest voxel of its component, so h[root] is its tip.
+    for position, v in enumerate(order):
+        members[v] = [v]
+        for u in earlier[starts[position]:starts[position + 1]]:
+            root_u, root_v = find(u), find(v)
+            if root_u == root_v:
+                continue
+            if h[root_u] - h[v] >= min_length and h[root_v] - h[v] >= min_length:
+                for root in (root_u, root_v):
+                    if not closed[root]:
+                        closed[root] = True
+                        found.append({'tip_height': h[root], 'web_height': h[v], 'members': np.array(members[root])})
+
+            # The component with the higher tip survives the merge.
+            if h[root_u] < h[root_v]:
+                root_u, root_v = root_v, root_u
+            if len(members[root_v]) > len(members[root_u]):
+                members[root_u], members[root_v] = members[root_v], members[root_u]
+            members[root_u].extend(members.pop(root_v))
+            parent[root_v] = root_u
+    return found
+
+
+def fit_finger(voxels: Voxels, members: np.ndarray, length: np.ndarray, normal: np.ndarray, web_height: float) -> tuple:
+    """Refines a finger's frame with ICP of a capsule against its voxels.
+
+    :returns:
+        (tip, knuckle, rotation, rms residual).
+    """
+    points = voxels.centroids[members]
+    h = points @ length
+    step = 2 * VOXEL_SIZE
+    tip = points[h >= h.max() - step].mean(axis=0)
+    knuckle = points[h <= web_height + step].mean(axis=0)
+
+    rotation, origin = _frame(tip - knuckle, normal), knuckle
+    finger_length = np.linalg.norm(tip - knuckle)
+    local = (points - knuckle) @ rotation
+    radius = max(float(np.median(np.hypot(local[:, 0], local[:, 1]))), VOXEL_SIZE)
+
+    # Point-to-surface ICP: the closest point on a capsule is known in closed form.
+    for _ in range(ICP_ITERATIONS):
+        closest = _capsule_closest((points - origin) @ rotation, finger_length, radius)
+        rotation, origin = _kabsch(closest, points)
+    closest = _capsule_closest((points - origin) @ rotation, finger_length, radius)
+    residual = points - (closest @ rotation.T + origin)
+    rms = float(np.sqrt(np.mean(np.sum(residual ** 2, axis=1))))
+
+    # A capsule does not fix the roll about its axis; take it from the palm normal again.
+    rotation = _frame(rotation[:, 2], normal)
+    return origin + finger_length * rotation[:, 2], origin, rotation, rms
+
+
+def fit_scan(path: str, voxel_size: float = VOXEL_SIZE, scale: float = 1.0, flip_normal: bool = False,
+             min_length: float = MIN_FINGER_LENGTH) -> List[Finger]:
+    """Loads a hand scan and fits a frame to every finger found in it.
+
+    Arguments:
+    path -- A .ply, .npy or .xyz scan.
+    voxel_size -- Voxel edge in mm used for downsampling.
+    scale -- Multiplies the scan's coordinates to get millimetres.
+    flip_normal -- Use the other side of the palm as the back of the hand.
+    min_length -- Shortest free finger, in mm, that is not treated as noise.
+
+    :returns:
+        Fingers named thumb .. pinky when five are found, finger1 .. otherwise.
+    """
+    points = load_points(path)
+    voxels = voxel_downsample(points, voxel_size / scale)
+    voxels.centroids *= scale
+
+    _, length, across, normal = hand_axes(voxels, flip_normal)
+    found = find_fingers(voxels, length, min_length)
+    fingers = []
+    for finger in found:
+        tip, knuckle, rotation, rms = fit_finger(voxels, finger['members'], length, normal, finger['web_height'])
+        fingers.append(Finger('', tip, knuckle, rotation, finger['members'], rms))
+
+    if len(fingers) == len(FINGER_NAMES):
+        # The thumb ends lowest down the hand; the others follow from its side.
+        thumb = min(fingers, key=lambda f: f.tip @ length)
+        others = sorted((f for f in fingers if f is not thumb), key=lambda f: abs((f.knuckle - thumb.knuckle) @ across))
+        for finger, name in zip([thumb] + others, FINGER_NAMES):
+            finger.name = name
+        return [thumb] + others
+    fingers.sort(key=lambda f: f.knuckle @ across)
+    for index, finger in enumerate(fingers):
+        finger.name = f'finger{index + 1}'
+    return fingers
+
+
+def _load_ply(path: str) -> np.ndarray:
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b'ply':
+            raise ValueError(f'{path} is not a PLY file')
+        fmt, count, element, properties, header_lines = None, None, None, [], 1
+        while True:
+            line = f.readline()
+            header_lines += 1
+            if not line:
+                raise ValueError(f'{path}: PLY header has no end_header')
+            words = line.decode('ascii').split()
+            if not words:
+                continue
+            if words[0] == 'format':
+                fmt = words[1]
+            elif words[0] == 'element':
+                if element is None and words[1] != 'vertex':
+                    raise ValueError(f'{path}: vertices must be the first PLY element')
+                element = words[1]
+                if element == 'vertex':
+                    count = int(words[2])
+            elif words[0] == 'property' and element == 'vertex':
+                if words[1] == 'list':
+                    raise ValueError(f'{path}: list properties on vertices are not supported')
+                properties.append((words[2], _PLY_TYPES[words[1]]))
+            elif words[0] == 'end_header':
+                break
+        offset = f.tell()
+
+    names = [name for name, _ in properties]
+    if fmt == 'ascii':
+        return np.loadtxt(path, skiprows=header_lines, max_rows=count, usecols=[names.index(c) for c in 'xyz'], ndmin=2)
+    endian = '<' if fmt == 'binary_little_endian' else '>'
+    vertices = np.memmap(path, dtype=np.dtype([(name, endian + kind) for name, kind in properties]), mode='r',
+                         offset=offset, shape=(count,))
+
+    fields = vertices.dtype.fields
+    (x_type, x_offset), (y_type, y_offset), (z_type, z_offset) = (fields[c][:2] for c in 'xyz')
+    size = x_type.itemsize
+    if x_type == y_type == z_type and y_offset - x_offset == size and z_offset - y_offset == size:
+        return np.ndarray((count, 3), dtype=x_type, buffer=vertices, offset=x_offset, strides=(vertices.dtype.itemsize, size))
+    return np.stack([vertices['x'], vertices['y'], vertices['z']], axis=1)
+
+
+def _pack(cells: np.ndarray, dims: np.ndarray) -> np.ndarray:
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+
+def _unpack(keys: np.ndarray, dims: np.ndarray) -> np.ndarray:
+    return np.stack([keys // (dims[1] * dims[2]), keys // dims[2] % dims[1], keys % dims[2]], axis=1)
+
+
+def _edges(cells: np.ndarray):
+    # Pairs of 26-connected voxels, found by looking up neighbour keys in the sorted keys.
+    lower = cells.min(axis=0) - 1
+    dims = cells.max(axis=0) - lower + 2
+    keys = _pack(cells - lower, dims)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    a, b = [], []
+    for offset in _NEIGHBOURS:
+        neighbour = _pack(cells - lower + offset, dims)
+        index = np.minimum(np.searchsorted(sorted_keys, neighbour), len(keys) - 1)
+        hit = sorted_keys[index] == neighbour
+        a.append(np.flatnonzero(hit))
+        b.append(order[index[hit]])
+    return np.concatenate(a), np.concatenate(b)
+
+
+def _components(n: int, edges, active: np.ndarray) -> List[np.ndarray]:
+    # Connected components of the active voxels by label propagation with pointer jumping.
+    a, b = edges
+    keep = active[a] & active[b]
+    a, b = a[keep], b[keep]
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, labels[a], labels[b])
+        np.minimum.at(labels, labels[b], labels[a])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    labels = labels[active]
+    return [np.flatnonzero(active)[labels == label] for label in np.unique(labels)]
+
+
+def _frame(direction: np.ndarray, normal: np.ndarray) -> np.ndarray:
+    z = direction / np.linalg.norm(direction)
+    y = normal - (normal @ z) * z
+    y /= np.linalg.norm(y)
+    return np.stack([np.cross(y, z), y, z], axis=1)
+
+
+def _capsule_closest(local: np.ndarray, length: float, radius: float) -> np.ndarray:
+    # Closest points on a capsule from the origin along +z to points in its frame.
+    axis = np.zeros_like(local)
+    axis[:, 2] = np.clip(local[:, 2], 0.0, length)
+    offset = local - axis
+    distance = np.linalg.norm(offset, axis=1, keepdims=True)
+    return axis + radius * offset / np.maximum(distance, 1e-12)
+
+
+def _kabsch(source: np.ndarray, target: np.ndarray):
+    # Rotation and translation that best map source onto target in the least squares sense.
+    source_centre, target_centre = source.mean(axis=0), target.mean(axis=0)
+    u, _, vt = np.linalg.svd((source - source_centre).T @ (target - target_centre))
+    d = np.sign(np.linalg.det(vt.T @ u.T))
+    rotation = vt.T @ np.diag([1.0, 1.0, d]) @ u.T
+    return rotation, target_centre - rotation @ source_centre
@@ -0,0 +1,186 @@
+"""Monte Carlo tolerance stacks for finger transforms.
+
+Every sample perturbs the six transform parameters of every finger with
+independent normal errors, composes the finger matrices exactly as
+create_finger_base does, and measures where a point on the finger (the tip)
+ends up. The tip should be far from the rotation pivot near the base body's
+origin, or rotation errors barely move it. Neighbouring fingers are compared
+by the distance between their tips, a centre distance rather than a
+clearance between the bodies. Samples are processed as (n, 3, 3) rotation stacks in chunks, so
+memory stays bounded while each chunk is a handful of NumPy operations.
+"""
+
+from concurrent import futures
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from . import rotations
+from .transforms import FIELDS, PIVOT_OFFSET, FingerTransform
+
+CHUNK_SIZE = 262144
+
+
+@dataclass
+class Tolerances:
+    translation: float = 0.1  # standard deviation in mm
+    rotation: float = 0.5     # standard deviation in degrees
+
+
+@dataclass
+class FingerSpread:
+    name: str
+    nominal_tip: Tuple[float, float, float]
+    tip_std: Tuple[float, float, float]
+    tip_p95: float
+    tip_max: float
+    angle_p95: float
+    angle_max: float
+
+
+@dataclass
+class TipDistanceSpread:
+    """Spread of the distance between the tips of two neighbouring fingers."""
+    a: str
+    b: str
+    nominal: float
+    std: float
+    minimum: float
+    p05: float
+    # Share of samples where the tips close in by more than the allowance.
+    violations: float = 0.0
+
+
+@dataclass
+class ToleranceReport:
+    samples: int
+    fingers: List[FingerSpread] = field(default_factory=list)
+    distances: List[TipDistanceSpread] = field(default_factory=list)
+
+
+def fingers_from_parameters(values: Dict[str, float]) -> List[FingerTransform]:
+    """Collects the <Finger>_tx .. <Finger>_rz parameters into transforms, in file order."""
+    names = []
+    for key in values:
+        finger, _, suffix = key.rpartition('_')
+        if finger and suffix in FIELDS and finger not in names:
+            names.append(finger)
+    return [FingerTransform(name, *(values.get(f'{name}_{f}', 0.0) for f in FIELDS)) for name in names]
+
+
+def place_points(translations: np.ndarray, angles: np.ndarray, point: Sequence[float]) -> np.ndarray:
+    """Where create_finger_base moves a point, for (n, 3) translations in mm and angles in degrees.
+
+    With pivot p = t + PIVOT_OFFSET the finger matrix maps x to
+    R (x + t - p) + p, which is R (x - PIVOT_OFFSET) + t + PIVOT_OFFSET.
+    """
+    offset = np.asarray(PIVOT_OFFSET)
+    local = np.asarray(point, dtype=np.float64) - offset
+    return rotations.euler_to_matrix(angles) @ local + translations + offset
+
+
+def sample_chunk(fingers: List[FingerTransform], tolerances: Tolerances, tip: Sequence[float], samples: int, seed) -> dict:
+    """Runs one chunk of samples and returns the raw per-sample metrics.
+
+    :returns:
+        A dict with 'tips' (fingers, n, 3) in mm and 'angles' (fingers, n) in
+        degrees between the sampled and nominal orientation.
+    """
+    rng = np.random.default_rng(seed)
+    tips = np.empty((len(fingers), samples, 3))
+    angles = np.empty((len(fingers), samples))
+    for index, finger in enumerate(fingers):
+        t = np.asarray(finger.translation) + rng.normal(0.0, tolerances.translation, (samples, 3))
+        a = np.asarray(finger.angles) + rng.normal(0.0, tolerances.rotation, (samples, 3))
+        tips[index] = place_points(t, a, tip)
+
+        nominal = np.broadcast_to(rotations.euler_to_matrix(finger.angles), (samples, 3, 3))
+        angles[index] = rotations.angle_between(nominal, rotations.euler_to_matrix(a))
+    return {'tips': tips, 'angles': angles}
+
+
+def simulate(
+        fingers: List[FingerTransform],
+        tip: Sequence[float],
+        samples: int = 1000000,
+        tolerances: Tolerances = Tolerances(),
+        workers: int = 1,
+        seed: int = None,
+        allowance: float = None
+) -> ToleranceReport:
+    """Samples perturbed finger transforms and summarizes the spread.
+
+    Arguments:
+    fingers -- Nominal transforms, in mm and degrees.
+    tip -- Point on the base body, in mm, whose placement is measured, such as
+           the far end of the finger. Points near the pivot hide rotation errors.
+    samples -- Number of Monte Carlo samples.
+    tolerances -- Standard deviations applied to every translation and rotation.
+    workers -- Processes to spread the chunks over. 1 runs in this process.
+    seed -- Seed for reproducible runs.
+    allowance -- How much, in mm, neighbouring tips may close in before the sample
+                 counts as a violation, usually GapWidth.
+
+    :returns:
+        A ToleranceReport with per-finger tip and orientation spread and the
+        spread of the centre distance between neighbouring fingers' tips.
+    """
+    sizes = [min(CHUNK_SIZE, samples - start) for start in range(0, samples, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(fingers, tolerances, tuple(tip), size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    if workers > 1:
+        with futures.ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(sample_chunk, *zip(*jobs)))
+    else:
+        chunks = [sample_chunk(*job) for job in jobs]
+
+    tips = np.concatenate([chunk['tips'] for chunk in chunks], axis=1)
+    angles = np.concatenate([chunk['angles'] for chunk in chunks], axis=1)
+    nominal_tips = [place_points(np.asarray([f.translation], dtype=np.float64), np.asarray([f.angles], dtype=np.float64), tip)[0]
+                    for f in fingers]
+
+    report = ToleranceReport(samples)
+    for index, finger in enumerate(fingers):
+        displacement = np.linalg.norm(tips[index] - nominal_tips[index], axis=1)
+        report.fingers.append(FingerSpread(
+            finger.name,
+            tuple(float(v) for v in nominal_tips[index]),
+            tuple(float(v) for v in tips[index].std(axis=0)),
+            float(np.percentile(displacement, 95)),
+            float(displacement.max()),
+            float(np.percentile(angles[index], 95)),
+            float(angles[index].max()),
+        ))
+    for index in range(len(fingers) - 1):
+        distance = np.linalg.norm(tips[index + 1] - tips[index], axis=1)
+        nominal = float(np.linalg.norm(nominal_tips[index + 1] - nominal_tips[index]))
+        report.distances.append(TipDistanceSpread(
+            fingers[index].name,
+            fingers[index + 1].name,
+            nominal,
+            float(distance.std()),
+            float(distance.min()),
+            float(np.percentile(distance, 5)),
+            float(np.mean(distance < nominal - allowance)) if allowance is not None else 0.0,
+        ))
+    return report
+
+
+def format_report(report: ToleranceReport) -> str:
+    lines = [f'{report.samples} samples']
+    for finger in report.fingers:
+        lines.append(f'{finger.name}: tip at {_vector(finger.nominal_tip)} mm, '
+                     f'std {_vector(finger.tip_std)} mm, '
+                     f'moves <= {finger.tip_p95:.3f} mm (95%), {finger.tip_max:.3f} mm max, '
+                     f'turns <= {finger.angle_p95:.3f} deg (95%), {finger.angle_max:.3f} deg max')
+    for distance in report.distances:
+        lines.append(f'{distance.a} to {distance.b} tip centre distance: {distance.nominal:.3f} mm nominal, '
+                     f'std {distance.std:.3f} mm, >= {distance.p05:.3f} mm (95%), {distance.minimum:.3f} mm min, '
+                     f'{100 * distance.violations:.2f}% closer than allowed')
+    return '\n'.join(lines)
+
+
+def _vector(values) -> str:
+    return '(' + ', '.join(f'{v:.3f}' for v in values) + ')'
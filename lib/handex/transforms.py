@@ -0,0 +1,142 @@
+import csv
+import math
+from dataclasses import dataclass, astuple
+from typing import List
+
+# Columns of a fingerTransforms*.csv table after the finger name.
+# Translations are in millimetres, rotations in degrees.
+FIELDS = ('tx', 'ty', 'tz', 'rx', 'ry', 'rz')
+
+# create_finger_base rotates about the translated origin shifted by this
+# offset, in millimetres.
+PIVOT_OFFSET = (0.0, 0.5, 0.0)
+
+# Appended to finger names in a mirrored table, so the mirrored bodies are
+# {name}_mirrored_generated next to the originals.
+MIRROR_SUFFIX = '_mirrored'
+
+
+@dataclass
+class FingerTransform:
+    name: str
+    tx: float
+    ty: float
+    tz: float
+    rx: float
+    ry: float
+    rz: float
+
+    @property
+    def translation(self):
+        return (self.tx, self.ty, self.tz)
+
+    @property
+    def angles(self):
+        return (self.rx, self.ry, self.rz)
+
+    def as_row(self) -> dict:
+        return dict(zip(('name',) + FIELDS, astuple(self)))
+
+
+def mm(millimeters: float) -> float:
+    """Converts millimetres to centimetres, Fusion's internal length unit."""
+    return millimeters / 10.0
+
+
+def deg(degrees: float) -> float:
+    """Converts degrees to radians."""
+    return degrees * math.pi / 180.0
+
+
+def read_table(path: str) -> List[FingerTransform]:
+    """Reads a fingerTransforms*.csv file."""
+    with open(path, 'r', newline='') as csvfile:
+        return [FingerTransform(row['name'], *(float(row[field]) for field in FIELDS))
+                for row in csv.DictReader(csvfile)]
+
+
+def validate_table(path: str) -> List[str]:
+    """Checks a transform table and returns a list of problems, empty if it is valid."""
+    problems = []
+    with open(path, 'r', newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        missing = [column for column in ('name',) + FIELDS if column not in (reader.fieldnames or [])]
+        if missing:
+            return [f'missing columns: {", ".join(missing)}']
+
+        names = set()
+        for line, row in enumerate(reader, start=2):
+            name = (row['name'] or '').strip()
+            if not name:
+                problems.append(f'line {line}: empty name')
+            elif name in names:
+                problems.append(f'line {line}: duplicate finger {name}')
+            names.add(name)
+
+            for field in FIELDS:
+                try:
+                    value = float(row[field])
+                except (TypeError, ValueError):
+                    problems.append(f'line {line}: {field} is not a number: {row[field]!r}')
+                    continue
+                if not math.isfinite(value):
+                    problems.append(f'line {line}: {field} is not finite')
+                elif field.startswith('r') and abs(value) > 360:
+                    problems.append(f'line {line}: {field} is outside -360..360 degrees')
+    return problems
+
+
+def write_table(path: str, transforms: List[FingerTransform]):
+    """Writes transforms in the fingerTransforms*.csv format."""
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=('name',) + FIELDS, lineterminator='\r\n')
+        writer.writeheader()
+        for transform in transforms:
+            writer.writerow(transform.as_row())
+
+
+def rotation(axis: int, degrees: float) -> list:
+    """Returns the 3x3 right-handed rotation about the x (0), y (1) or z (2) axis."""
+    c, s = math.cos(deg(degrees)), math.sin(deg(degrees))
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    matrix = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    matrix[i][i], matrix[i][j] = c, -s
+    matrix[j][i], matrix[j][j] = s, c
+    return matrix
+
+
+def matmul(a: list, b: list) -> list:
+    return [[sum(a[i][k] * b[k][j] for k in range(len(b))) for j in range(len(b[0]))] for i in range(len(a))]
+
+
+def finger_matrix(transform: FingerTransform, unit: str = 'cm') -> list:
+    """Returns the 4x4 row-major matrix create_finger_base applies to a finger.
+
+    create_finger_base first translates the copied body, then rotates it about
+    x, y and z in that order, each about world axes through the translated
+    origin plus PIVOT_OFFSET. The composed matrix is
+
+        T(p) Rz Ry Rx T(-p) T(t),  with p = t + PIVOT_OFFSET
+
+    Arguments:
+    transform -- One row of a transform table.
+    unit -- 'cm' for Fusion's internal units or 'mm' for the table's units.
+    """
+    scale = mm(1.0) if unit == 'cm' else 1.0
+    t = [v * scale for v in transform.translation]
+    p = [v + o * scale for v, o in zip(t, PIVOT_OFFSET)]
+
+    r = rotation(0, transform.rx)
+    r = matmul(rotation(1, transform.ry), r)
+    r = matmul(rotation(2, transform.rz), r)
+
+    # Translation part: p - R p + R t
+    rp = [sum(r[i][k] * p[k] for k in range(3)) for i in range(3)]
+    rt = [sum(r[i][k] * t[k] for k in range(3)) for i in range(3)]
+    translation = [p[i] - rp[i] + rt[i] for i in range(3)]
+    return [r[0] + [translation[0]], r[1] + [translation[1]], r[2] + [translation[2]], [0.0, 0.0, 0.0, 1.0]]
+
+
+def column_major(matrix: list) -> list:
+    """Flattens a 4x4 row-major matrix in the column-major order WebGL expects."""
+    return [matrix[row][col] for col in range(4) for row in range(4)]